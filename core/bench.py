@@ -0,0 +1,125 @@
+import os
+import statistics
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+import msgspec
+from loguru import logger
+
+from core import cassette
+from core.configes import Config, Settings
+from core.exchange import Exchange
+from core.factory import ExchangeFactory
+from core.utils import format_table
+
+COLUMNS = (
+    ("exchange", "Биржа"),
+    ("token", "Токен"),
+    ("chains", "get_chains_list"),
+    ("balance", "get_balance"),
+    ("withdraw", "withdraw"),
+)
+
+# Адрес-заглушка: при воспроизведении вывод сопоставляется по пути запроса
+BENCH_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+def replay_config() -> Config:
+    """
+    Конфигурация с ключами-заглушками: подпись запросов работает,
+    а в кассеты ключи не записываются
+    """
+    credentials = {"api_key": "cassette", "api_secret": "cassette", "password": "cassette"}
+    return msgspec.convert(
+        {"settings": {name: credentials for name in Settings.__struct_fields__}},
+        Config
+    )
+
+
+def _measure(operation: Callable[[], object], rounds: int) -> Tuple[Optional[str], float]:
+    """
+    Проверка операции (первый вызов) и медиана времени остальных вызовов
+
+    Returns:
+        (ошибка или None, медиана в мс)
+    """
+    try:
+        if not operation():
+            return "пустой результат", 0.0
+    except Exception as e:
+        return str(e).splitlines()[0][:40] or type(e).__name__, 0.0
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - started) * 1000)
+    return None, statistics.median(timings)
+
+
+def bench_exchange(name: str, config: Config, token: str, rounds: int) -> Dict[str, str]:
+    """
+    Прогон get_chains_list, get_balance и withdraw адаптера на записанных ответах
+    """
+    row = {"exchange": name.upper(), "token": token}
+    try:
+        exchange: Exchange = ExchangeFactory.create(name, config, token, (Decimal(1), Decimal(1)))
+        chains = exchange.get_chains_list()
+    except Exception as e:
+        row["chains"] = f"ошибка: {str(e).splitlines()[0][:40]}"
+        return row
+
+    # Разбор сетей каждый раз выполняется заново по ответу fetch_currencies
+    operations = {
+        "chains": exchange.refresh_chains_list,
+        "balance": lambda: exchange.get_balance(0) is not None,
+    }
+    if chains:
+        chain = next(iter(chains.values()))
+        amount = max(chain["withdrawMin"], Decimal(1))
+        operations["withdraw"] = lambda: exchange.withdraw(chain, BENCH_ADDRESS, amount)
+
+    for key, operation in operations.items():
+        error, median = _measure(operation, rounds)
+        row[key] = f"ошибка: {error}" if error else f"{median:.2f} мс"
+    return row
+
+
+def run_bench(directory: str = "data/cassettes", rounds: int = 20) -> List[Dict[str, str]]:
+    """
+    Проверка и замер адаптеров всех бирж на кассетах из directory без сети.
+    Кассеты записываются запуском с --record
+
+    Returns:
+        Строки таблицы
+    """
+    names = [
+        name for name in ExchangeFactory.EXCHANGES
+        if os.path.exists(os.path.join(directory, f"{name}.json"))
+    ]
+    if not names:
+        logger.error(f"В {directory} нет записанных кассет (запустите с --record {directory})")
+        return []
+
+    active = cassette.start(directory, record=False)
+    config = replay_config()
+    rows = []
+    logger.info(f"Воспроизведение кассет: {', '.join(name.upper() for name in names)}...")
+    # Логи адаптеров на каждом повторе не нужны и искажают замер
+    logger.disable("core")
+    try:
+        for name in names:
+            token = active.load(name).token
+            rows.append(bench_exchange(name, config, token, rounds))
+    finally:
+        logger.enable("core")
+        cassette.finish()
+
+    logger.info(f"Адаптеры на записанных ответах (медиана из {rounds}):\n" + format_table(COLUMNS, rows))
+    failed = [row["exchange"] for row in rows if any(value.startswith("ошибка") for value in row.values())]
+    if failed:
+        logger.error(f"Ошибки разбора ответов: {', '.join(failed)}")
+    else:
+        logger.success("Все адаптеры разбирают записанные ответы")
+    return rows
@@ -0,0 +1,235 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import msgspec
+from loguru import logger
+
+# Параметры подписи, ключей и переменные части запроса: в кассету
+# не записываются и не участвуют в сопоставлении запросов
+REDACTED = {
+    "signature", "sign", "Signature", "SignatureMethod", "SignatureVersion",
+    "timestamp", "Timestamp", "recvWindow", "nonce", "tonce",
+    "apiKey", "api_key", "AccessKeyId", "accessKey", "secret", "password",
+    "email", "uid", "userId", "userID", "subAcct", "memberId",
+    # Клиентские ID выводов (ключи идемпотентности)
+    "withdrawOrderId", "clientId", "requestId", "clientOid",
+    "withdraw_order_id", "client-order-id", "transferId",
+}
+
+# Личные данные в ответах заменяются, а не удаляются,
+# чтобы разбор ответа адаптером не менялся
+PERSONAL = {"apiKey", "api_key", "accessKey", "email", "ip", "ips", "mobile", "phone"}
+
+
+class Interaction(msgspec.Struct):
+    method: str
+    url: str
+    body: Optional[str]
+    response: Any = None
+    error: Optional[Tuple[str, str]] = None
+
+
+class Tape(msgspec.Struct):
+    exchange: str
+    token: str
+    interactions: List[Interaction] = []
+
+
+def _redact_query(query: str) -> str:
+    return urlencode([(key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+                      if key not in REDACTED])
+
+
+def _redact_body(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _redact_body(item) for key, item in value.items() if key not in REDACTED}
+    if isinstance(value, list):
+        return [_redact_body(item) for item in value]
+    return value
+
+
+def redact_response(value: Any) -> Any:
+    """
+    Ответ биржи с замененными личными данными
+    """
+    if isinstance(value, dict):
+        return {
+            key: "***" if key in PERSONAL and item else redact_response(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact_response(item) for item in value]
+    return value
+
+
+def redact_request(url: str, body: Any) -> Tuple[str, Optional[str]]:
+    """
+    URL и тело запроса без подписи, ключей и меток времени
+    """
+    parts = urlsplit(url)
+    url = urlunsplit(parts._replace(query=_redact_query(parts.query)))
+    if body is None or body == "":
+        return url, None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    try:
+        decoded = msgspec.json.decode(body)
+    except msgspec.DecodeError:
+        return url, _redact_query(body)
+    return url, msgspec.json.encode(_redact_body(decoded)).decode()
+
+
+class Cassette:
+    """
+    Запись и воспроизведение HTTP-ответов бирж на уровне ccxt.
+
+    Подменяет метод fetch ccxt-клиента: при записи ответы биржи
+    сохраняются в файл (без подписей, ключей и личных данных), при
+    воспроизведении клиент отвечает из файла без сети и без пауз
+    rateLimit. Запрос сопоставляется сначала точно, затем по методу
+    и пути - так воспроизводятся выводы со случайной суммой и адресом.
+    """
+
+    def __init__(self, directory: str, record: bool):
+        """
+        Args:
+            directory: Папка с кассетами (файл <биржа>.json на биржу)
+            record: True - запись ответов, False - воспроизведение
+        """
+        self.directory = directory
+        self.record = record
+        self.tapes: Dict[str, Tape] = {}
+        self._index: Dict[Tuple[str, ...], List[Interaction]] = {}
+        self._positions: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def path(self, exchange: str) -> str:
+        return os.path.join(self.directory, f"{exchange}.json")
+
+    def load(self, exchange: str) -> Tape:
+        with open(self.path(exchange), "rb") as file:
+            tape = msgspec.json.decode(file.read(), type=Tape)
+        self.tapes[exchange] = tape
+        # Индекс для воспроизведения: точный запрос и запрос по пути
+        for item in tape.interactions:
+            for key in (
+                    (exchange, item.method, item.url, item.body or ""),
+                    (exchange, item.method, urlsplit(item.url).path),
+            ):
+                self._index.setdefault(key, []).append(item)
+        return tape
+
+    def attach(self, client: Any, token: str) -> None:
+        """
+        Подключает ccxt-клиента к кассете его биржи
+        """
+        exchange = client.id
+        if self.record:
+            self.tapes.setdefault(exchange, Tape(exchange, token))
+            real_fetch = client.fetch
+            client.fetch = lambda url, method="GET", headers=None, body=None: (
+                self._record(exchange, real_fetch, url, method, headers, body)
+            )
+        else:
+            if exchange not in self.tapes:
+                self.load(exchange)
+            client.enableRateLimit = False
+            client.fetch = lambda url, method="GET", headers=None, body=None: (
+                self._replay(exchange, url, method, body)
+            )
+
+    def _record(self, exchange, real_fetch, url, method, headers, body):
+        import ccxt
+
+        request_url, request_body = redact_request(url, body)
+        interaction = Interaction(method, request_url, request_body)
+        try:
+            response = real_fetch(url, method, headers, body)
+            interaction.response = redact_response(response)
+            return response
+        except ccxt.BaseError as e:
+            interaction.error = (type(e).__name__, str(e))
+            raise
+        finally:
+            with self._lock:
+                self.tapes[exchange].interactions.append(interaction)
+
+    def _replay(self, exchange: str, url: str, method: str, body: Any) -> Any:
+        import ccxt
+
+        request_url, request_body = redact_request(url, body)
+        path = urlsplit(request_url).path
+        for key in (
+                (exchange, method, request_url, request_body or ""),
+                (exchange, method, path),
+        ):
+            candidates = self._index.get(key)
+            if candidates:
+                break
+        else:
+            raise ccxt.NetworkError(f"Запрос не записан в кассету {exchange}: {method} {path}")
+
+        # Повторяющиеся запросы получают записанные ответы по очереди,
+        # после последнего - снова последний
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        interaction = candidates[min(position, len(candidates) - 1)]
+        if interaction.error is not None:
+            name, message = interaction.error
+            raise getattr(ccxt, name, ccxt.ExchangeError)(message)
+        return interaction.response
+
+    def save(self) -> List[str]:
+        """
+        Сохраняет записанные кассеты
+
+        Returns:
+            Пути к файлам кассет
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        paths = []
+        for exchange, tape in self.tapes.items():
+            path = self.path(exchange)
+            with open(path, "wb") as file:
+                file.write(msgspec.json.format(msgspec.json.encode(tape)))
+            paths.append(path)
+        return paths
+
+
+_active: Optional[Cassette] = None
+
+
+def start(directory: str, record: bool) -> Cassette:
+    """
+    Включает запись или воспроизведение для всех создаваемых клиентов бирж
+    """
+    global _active
+    _active = Cassette(directory, record)
+    return _active
+
+
+def attach(client: Any, token: str) -> None:
+    """
+    Подключает клиента к активной кассете (без кассеты ничего не делает)
+    """
+    if _active is not None:
+        _active.attach(client, token)
+
+
+def replaying() -> bool:
+    return _active is not None and not _active.record
+
+
+def finish() -> None:
+    """
+    Сохраняет записанные кассеты и отключает кассету
+    """
+    global _active
+    cassette, _active = _active, None
+    if cassette is None or not cassette.record:
+        return
+    for path in cassette.save():
+        logger.success(f"Ответы биржи записаны в {path}")
@@ -4,6 +4,8 @@ import msgspec.toml
 from loguru import logger
 from msgspec import Struct
 
+from core.transport import TransportConfig
+
 
 class Data3Type(Struct):
     api_key: str
@@ -27,37 +29,64 @@ class Settings(Struct):
     htx: Data2Type
     coinex: Data2Type
 
+class DaemonConfig(Struct):
+    """
+    Секция [daemon]: общий секрет для запросов к сервису заданий
+    (заголовок Authorization: Bearer <token>)
+    """
+    token: str = ""
+
+
+class CoordinatorConfig(Struct):
+    """
+    Секция [coordinator]: общий секрет координатора и его воркеров
+    (заголовок Authorization: Bearer <token>)
+    """
+    token: str = ""
+
+
 class Config(Struct):
     settings: Settings
+    daemon: DaemonConfig = msgspec.field(default_factory=DaemonConfig)
+    coordinator: CoordinatorConfig = msgspec.field(default_factory=CoordinatorConfig)
+    transport: TransportConfig = msgspec.field(default_factory=TransportConfig)
 
     @classmethod
-    def load(cls) -> "Config":
-        config_path = None
-        try:
-            current_file_path = os.path.abspath(__file__)
-            current_dir_path = os.path.dirname(current_file_path)
-            project_root_path = os.path.dirname(current_dir_path)
+    def find_path(cls) -> str:
+        """
+        Путь к файлу конфигурации: data/config.toml или config.toml в корне проекта
+        """
+        current_file_path = os.path.abspath(__file__)
+        current_dir_path = os.path.dirname(current_file_path)
+        project_root_path = os.path.dirname(current_dir_path)
 
-            config_path = os.path.join(project_root_path, "data", "config.toml")
+        config_path = os.path.join(project_root_path, "data", "config.toml")
 
-            if not os.path.exists(config_path):
-                alt_config_path = os.path.join(project_root_path, "data/config.toml")
-                if os.path.exists(alt_config_path):
-                    config_path = alt_config_path
+        if not os.path.exists(config_path):
+            alt_config_path = os.path.join(project_root_path, "data/config.toml")
+            if os.path.exists(alt_config_path):
+                config_path = alt_config_path
+            else:
+                root_config_path = os.path.join(project_root_path, "config.toml")
+                if os.path.exists(root_config_path):
+                    config_path = root_config_path
                 else:
-                    root_config_path = os.path.join(project_root_path, "config.toml")
-                    if os.path.exists(root_config_path):
-                        config_path = root_config_path
-                    else:
-                        raise FileNotFoundError(
-                            f"Файл конфигурации не найден по пути: {config_path}"
-                        )
+                    raise FileNotFoundError(
+                        f"Файл конфигурации не найден по пути: {config_path}"
+                    )
+        return config_path
+
+    @classmethod
+    def load(cls) -> "Config":
+        config_path = None
+        try:
+            config_path = cls.find_path()
 
             with open(config_path, "rb") as config_file:
                 return msgspec.toml.decode(config_file.read(), type=cls)
 
-        except FileNotFoundError:
-            logger.error(f"Файл конфигурации config.toml не найден: {config_path}")
+        except FileNotFoundError as e:
+            logger.error(f"Файл конфигурации config.toml не найден: {config_path or e}")
             raise
         except PermissionError:
             logger.error(f"Нет доступа к файлу конфигурации config.toml")
@@ -0,0 +1,303 @@
+import hmac
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import msgspec
+from loguru import logger
+
+from core import transport
+from core.configes import Config
+from core.factory import ExchangeFactory
+from core.server_time import stop_clocks
+from core.service import WithdrawalService
+from core.utils import WalletType, is_loopback
+from core.validator import check_wallet_list, check_wallet_rows, check_wallets
+from core.wallet_file import is_table_file
+
+
+class LegSpec(msgspec.Struct):
+    token: str
+    chain: str
+    min_amount: Decimal
+    max_amount: Decimal
+    decimals: Optional[int] = None
+
+
+class JobSpec(msgspec.Struct):
+    """
+    Задание рассылки: биржа, токены с сетями, кошельки (списком или
+    файлом, который читается заново для каждого задания) и задержка
+    """
+    exchange: str
+    legs: List[LegSpec]
+    wallets: Optional[List[str]] = None
+    wallets_file: str = "data/wallets.txt"
+    blocklist_file: Optional[str] = "data/blocklist.txt"
+    # Задержка между выводами в целых секундах (мин., макс.)
+    delay: Tuple[int, int] = (0, 0)
+    force: bool = False
+    sweep: bool = False
+    wait_deposit: bool = False
+    failover: bool = False
+    whitelist_only: bool = False
+    # Пропустить кошельки, уже получившие токены за столько дней (по истории)
+    skip_received: Optional[float] = None
+
+
+class Job(msgspec.Struct):
+    id: str
+    spec: JobSpec
+    status: str = "queued"
+    created: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    total: int = 0
+    done: int = 0
+    succeeded: int = 0
+    error: Optional[str] = None
+    # Адреса с неудачным выводом: итоги по всем кошелькам остаются в
+    # ResultStore на время задания и в отчете запуска
+    failed: List[str] = []
+
+
+class Daemon:
+    """
+    Постоянно работающий сервис рассылок с HTTP API на localhost.
+
+    Клиенты бирж создаются один раз и остаются авторизованными, с уже
+    загруженными рынками, поэтому задание начинается без прогрева.
+    Задания разных бирж выполняются параллельно, одной биржи - по очереди.
+    Конфигурация перечитывается при изменении файла, файлы кошельков -
+    при каждом задании.
+    """
+
+    def __init__(self, workers: int = 4):
+        self.jobs: Dict[str, Job] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._clients: Dict[str, Any] = {}
+        self._exchange_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._config: Optional[Config] = None
+        self._config_mtime = 0.0
+
+    def config(self) -> Config:
+        """
+        Конфигурация с перезагрузкой при изменении файла.
+        После перезагрузки клиенты бирж создаются заново с новыми ключами
+        """
+        with self._lock:
+            mtime = os.path.getmtime(Config.find_path())
+            if self._config is None or mtime != self._config_mtime:
+                if self._config is not None:
+                    logger.info("Файл конфигурации изменен, перезагружаю")
+                self._config = Config.load()
+                self._config_mtime = mtime
+                for client in self._clients.values():
+                    stop_clocks(client.id)
+                self._clients.clear()
+            return self._config
+
+    def submit(self, spec: JobSpec) -> Job:
+        if ExchangeFactory.get_class(spec.exchange) is None:
+            raise ValueError(f"Неподдерживаемая биржа: {spec.exchange}")
+        if not spec.legs:
+            raise ValueError("Не указаны токены для вывода")
+        if not 0 <= spec.delay[0] <= spec.delay[1]:
+            raise ValueError(f"Некорректная задержка: {list(spec.delay)}")
+
+        job = Job(id=uuid.uuid4().hex[:8], spec=spec, created=time.time())
+        with self._lock:
+            self.jobs[job.id] = job
+        self._executor.submit(self._run_job, job)
+        logger.info(f"Задание {job.id} ({spec.exchange.upper()}) добавлено в очередь")
+        return job
+
+    def _load_wallets(self, spec: JobSpec) -> List[Any]:
+        # Кошельки из запроса проверяются так же, как из файла
+        source = spec.wallets_file
+        if spec.wallets is not None:
+            wallets, wallet_type = check_wallet_list(spec.wallets, spec.blocklist_file)
+            source = "запросе"
+        elif is_table_file(spec.wallets_file):
+            wallets, wallet_type = check_wallet_rows(spec.wallets_file, spec.blocklist_file)
+        else:
+            wallets, wallet_type = check_wallets(spec.wallets_file, spec.blocklist_file)
+        if not wallets:
+            raise ValueError(f"Нет кошельков в {source}")
+        if (not wallet_type or wallet_type == WalletType.UNKNOWN) and not spec.force:
+            raise ValueError(
+                "Проверка кошельков не пройдена (для запуска укажите force)"
+            )
+        return wallets
+
+    def _build_service(self, job: Job) -> WithdrawalService:
+        spec = job.spec
+        config = self.config()
+        name = spec.exchange.lower()
+        client = self._clients.get(name)
+
+        legs = []
+        for leg in spec.legs:
+            exchange = ExchangeFactory.create(
+                name,
+                config,
+                leg.token,
+                (leg.min_amount, leg.max_amount),
+                leg.decimals,
+                client=client
+            )
+            if client is None:
+                client = self._clients[name] = exchange.exchange
+            legs.append(exchange)
+        return WithdrawalService(
+            legs[0], extra_legs=legs[1:], job_id=job.id,
+            sweep=spec.sweep, wait_deposit=spec.wait_deposit,
+            failover=spec.failover, enforce_whitelist=spec.whitelist_only
+        )
+
+    def _run_job(self, job: Job) -> None:
+        name = job.spec.exchange.lower()
+        with self._lock:
+            exchange_lock = self._exchange_locks.setdefault(name, threading.Lock())
+
+        with exchange_lock:
+            job.status = "running"
+            job.started = time.time()
+            logger.info(f"Задание {job.id}: запуск")
+            try:
+                wallets = self._load_wallets(job.spec)
+                service = self._build_service(job)
+                if job.spec.skip_received is not None and service.history is not None:
+                    wallets = service.history.exclude_received(
+                        wallets, [leg.token for leg in service.legs], job.spec.skip_received
+                    )
+                job.total = len(wallets)
+                service.subscribe(lambda event, data: self._track(job, event, data))
+                results = service.process_withdrawal(
+                    wallets,
+                    job.spec.delay,
+                    chains={leg.token.upper(): leg.chain for leg in job.spec.legs}
+                )
+                job.failed = results.failures()
+                if service.error is not None:
+                    job.status = "failed"
+                    job.error = service.error
+                else:
+                    job.status = "done"
+            except Exception as e:
+                logger.error(f"Задание {job.id}: {e}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished = time.time()
+
+        logger.info(
+            f"Задание {job.id} завершено: {job.status}, "
+            f"успешно {job.succeeded}/{job.total}"
+        )
+        transport.log_stats()
+
+    @staticmethod
+    def _track(job: Job, event: str, data: Dict[str, Any]) -> None:
+        if event == "wallet":
+            job.done += 1
+            job.succeeded += data["success"]
+
+    def status(self, job_id: Optional[str] = None) -> Any:
+        # Задания добавляются из других потоков HTTP-сервера
+        with self._lock:
+            jobs = list(self.jobs.values())
+            job = self.jobs.get(job_id) if job_id is not None else None
+        if job_id is None:
+            return [
+                {key: value for key, value in msgspec.to_builtins(job).items() if key != "failed"}
+                for job in jobs
+            ]
+        return msgspec.to_builtins(job) if job is not None else None
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """
+        Запускает HTTP API и обрабатывает запросы до остановки (Ctrl+C):
+
+        POST /jobs - добавить задание (JSON JobSpec), GET /jobs - список
+        заданий, GET /jobs/<id> - статус задания и адреса с неудачным выводом.
+        Все запросы - с заголовком Authorization: Bearer <token> из
+        секции [daemon] config.toml. Сервис слушает только локальный адрес
+        """
+        if not is_loopback(host):
+            logger.error(
+                f"Сервис заданий запускается только на локальном адресе "
+                f"(127.0.0.1, ::1), а не {host}"
+            )
+            return
+        if not self.config().daemon.token:
+            logger.error(
+                "Для сервиса заданий укажите секрет в data/config.toml:\n"
+                "[daemon]\ntoken = \"<длинная случайная строка>\""
+            )
+            return
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code: int, payload: Any) -> None:
+                body = msgspec.json.encode(payload)
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self) -> bool:
+                expected = f"Bearer {daemon.config().daemon.token}"
+                received = self.headers.get("Authorization", "")
+                if hmac.compare_digest(received.encode(), expected.encode()):
+                    return True
+                self._reply(401, {"error": "unauthorized"})
+                return False
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path == "/jobs":
+                    self._reply(200, daemon.status())
+                elif self.path.startswith("/jobs/"):
+                    job = daemon.status(self.path[len("/jobs/"):])
+                    self._reply(200 if job else 404, job or {"error": "not found"})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                if self.path != "/jobs":
+                    self._reply(404, {"error": "not found"})
+                    return
+                # Только JSON: простой запрос браузера (text/plain) не создаст задание
+                if self.headers.get_content_type() != "application/json":
+                    self._reply(415, {"error": "expected application/json"})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    spec = msgspec.json.decode(self.rfile.read(length), type=JobSpec)
+                    job = daemon.submit(spec)
+                except (msgspec.ValidationError, msgspec.DecodeError, ValueError) as e:
+                    self._reply(400, {"error": str(e)})
+                    return
+                self._reply(202, {"id": job.id})
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        logger.info(f"Сервис заданий запущен: http://{host}:{server.server_address[1]}/jobs")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,193 @@
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from core.utils import format_amount, format_duration, setup_logger
+
+
+class Dashboard:
+    """
+    Панель прогресса рассылки по событиям WithdrawalService.
+
+    Обработчик событий только кладет их в очередь, а подсчет и отрисовка
+    выполняются в отдельном потоке, поэтому выводы не замедляются.
+    В терминале панель перерисовывается под сообщениями лога, без
+    терминала (вывод в файл) раз в plain_interval пишется строка в лог.
+    """
+
+    def __init__(
+            self,
+            live: Optional[bool] = None,
+            refresh: float = 1.0,
+            plain_interval: float = 30.0
+    ):
+        """
+        Args:
+            live: Живая панель в терминале (по умолчанию - если stdout терминал)
+            refresh: Период перерисовки панели, сек.
+            plain_interval: Период строки прогресса в текстовом режиме, сек.
+        """
+        self.live = sys.stdout.isatty() if live is None else live
+        self.refresh = refresh
+        self.plain_interval = plain_interval
+        self.started = time.monotonic()
+        self.total = 0
+        self.done = 0
+        self.succeeded = 0
+        self.balances: Dict[str, Decimal] = {}
+        self.spent: Dict[str, Decimal] = {}
+        self.rates: Dict[str, deque] = {}
+        self.counts: Dict[str, int] = {}
+        # Перцентили по последним выводам: память не растет с числом кошельков
+        self.latencies: deque = deque(maxlen=10000)
+        self.exchange_time = 0.0
+        self.sleep_time = 0.0
+        self.pause_time = 0.0
+        self._events: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._output_lock = threading.Lock()
+        self._panel_lines = 0
+        self._lines: List[str] = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __call__(self, event: str, data: Dict[str, Any]) -> None:
+        self._events.put((time.monotonic(), event, data))
+
+    def start(self) -> None:
+        if self.live:
+            setup_logger(sink=self._write_log)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        with self._output_lock:
+            self._drain()
+            if self.live:
+                self._erase()
+        if self.live:
+            setup_logger()
+        logger.info("Итоги рассылки:\n" + "\n".join(self.render()))
+
+    def _run(self) -> None:
+        last_plain = time.monotonic()
+        while not self._stop.wait(self.refresh):
+            with self._output_lock:
+                self._drain()
+                self._lines = self.render()
+                if self.live:
+                    self._erase()
+                    self._draw()
+            if (
+                    not self.live and self.total
+                    and time.monotonic() - last_plain >= self.plain_interval
+            ):
+                last_plain = time.monotonic()
+                logger.info(" | ".join(self._lines[:2]))
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                moment, event, data = self._events.get_nowait()
+            except queue.Empty:
+                return
+            self._apply(moment, event, data)
+
+    def _apply(self, moment: float, event: str, data: Dict[str, Any]) -> None:
+        if event == "start":
+            self.total += data["total"]
+            self.balances.update(data["balances"])
+            self.rates.setdefault(data["exchange"], deque())
+            self.counts.setdefault(data["exchange"], 0)
+        elif event == "withdrawal":
+            self.latencies.append(data["latency"])
+            self.exchange_time += data["latency"]
+            self.spent[data["token"]] = data["spent"]
+            self.rates.setdefault(data["exchange"], deque()).append(moment)
+            self.counts[data["exchange"]] = self.counts.get(data["exchange"], 0) + 1
+        elif event == "wallet":
+            self.done += 1
+            self.succeeded += data["success"]
+        elif event == "sleep":
+            self.sleep_time += data["seconds"]
+        elif event == "pause":
+            self.pause_time += data["seconds"]
+        elif event == "failover":
+            # Резервная биржа заново сообщит об оставшихся кошельках в start
+            self.total -= data["remaining"]
+
+    @staticmethod
+    def _percentile(ordered: List[float], share: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+    def render(self) -> List[str]:
+        """
+        Строки панели по накопленным событиям
+        """
+        now = time.monotonic()
+        elapsed = now - self.started
+        failed = self.done - self.succeeded
+        share = self.done / self.total * 100 if self.total else 0
+        lines = [
+            f"Прогресс: {self.done}/{self.total} ({share:.1f}%), "
+            f"успешно {self.succeeded}, ошибок {failed}"
+        ]
+
+        remaining = self.total - self.done
+        if self.done and remaining:
+            eta = elapsed / self.done * remaining
+            finish = time.strftime("%H:%M", time.localtime(time.time() + eta))
+            lines.append(f"Окончание: через {format_duration(eta)} (~{finish})")
+        else:
+            lines.append(f"Прошло: {format_duration(elapsed)}")
+
+        for exchange, moments in self.rates.items():
+            while moments and now - moments[0] > 60:
+                moments.popleft()
+            average = self.counts.get(exchange, 0) / elapsed * 60 if elapsed else 0
+            lines.append(
+                f"Скорость {exchange.upper()}: {len(moments)} выв./мин "
+                f"(в среднем {average:.1f})"
+            )
+
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            lines.append(
+                f"Ответ биржи: p50 {self._percentile(ordered, 0.5):.2f} с, "
+                f"p90 {self._percentile(ordered, 0.9):.2f} с, "
+                f"p99 {self._percentile(ordered, 0.99):.2f} с"
+            )
+
+        lines.append(
+            f"Время: запросы {format_duration(self.exchange_time)}, "
+            f"задержки {format_duration(self.sleep_time)}, "
+            f"сеть отключена {format_duration(self.pause_time)}"
+        )
+        for token, balance in self.balances.items():
+            left = balance - self.spent.get(token, Decimal(0))
+            lines.append(f"Остаток: {format_amount(left)} ${token}")
+        return lines
+
+    def _write_log(self, message: str) -> None:
+        # Сообщение лога выводится над панелью, панель рисуется заново
+        with self._output_lock:
+            self._erase()
+            sys.stdout.write(str(message))
+            self._draw()
+
+    def _erase(self) -> None:
+        if self._panel_lines:
+            sys.stdout.write(f"\x1b[{self._panel_lines}F\x1b[J")
+            self._panel_lines = 0
+
+    def _draw(self) -> None:
+        lines = ["\x1b[2m" + "─" * 60 + "\x1b[0m"] + self._lines
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+        self._panel_lines = len(lines)
@@ -0,0 +1,634 @@
+import hmac
+import multiprocessing
+import os
+import random
+import secrets
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import msgspec
+from loguru import logger
+
+from core.configes import Config
+from core.exchange import Exchange
+from core.factory import ExchangeFactory
+from core.service import WithdrawalService
+from core.utils import is_loopback, setup_logger
+from core.validator import normalize_address
+from core.wallet_file import WalletRow, row_address
+
+# Состояния кошелька в общем реестре координатора
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+
+def describe_account(
+        service: WithdrawalService,
+        selected_chains: List[Tuple[Exchange, Dict]]
+) -> Dict[str, Any]:
+    """
+    Описание аккаунта для воркеров: биржа и параметры каждого токена
+    с уже выбранной сетью (воркеры работают без вопросов пользователю)
+    """
+    return {
+        "exchange": service.exchange.name,
+        "legs": [
+            {
+                "token": leg.token,
+                "min_amount": str(leg.min_amount),
+                "max_amount": str(leg.max_amount),
+                "decimals": leg.decimal_places,
+                "chain": chain["chainKey"],
+            }
+            for leg, chain in selected_chains
+        ],
+    }
+
+
+class Coordinator:
+    """
+    Координатор распределенной рассылки.
+
+    Делит список кошельков на шарды и закрепляет их за аккаунтами, а воркеры
+    (локальные процессы или другие машины) забирают шарды по HTTP. Реестр
+    выводов, защита от повторной выплаты и темп выводов по каждому аккаунту
+    хранятся только у координатора, поэтому воркеры не могут выплатить
+    дважды или вместе превысить темп аккаунта.
+
+    Воркер готовит рассылку аккаунта один раз (авторизация, баланс, белый
+    список, выбор сети, отчет) по всему списку кошельков аккаунта (/plan),
+    а затем выполняет шарды этого аккаунта в той же рассылке.
+
+    Шард выдается воркеру в аренду: воркер продлевает ее любым запросом
+    и фоновым /heartbeat. Если воркер молчит дольше lease секунд, его
+    необработанные и занятые кошельки возвращаются в очередь для других
+    воркеров (повторный запрос того же вывода биржа отклонит по ключу
+    идемпотентности). Рассылка завершена, когда в реестре не осталось
+    необработанных и занятых кошельков.
+
+    Все запросы воркеров - с заголовком Authorization: Bearer <token>:
+    шарды содержат кошельки, а результаты меняют реестр выводов.
+    """
+
+    def __init__(
+            self,
+            wallets: List[Union[str, WalletRow]],
+            accounts: List[Dict[str, Any]],
+            delay: Tuple[float, float],
+            shard_size: int = 100,
+            job_id: Optional[str] = None,
+            lease: float = 60.0,
+            token: str = ""
+    ):
+        """
+        Args:
+            wallets: Список адресов кошельков или строк CSV
+            accounts: Описания аккаунтов (см. describe_account)
+            delay: Кортеж (мин. задержка, макс. задержка) между выводами
+                одного аккаунта, сек.
+            shard_size: Количество кошельков в одном шарде
+            job_id: ID задания для ключей идемпотентности (общий для воркеров)
+            lease: Время без запросов от воркера, после которого его шард
+                передается другим воркерам, сек.
+            token: Общий секрет координатора и воркеров
+        """
+        self.wallets = wallets
+        self.accounts = accounts
+        self.delay = delay
+        self.job_id = job_id or uuid.uuid4().hex[:8]
+        self.ledger = [PENDING] * len(wallets)
+        self.shards = [
+            (number % len(accounts), list(range(start, min(start + shard_size, len(wallets)))))
+            for number, start in enumerate(range(0, len(wallets), shard_size))
+        ]
+        self.lease = lease
+        self.token = token
+        self.queue = deque(range(len(self.shards)))
+        self.assigned = 0
+        # Шард -> воркер, который его выполняет
+        self.assignments: Dict[int, int] = {}
+        # Занятый кошелек -> воркер
+        self.claims: Dict[int, int] = {}
+        self.next_slot = [0.0] * len(accounts)
+        self.paid = set()
+        self.workers: Dict[int, Dict[str, Any]] = {}
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def job(self) -> Dict[str, Any]:
+        return {"accounts": self.accounts, "job_id": self.job_id}
+
+    def register(self, request: Dict) -> Dict:
+        with self._lock:
+            worker_id = len(self.workers) + 1
+            self.workers[worker_id] = {
+                "host": request.get("host"), "active": True, "seen": time.monotonic()
+            }
+        logger.info(
+            f"Подключен воркер #{worker_id} "
+            f"({request.get('host')}, pid {request.get('pid')})"
+        )
+        return {"worker_id": worker_id, "job": self.job, "lease": self.lease}
+
+    def plan(self, request: Dict) -> Dict:
+        """
+        Все кошельки аккаунта с их позициями в реестре
+        """
+        with self._lock:
+            self._touch(request["worker_id"])
+        account = request["account"]
+        indexes = [
+            index
+            for shard_account, shard in self.shards if shard_account == account
+            for index in shard
+        ]
+        return {
+            "indexes": indexes,
+            "wallets": [msgspec.to_builtins(self.wallets[index]) for index in indexes],
+        }
+
+    def _touch(self, worker_id: int) -> None:
+        worker = self.workers.get(worker_id)
+        if worker is not None:
+            worker["seen"] = time.monotonic()
+
+    def _wallet_key(self, index: int) -> Tuple[str, Optional[str]]:
+        wallet = self.wallets[index]
+        return (
+            normalize_address(row_address(wallet)),
+            wallet.token if isinstance(wallet, WalletRow) else None
+        )
+
+    def _release(self, worker_id: int, state: str) -> None:
+        """
+        Снимает с воркера его шарды: необработанные кошельки шарда и
+        занятые воркером переводятся в state (PENDING - шард возвращается
+        в очередь, FAILED - воркер закончил шард, не обработав их)
+        """
+        for shard_id, owner in list(self.assignments.items()):
+            if owner != worker_id:
+                continue
+            del self.assignments[shard_id]
+            left = False
+            for index in self.shards[shard_id][1]:
+                if self.ledger[index] == CLAIMED and self.claims.get(index) == worker_id:
+                    self.paid.discard(self._wallet_key(index))
+                    self.ledger[index] = PENDING
+                if self.ledger[index] == PENDING:
+                    self.ledger[index] = state
+                    left = True
+            if left and state == PENDING:
+                self.queue.appendleft(shard_id)
+            elif left:
+                logger.warning(
+                    f"Шард {shard_id + 1}: воркер #{worker_id} не обработал часть кошельков"
+                )
+
+    def _expire(self) -> None:
+        """
+        Возвращает в очередь шарды воркеров, молчащих дольше lease
+        """
+        now = time.monotonic()
+        for worker_id, worker in self.workers.items():
+            if worker["active"] and now - worker["seen"] > self.lease:
+                worker["active"] = False
+                logger.warning(
+                    f"Воркер #{worker_id} не отвечает {self.lease:.0f} сек., "
+                    f"его кошельки переданы другим воркерам"
+                )
+                self._release(worker_id, PENDING)
+
+    def _check_finished(self) -> None:
+        if PENDING not in self.ledger and CLAIMED not in self.ledger:
+            self.finished.set()
+
+    def heartbeat(self, request: Dict) -> Dict:
+        with self._lock:
+            self._touch(request["worker_id"])
+            self.workers[request["worker_id"]]["active"] = True
+        return {}
+
+    def take_shard(self, request: Dict) -> Dict:
+        """
+        Следующий шард аккаунта account для воркера. done - у аккаунта
+        не осталось необработанных кошельков, wait - они есть только в
+        шардах других воркеров и могут вернуться в очередь
+        """
+        worker_id = request["worker_id"]
+        account = request["account"]
+        with self._lock:
+            self._touch(worker_id)
+            self.workers[worker_id]["active"] = True
+            # Запрос следующего шарда - предыдущий шард воркера закончен
+            self._release(worker_id, FAILED)
+            self._expire()
+            self._check_finished()
+            shard_id = next(
+                (queued for queued in self.queue if self.shards[queued][0] == account),
+                None
+            )
+            if shard_id is None:
+                left = any(
+                    self.ledger[index] in (PENDING, CLAIMED)
+                    for shard_account, shard in self.shards if shard_account == account
+                    for index in shard
+                )
+                if not left:
+                    self.workers[worker_id]["active"] = False
+                    return {"done": True}
+                return {"wait": min(5.0, self.lease / 3)}
+
+            self.queue.remove(shard_id)
+            self.assignments[shard_id] = worker_id
+            self.assigned += 1
+            account = self.shards[shard_id][0]
+            indexes = [
+                index for index in self.shards[shard_id][1]
+                if self.ledger[index] == PENDING
+            ]
+
+        logger.info(
+            f"Шард {shard_id + 1}/{len(self.shards)} "
+            f"({len(indexes)} кош.) -> воркер #{worker_id}"
+        )
+        return {"shard_id": shard_id, "indexes": indexes}
+
+    def claim(self, request: Dict) -> Dict:
+        """
+        Разрешение на вывод: кошелек не должен быть уже выплачен или
+        занят, а аккаунт должен дождаться своего слота по темпу
+        """
+        index = request["index"]
+        account = request["account"]
+        with self._lock:
+            self._touch(request["worker_id"])
+            if self.ledger[index] != PENDING:
+                return {"allowed": False}
+
+            key = self._wallet_key(index)
+            if key in self.paid:
+                self.ledger[index] = DONE
+                self._check_finished()
+                return {"allowed": False}
+
+            now = time.time()
+            if self.next_slot[account] > now:
+                return {"allowed": False, "wait": self.next_slot[account] - now}
+
+            self.ledger[index] = CLAIMED
+            self.claims[index] = request["worker_id"]
+            self.paid.add(key)
+            self.next_slot[account] = now + random.uniform(*self.delay)
+            return {"allowed": True}
+
+    def report(self, request: Dict) -> Dict:
+        with self._lock:
+            self._touch(request["worker_id"])
+            self.ledger[request["index"]] = DONE if request["success"] else FAILED
+            self.claims.pop(request["index"], None)
+            self._check_finished()
+        return {}
+
+    def status(self, request: Optional[Dict] = None) -> Dict:
+        with self._lock:
+            counts = {state: self.ledger.count(state) for state in (PENDING, CLAIMED, DONE, FAILED)}
+        return {"shards": len(self.shards), "assigned": self.assigned, "wallets": counts}
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8765) -> str:
+        """
+        Запускает HTTP-сервер координатора в фоновом потоке
+
+        Returns:
+            Адрес координатора для воркеров
+        """
+        routes = {
+            "/register": self.register,
+            "/heartbeat": self.heartbeat,
+            "/plan": self.plan,
+            "/shard": self.take_shard,
+            "/claim": self.claim,
+            "/result": self.report,
+            "/status": self.status,
+        }
+
+        expected = f"Bearer {self.token}".encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                received = self.headers.get("Authorization", "").encode()
+                if not hmac.compare_digest(received, expected):
+                    self.send_error(401)
+                    return
+                handler = routes.get(self.path)
+                if handler is None:
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = msgspec.json.decode(self.rfile.read(length)) if length else {}
+                body = msgspec.json.encode(handler(request))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        url = f"http://{host}:{self._server.server_address[1]}"
+        logger.info(f"Координатор запущен: {url}")
+        return url
+
+    def wait(self) -> Dict[str, bool]:
+        """
+        Ждет, пока все кошельки реестра будут обработаны, и останавливает
+        сервер (после того как подключенные воркеры получат done или
+        перестанут отвечать)
+
+        Returns:
+            Словарь с результатами выводов: {адрес: успешно}
+        """
+        while not self.finished.wait(1.0):
+            with self._lock:
+                self._expire()
+                self._check_finished()
+
+        deadline = time.monotonic() + self.lease
+        while time.monotonic() < deadline:
+            with self._lock:
+                self._expire()
+                if not any(worker["active"] for worker in self.workers.values()):
+                    break
+            time.sleep(0.2)
+
+        if self._server is not None:
+            self._server.shutdown()
+
+        status = self.status()["wallets"]
+        logger.success(
+            f"Распределенная рассылка завершена: успешно {status[DONE]}, "
+            f"ошибок {status[FAILED]}, не обработано {status[PENDING] + status[CLAIMED]}"
+        )
+        return {
+            row_address(wallet): state == DONE
+            for wallet, state in zip(self.wallets, self.ledger)
+            if state in (DONE, FAILED)
+        }
+
+
+class CoordinatorClient:
+    """
+    HTTP-клиент воркера для обращения к координатору
+    """
+
+    def __init__(self, url: str, token: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def call(self, path: str, payload: Dict) -> Dict:
+        request = urllib.request.Request(
+            self.url + path,
+            data=msgspec.json.encode(payload),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.token}",
+            },
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return msgspec.json.decode(response.read())
+
+
+class ShardPacer:
+    """
+    Планировщик рассылки аккаунта на воркере: забирает у координатора
+    шарды аккаунта, пока они не закончатся, и перед каждым выводом
+    запрашивает разрешение, а после - сообщает результат
+
+    Вся рассылка аккаунта идет в одном process_withdrawal: позиции
+    task - это позиции кошельков в списке аккаунта (indexes)
+    """
+
+    def __init__(
+            self,
+            client: CoordinatorClient,
+            worker_id: int,
+            account: int,
+            indexes: List[int],
+            clock=time
+    ):
+        self.client = client
+        self.worker_id = worker_id
+        self.account = account
+        self.positions = {index: position for position, index in enumerate(indexes)}
+        self.clock = clock
+        self.started = False
+
+    def next_shard(self) -> Optional[List[int]]:
+        """
+        Позиции в реестре следующего шарда аккаунта или None, если
+        шардов аккаунта больше не будет
+        """
+        while True:
+            shard = self.client.call(
+                "/shard", {"worker_id": self.worker_id, "account": self.account}
+            )
+            if shard.get("done"):
+                return None
+            if shard.get("wait"):
+                self.clock.sleep(shard["wait"])
+                continue
+            return shard["indexes"]
+
+    def run(self, count: int, task) -> None:
+        self.started = True
+        while True:
+            indexes = self.next_shard()
+            if indexes is None:
+                return
+            for index in indexes:
+                self._run_one(index, task)
+
+    def _run_one(self, index: int, task) -> None:
+        request = {"worker_id": self.worker_id, "account": self.account, "index": index}
+        while True:
+            answer = self.client.call("/claim", request)
+            if answer["allowed"] or not answer.get("wait"):
+                break
+            self.clock.sleep(answer["wait"])
+
+        if not answer["allowed"]:
+            logger.info(f"Кошелек {index + 1} уже обработан, пропускаю")
+            return
+
+        success = bool(task(self.positions[index]))
+        self.client.call("/result", {**request, "success": success})
+
+
+def _build_service(
+        config: Config, account: Dict[str, Any], job_id: str
+) -> WithdrawalService:
+    legs = []
+    for leg in account["legs"]:
+        legs.append(ExchangeFactory.create(
+            account["exchange"],
+            config,
+            leg["token"],
+            (leg["min_amount"], leg["max_amount"]),
+            leg["decimals"],
+            client=legs[0].exchange if legs else None
+        ))
+    return WithdrawalService(legs[0], extra_legs=legs[1:], job_id=job_id)
+
+
+def run_worker(url: str, token: Optional[str] = None) -> None:
+    """
+    Воркер: забирает шарды у координатора и выполняет их
+    через WithdrawalService со своими API-ключами из data/config.toml
+
+    Args:
+        url: Адрес координатора
+        token: Секрет координатора (по умолчанию - из секции [coordinator])
+    """
+    config = Config.load()
+    token = token or config.coordinator.token
+    if not token:
+        logger.error(
+            "Для подключения к координатору укажите его секрет в data/config.toml:\n"
+            "[coordinator]\ntoken = \"<тот же, что у координатора>\""
+        )
+        return
+    client = CoordinatorClient(url, token)
+    info = client.call("/register", {"host": socket.gethostname(), "pid": os.getpid()})
+    worker_id = info["worker_id"]
+    accounts = info["job"]["accounts"]
+
+    # Аренда шарда продлевается, пока воркер жив (и во время долгих выводов)
+    stop = threading.Event()
+    threading.Thread(
+        target=_heartbeat, args=(client, worker_id, info["lease"] / 3, stop), daemon=True
+    ).start()
+
+    try:
+        for account in range(len(accounts)):
+            _work(client, worker_id, account, accounts[account], config, info["job"]["job_id"])
+    finally:
+        stop.set()
+
+    logger.info(f"Воркер #{worker_id}: шарды закончились")
+
+
+def _heartbeat(client: CoordinatorClient, worker_id: int, interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            client.call("/heartbeat", {"worker_id": worker_id})
+        except Exception as e:
+            logger.warning(f"Координатор недоступен: {e}")
+
+
+def _work(
+        client: CoordinatorClient,
+        worker_id: int,
+        account: int,
+        description: Dict[str, Any],
+        config: Config,
+        job_id: str
+) -> None:
+    """
+    Рассылка одного аккаунта: подготовка (ключи, баланс, сеть, белый
+    список, монитор сетей, отчет) один раз на воркер, затем все шарды
+    аккаунта, которые выдаст координатор
+    """
+    plan = client.call("/plan", {"worker_id": worker_id, "account": account})
+    if not plan["indexes"]:
+        return
+    wallets = [
+        msgspec.convert(wallet, WalletRow) if isinstance(wallet, dict) else wallet
+        for wallet in plan["wallets"]
+    ]
+    pacer = ShardPacer(client, worker_id, account, plan["indexes"])
+    try:
+        service = _build_service(config, description, job_id)
+        service.process_withdrawal(
+            wallets,
+            (0, 0),
+            scheduler=pacer,
+            chains={leg["token"]: leg["chain"] for leg in description["legs"]}
+        )
+    except Exception as e:
+        logger.error(f"Воркер #{worker_id}: ошибка аккаунта {account + 1}: {e}")
+    if pacer.started:
+        return
+
+    # Рассылка не началась (ключи, баланс, сеть): шарды аккаунта
+    # закрываются как неудачные, иначе координатор ждал бы их без конца
+    logger.error(
+        f"Воркер #{worker_id}: рассылка аккаунта {account + 1} не началась, "
+        f"его шарды отмечаются как неудачные"
+    )
+    while pacer.next_shard() is not None:
+        pass
+
+
+def _local_worker(url: str, token: str) -> None:
+    setup_logger()
+    run_worker(url, token)
+
+
+def run_coordinator(
+        wallets: List[Union[str, WalletRow]],
+        accounts: List[Dict[str, Any]],
+        delay: Tuple[float, float],
+        local_workers: int = 1,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        shard_size: int = 100,
+        job_id: Optional[str] = None,
+        token: str = ""
+) -> Dict[str, bool]:
+    """
+    Запускает координатор и local_workers локальных процессов-воркеров.
+    Удаленные воркеры подключаются командой python main.py --worker <адрес>
+    с тем же секретом token в секции [coordinator] своего config.toml.
+    Без секрета координатор работает только на локальном адресе со
+    случайным секретом для локальных воркеров.
+
+    Returns:
+        Словарь с результатами выводов: {адрес: успешно}
+    """
+    if not token:
+        if not is_loopback(host):
+            logger.error(
+                "Для удаленных воркеров укажите секрет координатора в data/config.toml:\n"
+                "[coordinator]\ntoken = \"<длинная случайная строка>\""
+            )
+            return {}
+        token = secrets.token_urlsafe(32)
+
+    coordinator = Coordinator(wallets, accounts, delay, shard_size, job_id, token=token)
+    url = coordinator.serve(host, port)
+
+    processes = [
+        multiprocessing.Process(target=_local_worker, args=(url, token), daemon=True)
+        for _ in range(local_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    results = coordinator.wait()
+    for process in processes:
+        process.join()
+    return results
@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from loguru import logger
+
+from core.configes import Config, Settings
+from core.exchange import Exchange, to_decimal
+from core.factory import ExchangeFactory
+from core.utils import format_amount, format_table
+
+COLUMNS = (
+    ("exchange", "Биржа"),
+    ("auth", "Авторизация"),
+    ("withdraw", "Вывод"),
+    ("spot", "Spot"),
+    ("funding", "Funding"),
+    ("clock", "Часы"),
+    ("time", "Время"),
+)
+
+
+def configured_exchanges(config: Config) -> List[str]:
+    """
+    Биржи из data/config.toml с указанным API-ключом
+    """
+    return [
+        name for name in Settings.__struct_fields__
+        if getattr(config.settings, name).api_key
+    ]
+
+
+def describe_error(error: Exception) -> str:
+    import ccxt
+
+    if isinstance(error, ccxt.AuthenticationError):
+        return "неверный ключ"
+    if isinstance(error, ccxt.PermissionDenied):
+        return "нет доступа (IP?)"
+    if isinstance(error, ccxt.NetworkError):
+        return "нет связи"
+    return str(error).splitlines()[0][:40] if str(error) else type(error).__name__
+
+
+def describe_balance(balances: Dict) -> str:
+    totals = {
+        token: to_decimal(amount)
+        for token, amount in (balances.get("total") or {}).items()
+        if amount
+    }
+    text = f"{len(totals)} акт."
+    if totals.get("USDT"):
+        text += f", USDT {format_amount(totals['USDT'])}"
+    return text
+
+
+def _run_check(check: Callable[[], str]) -> Tuple[bool, str]:
+    try:
+        return True, check()
+    except Exception as e:
+        return False, describe_error(e)
+
+
+def check_exchange(name: str, config: Config) -> Dict[str, str]:
+    """
+    Проверяет одну биржу: все запросы выполняются параллельно
+
+    Returns:
+        Строка матрицы {колонка: значение}
+    """
+    started = time.monotonic()
+    row = {"exchange": name.upper()}
+    try:
+        exchange: Exchange = ExchangeFactory.create(name, config, "USDT", (0, 0))
+    except Exception as e:
+        row["auth"] = describe_error(e)
+        row["time"] = f"{time.monotonic() - started:.1f} с"
+        return row
+
+    def permission() -> str:
+        allowed = exchange.check_withdraw_permission()
+        return "—" if allowed is None else ("да" if allowed else "ЗАПРЕЩЕН")
+
+    checks = {
+        "spot": lambda: describe_balance(exchange.exchange.fetch_balance()),
+        "withdraw": permission,
+    }
+    if exchange.uses_funding_wallet:
+        checks["funding"] = lambda: describe_balance(
+            exchange.exchange.fetch_balance({"type": "funding"})
+        )
+
+    with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+        futures = {key: pool.submit(_run_check, check) for key, check in checks.items()}
+        results = {key: future.result() for key, future in futures.items()}
+    row.update({key: text for key, (_, text) in results.items()})
+
+    # Успешный запрос баланса подтверждает ключ и доступ с этого IP
+    authorized, text = results["spot"]
+    row["auth"] = "ok" if authorized else text
+    if exchange.server_clock is not None:
+        offset = exchange.server_clock.offset
+        row["clock"] = f"{offset:+.0f} мс" + (" (!)" if abs(offset) >= 1000 else "")
+    row["time"] = f"{time.monotonic() - started:.1f} с"
+    return row
+
+
+def run_doctor(config: Config) -> List[Dict[str, str]]:
+    """
+    Параллельная проверка всех настроенных бирж: ключи, право вывода,
+    балансы и расхождение часов. Печатает сводную таблицу
+
+    Returns:
+        Строки таблицы
+    """
+    names = configured_exchanges(config)
+    if not names:
+        logger.error("В data/config.toml не указан ни один API-ключ")
+        return []
+
+    logger.info(f"Проверяю биржи: {', '.join(name.upper() for name in names)}...")
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        rows = list(pool.map(lambda name: check_exchange(name, config), names))
+
+    logger.info("Состояние бирж:\n" + format_table(COLUMNS, rows))
+    logger.info(f"Проверка заняла {time.monotonic() - started:.1f} с")
+    return rows
@@ -1,11 +1,55 @@
+import hashlib
 import random
-import ccxt
+import threading
+import time
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Tuple, Optional
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+from typing import Dict, Any, List, Tuple, Optional, Set, TYPE_CHECKING
+
+import msgspec
 from loguru import logger
 
+from core import cassette, transport
 from core.configes import Config
+from core.server_time import ServerClock, sync_client
+
+# ccxt импортируется при создании клиента биржи: загрузка его
+# каталога бирж - самая долгая часть запуска, а до выбора биржи
+# и токена он не нужен
+if TYPE_CHECKING:
+    import ccxt
+
+
+class SubAccounts(ABC):
+    """
+    Сбор средств с субаккаунтов на основной аккаунт (SubAccountSweeper).
+    Подмешивается только к биржам, которые поддерживают его через API
+    """
+
+    @abstractmethod
+    def fetch_sub_accounts(self) -> List[str]:
+        """
+        Идентификаторы всех субаккаунтов (email, UID или имя - как
+        требует перевод биржи), по всем страницам списка
+        """
+
+    @abstractmethod
+    def fetch_sub_account_balance(self, sub_account: str) -> Decimal:
+        """
+        Доступный для перевода баланс токена на субаккаунте
+        """
+
+    @abstractmethod
+    def transfer_from_sub_account(self, sub_account: str, amount: Decimal) -> None:
+        """
+        Внутренний перевод токена с субаккаунта на кошелек основного
+        аккаунта, с которого выполняются выводы
+        """
+
+
+# Результат поиска вывода в истории по клиентскому ID
+LOOKUP_FOUND, LOOKUP_MISSING, LOOKUP_UNKNOWN = "found", "missing", "unknown"
 
 
 class Exchange(ABC):
@@ -15,25 +59,48 @@ class Exchange(ABC):
     requires_password = False
     requires_api_password = False
     max_decimal_places = 6
+    # Параметр биржи для клиентского ID вывода (ключ идемпотентности)
+    client_id_param: Optional[str] = None
+    # Повторы запроса с тем же ключом, если вывод не найден в истории
+    withdraw_retries = 2
+    # Пауза перед поиском вывода в истории после обрыва связи, сек.
+    lookup_delay = 5
 
     def __init__(
             self,
             config: Config,
             token: str,
-            amount: Tuple[float, float],
+            amount: Tuple[Decimal, Decimal],
             address: str = None,
-            decimal_places: Optional[int] = None
+            decimal_places: Optional[int] = None,
+            client: Optional[Any] = None
     ):
         self.config = config
         self.token = token.upper()
-        self.min_amount, self.max_amount = amount
+        self.min_amount, self.max_amount = (to_decimal(value) for value in amount)
         self.address = address
 
-        if decimal_places is not None and decimal_places <= self.max_decimal_places:
+        # Окончательно ограничивается точностью сети в apply_chain_precision
+        if decimal_places is not None:
             self.decimal_places = decimal_places
         else:
             self.decimal_places = self.max_decimal_places
 
+        # Точность сумм вывода: (токен, сеть или None) -> знаков после запятой
+        self.precision_index: Dict[Tuple[str, Optional[str]], int] = {}
+
+        # Списано с баланса успешными выводами (сумма + комиссия сети)
+        self.spent_total = Decimal(0)
+        self._spent_lock = threading.Lock()
+
+        # Часы биржи для подписанных запросов (только для своих клиентов)
+        self.server_clock: Optional[ServerClock] = None
+
+        # Готовый клиент (например, симулятор) используется как есть
+        if client is not None:
+            self.exchange = client
+            return
+
         if not self._validate_auth_config():
             raise ValueError(
                 f"Не настроена аутентификация "
@@ -82,10 +149,12 @@ class Exchange(ABC):
             )
             return False
 
-    def _initialize_exchange(self) -> ccxt.Exchange:
+    def _initialize_exchange(self) -> "ccxt.Exchange":
         """
         Инициализирует объект биржи
         """
+        import ccxt
+
         exchange_config = getattr(self.config.settings, self.name)
 
         options: Dict[str, Any] = {
@@ -109,26 +178,40 @@ class Exchange(ABC):
         if hasattr(exchange_config, "password") and exchange_config.password:
             options["password"] = exchange_config.password
 
-        return getattr(ccxt, self.name)(options)
+        client = getattr(ccxt, self.name)(options)
+        # Общий пул keep-alive соединений для всех клиентов
+        transport.attach(client, self.config.transport)
+        cassette.attach(client, self.token)
+
+        # Подписанные запросы идут со временем, скорректированным
+        # по часам биржи (общим для всех клиентов этой биржи).
+        # Записанное в кассету время биржи устарело, поэтому при
+        # воспроизведении часы не калибруются
+        if not cassette.replaying():
+            self.server_clock = sync_client(client)
+        return client
 
     @property
     @abstractmethod
     def name(self) -> str:
         pass
 
-    def get_chains_list(self) -> Dict:
+    def get_chains_list(self, quiet: bool = False) -> Dict:
         """
         Получение списка сетей для вывода.
+
+        Args:
+            quiet: Не сообщать о запросе в INFO (фоновое обновление статуса)
         """
-        logger.info("Получаю данные о сетях для вывода...")
+        logger.log("DEBUG" if quiet else "INFO", "Получаю данные о сетях для вывода...")
         self.exchange.load_markets()
         chains_info = {}
 
         if self.token in self.exchange.currencies:
             networks = self.exchange.currencies[self.token].get("networks", {})
             for key, info in networks.items():
-                withdraw_fee = float(self._get_withdraw_fee(info) or 0)
-                withdraw_min = float(self._get_withdraw_min(info) or 0)
+                withdraw_fee = to_decimal(self._get_withdraw_fee(info))
+                withdraw_min = to_decimal(self._get_withdraw_min(info))
 
                 if self._is_withdrawal_enabled(key, info):
                     chains_info[key] = {
@@ -136,9 +219,34 @@ class Exchange(ABC):
                         "withdrawEnable": True,
                         "withdrawFee": withdraw_fee,
                         "withdrawMin": withdraw_min,
+                        "precision": self._get_withdraw_precision(info),
                     }
         return chains_info
 
+    def refresh_chains_list(self) -> Dict:
+        """
+        Список сетей по свежим данным биржи
+        (load_markets кэширует их на весь запуск)
+        """
+        currencies = self.exchange.fetch_currencies()
+        if currencies:
+            self.exchange.currencies.update(currencies)
+        return self.get_chains_list(quiet=True)
+
+    def check_withdraw_permission(self) -> Optional[bool]:
+        """
+        Разрешен ли вывод для API-ключа.
+        None - биржа не сообщает права ключа через API
+        """
+        return None
+
+    def fetch_whitelist(self) -> Optional[Set[str]]:
+        """
+        Нормализованные адреса из белого списка вывода аккаунта.
+        None - биржа не отдает белый список через API
+        """
+        return None
+
     def _is_withdrawal_enabled(self, key, info) -> bool:
         """
         Проверка доступности вывода для конкретной сети.
@@ -164,17 +272,109 @@ class Exchange(ABC):
         """
         return info.get("limits", {}).get("withdraw", {}).get("min")
 
-    def get_balance(self, num_wallets: int) -> float:
+    def _get_withdraw_precision(self, info) -> Optional[int]:
+        """
+        Получение количества знаков после запятой для суммы вывода в сети.
+        """
+        return self._precision_to_decimals(info.get("precision"))
+
+    def _precision_to_decimals(self, precision) -> Optional[int]:
+        """
+        Переводит точность ccxt (шаг или число знаков,
+        в зависимости от precisionMode клиента) в число знаков
+        """
+        import ccxt
+
+        if precision is None:
+            return None
+        if getattr(self.exchange, "precisionMode", ccxt.TICK_SIZE) == ccxt.TICK_SIZE:
+            return decimals_from_tick(precision)
+        return decimals_from_places(precision)
+
+    def get_max_decimals(self, chain: Optional[Dict] = None) -> int:
+        """
+        Максимальное количество знаков после запятой для суммы вывода.
+
+        Берется из метаданных биржи для выбранной сети, а без сети -
+        наибольшее среди сетей токена. Если биржа точность не сообщает,
+        используется max_decimal_places. Результат кэшируется.
+        """
+        key = (self.token, chain["chainKey"] if chain else None)
+        if key not in self.precision_index:
+            self.precision_index[key] = self._lookup_precision(chain)
+        return self.precision_index[key]
+
+    def _lookup_precision(self, chain: Optional[Dict]) -> int:
+        if chain and "precision" in chain:
+            precision = chain["precision"]
+        else:
+            chains = self.get_chains_list()
+            if chain:
+                precision = chains.get(chain["chainKey"], {}).get("precision")
+            else:
+                known = [
+                    details["precision"] for details in chains.values()
+                    if details.get("precision") is not None
+                ]
+                precision = max(known) if known else None
+
+        if precision is None:
+            currency = self.exchange.currencies.get(self.token) or {}
+            precision = self._precision_to_decimals(currency.get("precision"))
+
+        return precision if precision is not None else self.max_decimal_places
+
+    def apply_chain_precision(self, chain: Dict) -> None:
+        """
+        Ограничивает знаки после запятой и диапазон сумм точностью сети,
+        чтобы биржа не отклонила вывод из-за лишних знаков
+        """
+        max_decimals = self.get_max_decimals(chain)
+        if self.decimal_places > max_decimals:
+            logger.warning(
+                f"Сеть {chain['chainKey']} принимает не более "
+                f"{max_decimals} знаков после запятой, "
+                f"будет использовано {max_decimals}"
+            )
+            self.decimal_places = max_decimals
+
+        quantum = Decimal(1).scaleb(-max_decimals)
+        min_amount = self.min_amount.quantize(quantum, rounding=ROUND_CEILING)
+        max_amount = self.max_amount.quantize(quantum, rounding=ROUND_FLOOR)
+        if (min_amount, max_amount) != (self.min_amount, self.max_amount):
+            if min_amount > max_amount:
+                raise ValueError(
+                    f"Диапазон сумм {self.min_amount}-{self.max_amount} "
+                    f"нельзя вывести с точностью {max_decimals} знаков"
+                )
+            logger.warning(
+                f"Диапазон сумм округлен до точности сети: "
+                f"{min_amount}-{max_amount} ${self.token}"
+            )
+            self.min_amount, self.max_amount = min_amount, max_amount
+
+    def get_balance(
+            self,
+            num_wallets: int,
+            balances: Optional[Dict] = None,
+            fixed_total: Decimal = Decimal(0)
+    ) -> Decimal:
         """
         Получение баланса.
+
+        Уже полученный ответ fetch_balance можно передать в balances,
+        чтобы не запрашивать баланс повторно для каждого токена.
+        fixed_total - сумма выводов с заданными в файле суммами,
+        num_wallets - количество выводов со случайной суммой.
         """
-        balances = self._fetch_balance()
-        balance = float(balances.get("total", {}).get(self.token, 0))
+        if balances is None:
+            balances = self._fetch_balance()
+        balance = to_decimal(balances.get("total", {}).get(self.token))
         from core.utils import format_amount
         logger.success(
             f"Баланс токена: {format_amount(balance)} ${self.token}"
         )
-        self._check_enough_balance(balance, num_wallets)
+        self._check_enough_balance(balance, num_wallets, fixed_total)
         return balance
 
     def _fetch_balance(self):
@@ -186,14 +386,11 @@ class Exchange(ABC):
             return self.exchange.fetch_balance({"type": "funding"})
         return self.exchange.fetch_balance()
 
-    def _generate_random_amount(self) -> float:
+    def _generate_random_amount(self) -> Decimal:
         """
         Генерирует случайную сумму для вывода с учетом указанного
         количества знаков после запятой.
         """
-        # Получаем базовое случайное значение
-        amount = random.uniform(self.min_amount, self.max_amount)
-
         # Определяем минимальное количество знаков после запятой
         # на основе указанных min_amount и max_amount
         from core.utils import determine_min_decimals
@@ -216,8 +413,12 @@ class Exchange(ABC):
                 f"количество знаков: {decimals}"
             )
 
-        # Округляем до нужного количества знаков
-        rounded_amount = round(amount, decimals)
+        # Выбираем случайное значение из сетки с шагом 10^-decimals,
+        # чтобы сумма была точной и не выходила за диапазон
+        quantum = Decimal(1).scaleb(-decimals)
+        low = int((self.min_amount / quantum).to_integral_value(ROUND_CEILING))
+        high = int((self.max_amount / quantum).to_integral_value(ROUND_FLOOR))
+        rounded_amount = Decimal(random.randint(low, max(low, high))) * quantum
         logger.debug(
             f"Сгенерирована сумма {rounded_amount} "
             f"({decimals} знаков после запятой)"
@@ -225,58 +426,178 @@ class Exchange(ABC):
 
         return rounded_amount
 
-    def withdraw(self, chain: Dict) -> bool:
+    def withdraw(
+            self,
+            chain: Dict,
+            address: Optional[str] = None,
+            amount: Optional[Decimal] = None,
+            tag: Optional[str] = None,
+            client_id: Optional[str] = None
+    ) -> bool:
+        """
+        Вывод средств, True - биржа приняла запрос (см. submit_withdrawal)
+        """
+        return self.submit_withdrawal(chain, address, amount, tag, client_id).success
+
+    def submit_withdrawal(
+            self,
+            chain: Dict,
+            address: Optional[str] = None,
+            amount: Optional[Decimal] = None,
+            tag: Optional[str] = None,
+            client_id: Optional[str] = None
+    ) -> "WithdrawalResult":
         """
         Универсальный метод вывода средств.
+
+        Адрес можно передать явно, чтобы несколько потоков
+        выводили через один объект биржи. Сумма (если не указана -
+        случайная из диапазона) и memo/tag задаются для отдельного кошелька.
+
+        client_id - ключ идемпотентности вывода. Если биржа поддерживает
+        клиентский ID, при обрыве связи вывод ищется по ключу в истории
+        и повторяется только если биржа его не получила.
+
+        Returns:
+            Результат вывода: суммы, комиссия, ID и класс ошибки для отчета
         """
-        amount = self._generate_random_amount()
+        address = address or self.address
+        if amount is None:
+            amount = self._generate_random_amount()
 
-        try:
-            # Подготовка параметров в зависимости от биржи
-            params = {
-                self.network_param_name: chain["chainId"],
-            }
+        # Подготовка параметров в зависимости от биржи
+        params = {
+            self.network_param_name: chain["chainId"],
+        }
 
-            # Добавляем комиссию, если требуется для конкретной биржи
-            if hasattr(self, 'include_fee_in_params') and self.include_fee_in_params:
-                params["fee"] = chain["withdrawFee"]
+        # Добавляем комиссию, если требуется для конкретной биржи
+        if hasattr(self, 'include_fee_in_params') and self.include_fee_in_params:
+            params["fee"] = decimal_to_string(chain["withdrawFee"])
+
+        # Добавляем пароль (для некоторых бирж)
+        if hasattr(self, 'requires_password') and self.requires_password:
+            params["pwd"] = "-"
+
+        result = WithdrawalResult(amount=amount, fee=chain["withdrawFee"])
+        idempotent = bool(client_id and self.client_id_param)
+        if idempotent:
+            params[self.client_id_param] = client_id
+
+        for attempt in range(self.withdraw_retries + 1 if idempotent else 1):
+            try:
+                # В ccxt сумма передается строкой без экспоненты,
+                # чтобы не потерять точность Decimal
+                withdrawal = self.exchange.withdraw(
+                    self.token,
+                    decimal_to_string(amount),
+                    address,
+                    tag=tag,
+                    params=params,
+                )
+            except Exception as e:
+                if not is_no_response(e):
+                    logger.error(
+                        f"{address} | Ошибка "
+                        f"вывода {decimal_to_string(amount)} ${self.token}: {e}"
+                    )
+                    result.error = type(e).__name__
+                    return result
 
-            # Добавляем пароль (для некоторых бирж)
-            if hasattr(self, 'requires_password') and self.requires_password:
-                params["pwd"] = "-"
+                # Ответа нет - биржа могла как принять, так и не получить запрос
+                if not idempotent:
+                    logger.error(
+                        f"{address} | Нет ответа биржи при выводе "
+                        f"{decimal_to_string(amount)} ${self.token}: {e}. "
+                        f"Статус вывода неизвестен, проверьте историю выводов"
+                    )
+                    result.error = type(e).__name__
+                    return result
+
+                logger.warning(
+                    f"{address} | Нет ответа биржи ({e}), "
+                    f"ищу вывод по ключу {client_id}..."
+                )
+                status, withdrawal = self.find_withdrawal(client_id)
+                if status == LOOKUP_UNKNOWN:
+                    # История недоступна: повтор мог бы отправить средства дважды
+                    logger.error(
+                        f"{address} | Статус вывода {decimal_to_string(amount)} "
+                        f"${self.token} неизвестен (ключ {client_id}), запрос не "
+                        f"повторяется - проверьте историю выводов вручную"
+                    )
+                    result.error = "UnknownStatus"
+                    return result
+                if status == LOOKUP_MISSING:
+                    if attempt < self.withdraw_retries:
+                        logger.warning(
+                            f"{address} | Вывод не найден, "
+                            f"повторяю запрос с тем же ключом"
+                        )
+                        continue
+                    logger.error(
+                        f"{address} | Вывод {decimal_to_string(amount)} "
+                        f"${self.token} не подтвержден (ключ {client_id})"
+                    )
+                    result.error = type(e).__name__
+                    return result
 
-            withdrawal = self.exchange.withdraw(
-                self.token,
-                amount,
-                self.address,
-                params=params,
-            )
             withdrawal_id = self._extract_withdrawal_id(withdrawal)
             if withdrawal_id:
+                with self._spent_lock:
+                    self.spent_total += amount + chain["withdrawFee"]
                 logger.success(
-                    f"{self.address} | Запрос на "
-                    f"вывод {amount} ${self.token}, "
+                    f"{address} | Запрос на "
+                    f"вывод {decimal_to_string(amount)} ${self.token}, "
                     f"ID: {withdrawal_id}"
                 )
-                return True
+                result.success = True
+                result.withdrawal_id = str(withdrawal_id)
+                result.sent = to_decimal(withdrawal.get("amount")) or amount
+                fee = (withdrawal.get("fee") or {}).get("cost")
+                if fee is not None:
+                    result.fee = to_decimal(fee)
+                return result
+            result.error = "NoWithdrawalId"
+            return result
+
+        return result
+
+    def find_withdrawal(self, client_id: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Поиск вывода по клиентскому ID в истории выводов токена
+
+        Returns:
+            (LOOKUP_FOUND, вывод в формате ccxt), (LOOKUP_MISSING, None) -
+            биржа его не получила, или (LOOKUP_UNKNOWN, None) - историю
+            получить не удалось
+        """
+        time.sleep(self.lookup_delay)
+        try:
+            withdrawals = self.exchange.fetch_withdrawals(self.token)
         except Exception as e:
-            logger.error(
-                f"{self.address} | Ошибка "
-                f"вывода {amount} ${self.token}: {e}"
-            )
-            return False
+            logger.error(f"Не удалось получить историю выводов: {e}")
+            return LOOKUP_UNKNOWN, None
+
+        for withdrawal in withdrawals:
+            info = withdrawal.get("info") or {}
+            if client_id in (str(value) for value in info.values()):
+                return LOOKUP_FOUND, withdrawal
+        return LOOKUP_MISSING, None
 
     def _check_enough_balance(
-            self, balance: float, num_wallets: int
+            self,
+            balance: Decimal,
+            num_wallets: int,
+            fixed_total: Decimal = Decimal(0)
     ) -> bool:
         avg_amount = (self.min_amount + self.max_amount) / 2
-        if balance < num_wallets * self.min_amount:
+        if balance < num_wallets * self.min_amount + fixed_total:
             logger.error(
                 f"Баланса недостаточно для "
                 f"вывода на {num_wallets} кошельков"
             )
             raise ValueError("Недостаточно средств")
-        if balance < num_wallets * avg_amount:
+        if balance < num_wallets * avg_amount + fixed_total:
             logger.warning(
                 f"Возможно, баланса не хватит "
                 f"для вывода на {num_wallets} кошельков"
@@ -286,6 +607,8 @@ class Exchange(ABC):
         return True
 
     def check_auth(self) -> None:
+        import ccxt
+
         logger.info("Тестирую авторизацию...")
         try:
             self.exchange.fetch_balance()
@@ -298,3 +621,77 @@ class Exchange(ABC):
     def _extract_withdrawal_id(withdrawal: Dict) -> str:
         return withdrawal.get("id", withdrawal.get("info", {}).get("wdId", ""))
 
+
+class WithdrawalResult(msgspec.Struct):
+    """
+    Результат вывода для отчета: amount - запрошенная сумма, sent - сумма
+    по ответу биржи, error - класс ошибки ccxt, NoWithdrawalId или
+    UnknownStatus (нет ответа и история выводов недоступна - нужна ручная проверка)
+    """
+    amount: Optional[Decimal]
+    fee: Optional[Decimal]
+    success: bool = False
+    sent: Optional[Decimal] = None
+    withdrawal_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def is_no_response(error: Exception) -> bool:
+    """
+    Запрос остался без ответа (таймаут или обрыв соединения) и мог
+    дойти до биржи. Остальные NetworkError ccxt (RateLimitExceeded,
+    DDoSProtection, InvalidNonce, OnMaintenance, ExchangeNotAvailable) -
+    ответ биржи с отказом
+    """
+    import ccxt
+
+    return isinstance(error, ccxt.RequestTimeout) or type(error) is ccxt.NetworkError
+
+
+def idempotency_key(job_id: str, address: str, token: str) -> str:
+    """
+    Детерминированный клиентский ID вывода для задания, кошелька и токена.
+
+    32 символа из букв и цифр - подходит под ограничения всех бирж
+    """
+    digest = hashlib.sha256(
+        f"{job_id}:{address.lower()}:{token.upper()}".encode()
+    ).hexdigest()
+    return "mw" + digest[:30]
+
+
+def to_decimal(value) -> Decimal:
+    """
+    Приводит число из ответа биржи (str, float, None) к Decimal
+    """
+    if value is None or value == "":
+        return Decimal(0)
+    return Decimal(str(value))
+
+
+def decimal_to_string(value) -> str:
+    """
+    Строковое представление суммы без экспоненты
+    """
+    return format(to_decimal(value), "f")
+
+
+def decimals_from_places(places) -> Optional[int]:
+    """
+    Точность, заданная числом знаков после запятой
+    """
+    if places is None or places == "":
+        return None
+    return max(0, int(Decimal(str(places))))
+
+
+def decimals_from_tick(tick) -> Optional[int]:
+    """
+    Точность, заданная шагом суммы (например, 0.0001 -> 4 знака)
+    """
+    if tick is None or tick == "":
+        return None
+    tick = Decimal(str(tick))
+    if tick <= 0:
+        return None
+    return max(0, -tick.normalize().as_tuple().exponent)
@@ -1,9 +1,11 @@
-from core.exchange import Exchange
+from core.exchange import Exchange, SubAccounts, decimals_from_tick, decimal_to_string, to_decimal
+from core.validator import normalize_address
 
 
-class Binance(Exchange):
+class Binance(Exchange, SubAccounts):
     include_fee_in_params = True
     network_param_name = "network"
+    client_id_param = "withdrawOrderId"
 
     @property
     def name(self) -> str:
@@ -14,3 +16,53 @@ class Binance(Exchange):
 
     def _get_withdraw_fee(self, info):
         return info["info"].get("withdrawFee")
+
+    def _get_withdraw_precision(self, info):
+        # Шаг суммы вывода в сети
+        places = decimals_from_tick(info["info"].get("withdrawIntegerMultiple"))
+        return places if places is not None else super()._get_withdraw_precision(info)
+
+    def fetch_whitelist(self):
+        # Адресная книга вывода: в белом списке только адреса с whiteStatus,
+        # адреса без монеты подходят для любой
+        entries = self.exchange.sapiGetCapitalWithdrawAddressList()
+        return {
+            normalize_address(entry["address"])
+            for entry in entries
+            if entry.get("address")
+            and entry.get("whiteStatus")
+            and entry.get("coin") in ("", None, self.token)
+        }
+
+    def check_withdraw_permission(self):
+        restrictions = self.exchange.sapiGetAccountApiRestrictions()
+        return bool(restrictions.get("enableWithdrawals"))
+
+    def fetch_sub_accounts(self):
+        # Перевод с субаккаунта адресуется по его email
+        emails = []
+        page = 1
+        while True:
+            response = self.exchange.sapiGetSubAccountList({"page": page, "limit": 200})
+            accounts = response.get("subAccounts", [])
+            emails.extend(account["email"] for account in accounts)
+            if len(accounts) < 200:
+                return emails
+            page += 1
+
+    def fetch_sub_account_balance(self, sub_account):
+        response = self.exchange.sapiV3GetSubAccountAssets({"email": sub_account})
+        for asset in response.get("balances", []):
+            if asset.get("asset") == self.token:
+                return to_decimal(asset.get("free"))
+        return to_decimal(0)
+
+    def transfer_from_sub_account(self, sub_account, amount):
+        # Без toEmail получатель - основной аккаунт
+        self.exchange.sapiPostSubAccountUniversalTransfer({
+            "fromEmail": sub_account,
+            "fromAccountType": "SPOT",
+            "toAccountType": "SPOT",
+            "asset": self.token,
+            "amount": decimal_to_string(amount),
+        })
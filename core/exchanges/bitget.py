@@ -1,8 +1,11 @@
-from core.exchange import Exchange
+import uuid
 
+from core.exchange import Exchange, SubAccounts, decimals_from_places, decimal_to_string, to_decimal
 
-class Bitget(Exchange):
+
+class Bitget(Exchange, SubAccounts):
     network_param_name = "network"
+    client_id_param = "clientOid"
 
     @property
     def name(self) -> str:
@@ -13,3 +16,43 @@ class Bitget(Exchange):
 
     def _get_withdraw_fee(self, info):
         return info["info"].get("withdrawFee")
+
+    def _get_withdraw_precision(self, info):
+        places = decimals_from_places(info.get("info", {}).get("withdrawMinScale"))
+        return places if places is not None else super()._get_withdraw_precision(info)
+
+    def fetch_sub_accounts(self):
+        self._master_uid = self.exchange.privateSpotGetV2SpotAccountInfo()["data"]["userId"]
+        # Активы субаккаунтов приходят вместе со списком, страницами
+        # по 50 с курсором idLessThan
+        self._sub_balances = {}
+        params = {"limit": "50"}
+        while True:
+            response = self.exchange.privateSpotGetV2SpotAccountSubaccountAssets(params)
+            accounts = response.get("data") or []
+            for account in accounts:
+                self._sub_balances[str(account["userId"])] = sum(
+                    (
+                        to_decimal(asset.get("available"))
+                        for asset in account.get("assetsList") or []
+                        if asset.get("coin", "").upper() == self.token
+                    ),
+                    to_decimal(0)
+                )
+            if len(accounts) < 50:
+                return list(self._sub_balances)
+            params["idLessThan"] = accounts[-1]["id"]
+
+    def fetch_sub_account_balance(self, sub_account):
+        return self._sub_balances.get(sub_account, to_decimal(0))
+
+    def transfer_from_sub_account(self, sub_account, amount):
+        self.exchange.privateSpotPostV2SpotWalletSubaccountTransfer({
+            "fromType": "spot",
+            "toType": "spot",
+            "amount": decimal_to_string(amount),
+            "coin": self.token,
+            "fromUserId": sub_account,
+            "toUserId": str(self._master_uid),
+            "clientOid": uuid.uuid4().hex,
+        })
@@ -1,10 +1,47 @@
-from core.exchange import Exchange
+import uuid
 
+from core.exchange import Exchange, SubAccounts, decimals_from_places, decimal_to_string, to_decimal
 
-class Bybit(Exchange):
+
+class Bybit(Exchange, SubAccounts):
     uses_funding_wallet = True
     max_decimal_places = 4
+    client_id_param = "requestId"
 
     @property
     def name(self) -> str:
         return "bybit"
+
+    def _get_withdraw_precision(self, info):
+        places = decimals_from_places(info.get("info", {}).get("minAccuracy"))
+        return places if places is not None else super()._get_withdraw_precision(info)
+
+    def check_withdraw_permission(self):
+        response = self.exchange.privateGetV5UserQueryApi()
+        permissions = response["result"].get("permissions", {})
+        return "Withdraw" in permissions.get("Wallet", [])
+
+    def fetch_sub_accounts(self):
+        # UID основного аккаунта - получатель переводов
+        self._master_uid = self.exchange.privateGetV5UserQueryApi()["result"]["userID"]
+        response = self.exchange.privateGetV5UserQuerySubMembers()
+        return [str(member["uid"]) for member in response["result"].get("subMembers", [])]
+
+    def fetch_sub_account_balance(self, sub_account):
+        response = self.exchange.privateGetV5AssetTransferQueryAccountCoinBalance({
+            "memberId": sub_account,
+            "accountType": "FUND",
+            "coin": self.token,
+        })
+        return to_decimal(response["result"].get("balance", {}).get("transferBalance"))
+
+    def transfer_from_sub_account(self, sub_account, amount):
+        self.exchange.privatePostV5AssetTransferUniversalTransfer({
+            "transferId": str(uuid.uuid4()),
+            "coin": self.token,
+            "amount": decimal_to_string(amount),
+            "fromMemberId": int(sub_account),
+            "toMemberId": int(self._master_uid),
+            "fromAccountType": "FUND",
+            "toAccountType": "FUND",
+        })
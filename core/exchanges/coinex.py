@@ -1,6 +1,6 @@
 from loguru import logger
 
-from core.exchange import Exchange
+from core.exchange import Exchange, decimals_from_places, to_decimal
 
 
 class Coinex(Exchange):
@@ -16,11 +16,11 @@ class Coinex(Exchange):
     def _get_withdraw_fee(self, info):
         return info["info"].get("withdrawFee")
 
-    def get_chains_list(self) -> dict:
+    def get_chains_list(self, quiet: bool = False) -> dict:
         """
         Coinex имеет специфическую структуру данных для сетей
         """
-        logger.info("Получаю данные о сетях для вывода Coinex...")
+        logger.log("DEBUG" if quiet else "INFO", "Получаю данные о сетях для вывода Coinex...")
         self.exchange.load_markets()
         chains_info = {}
 
@@ -38,8 +38,11 @@ class Coinex(Exchange):
                         chains_info[chain_id] = {
                             "chainId": chain_id,
                             "withdrawEnable": True,
-                            "withdrawFee": float(chain_info.get("withdrawal_fee", 0)),
-                            "withdrawMin": float(chain_info.get("min_withdraw_amount", 0)),
+                            "withdrawFee": to_decimal(chain_info.get("withdrawal_fee")),
+                            "withdrawMin": to_decimal(chain_info.get("min_withdraw_amount")),
+                            "precision": decimals_from_places(
+                                chain_info.get("withdrawal_precision")
+                            ),
                         }
 
         return chains_info
@@ -1,7 +1,10 @@
 from core.exchange import Exchange
+from core.validator import normalize_address
 
 
 class Gate(Exchange):
+    client_id_param = "withdraw_order_id"
+
     @property
     def name(self) -> str:
         return "gate"
@@ -10,4 +13,13 @@ class Gate(Exchange):
         """
         Gate.io использует поле 'id' из информации о сети вместо ключа
         """
-        return info.get('id', key)
\ No newline at end of file
+        return info.get('id', key)
+
+    def fetch_whitelist(self):
+        entries = self.exchange.privateWalletGetSavedAddress({"currency": self.token})
+        # В адресной книге и непроверенные адреса: берем только verified
+        return {
+            normalize_address(entry["address"])
+            for entry in entries
+            if entry.get("address") and str(entry.get("verified")) == "1"
+        }
@@ -1,19 +1,21 @@
 from typing import Dict
 from loguru import logger
 
-from core.exchange import Exchange
+from core.exchange import Exchange, decimals_from_places, to_decimal
 
 
 class Huobi(Exchange):
+    client_id_param = "client-order-id"
+
     @property
     def name(self) -> str:
         return "htx"
 
-    def get_chains_list(self) -> Dict:
+    def get_chains_list(self, quiet: bool = False) -> Dict:
         """
         Huobi (HTX) имеет свою структуру данных для сетей
         """
-        logger.info("Получаю данные о сетях для вывода...")
+        logger.log("DEBUG" if quiet else "INFO", "Получаю данные о сетях для вывода...")
         self.exchange.load_markets()
         chains_info = {}
 
@@ -24,8 +26,15 @@ class Huobi(Exchange):
                     chains_info[key] = {
                         "chainId": info.get("id", key),
                         "withdrawEnable": True,
-                        "withdrawFee": info.get("fee"),
-                        "withdrawMin": info.get("limits", {}).get("withdraw", {}).get("min"),
+                        "withdrawFee": to_decimal(info.get("fee")),
+                        "withdrawMin": to_decimal(
+                            info.get("limits", {}).get("withdraw", {}).get("min")
+                        ),
+                        "precision": self._get_withdraw_precision(info),
                     }
 
         return chains_info
+
+    def _get_withdraw_precision(self, info):
+        places = decimals_from_places(info.get("info", {}).get("withdrawPrecision"))
+        return places if places is not None else super()._get_withdraw_precision(info)
@@ -1,7 +1,9 @@
-from core.exchange import Exchange
+import uuid
 
+from core.exchange import Exchange, SubAccounts, decimal_to_string, to_decimal
 
-class Kucoin(Exchange):
+
+class Kucoin(Exchange, SubAccounts):
     uses_funding_wallet = True
 
     @property
@@ -14,3 +16,34 @@ class Kucoin(Exchange):
             info.get("withdraw", info_dict.get("isWithdrawEnabled",
                    info_dict.get("withdrawEnable", False)))
         )
+
+    def fetch_sub_accounts(self):
+        # Список субаккаунтов приходит вместе с балансами
+        response = self.exchange.privateGetSubAccounts()
+        self._sub_balances = {
+            account["subUserId"]: sum(
+                (
+                    to_decimal(asset.get("available"))
+                    for asset in account.get("mainAccounts") or []
+                    if asset.get("currency") == self.token
+                ),
+                to_decimal(0)
+            )
+            for account in response.get("data", [])
+        }
+        return list(self._sub_balances)
+
+    def fetch_sub_account_balance(self, sub_account):
+        return self._sub_balances.get(sub_account, to_decimal(0))
+
+    def transfer_from_sub_account(self, sub_account, amount):
+        # direction IN - с субаккаунта на основной аккаунт
+        self.exchange.privatePostAccountsSubTransfer({
+            "clientOid": uuid.uuid4().hex,
+            "currency": self.token,
+            "amount": decimal_to_string(amount),
+            "direction": "IN",
+            "accountType": "MAIN",
+            "subAccountType": "MAIN",
+            "subUserId": sub_account,
+        })
@@ -1,27 +1,34 @@
-from core.exchange import Exchange
+from core.exchange import Exchange, decimals_from_tick, to_decimal
 
 
 class Mexc(Exchange):
     network_param_name = "netWork"
+    client_id_param = "withdrawOrderId"
 
     @property
     def name(self) -> str:
         return "mexc"
 
-    def get_chains_list(self) -> dict:
+    def get_chains_list(self, quiet: bool = False) -> dict:
         """
         MEXC имеет специфическую структуру данных для сетей
         """
         self.exchange.load_markets()
         chains_info = {}
         if self.token in self.exchange.currencies:
-            network_list = self.exchange.currencies[self.token]["info"].get("networkList", [])
+            currency = self.exchange.currencies[self.token]
+            currency_precision = self._precision_to_decimals(currency.get("precision"))
+            network_list = currency["info"].get("networkList", [])
             for network in network_list:
                 if network.get("withdrawEnable"):
+                    precision = decimals_from_tick(network.get("withdrawIntegerMultiple"))
+                    if precision is None:
+                        precision = currency_precision
                     chains_info[network["network"]] = {
                         "chainId": network["netWork"],
                         "withdrawEnable": True,
-                        "withdrawFee": network.get("withdrawFee"),
-                        "withdrawMin": network.get("withdrawMin"),
+                        "withdrawFee": to_decimal(network.get("withdrawFee")),
+                        "withdrawMin": to_decimal(network.get("withdrawMin")),
+                        "precision": precision,
                     }
         return chains_info
@@ -1,9 +1,10 @@
-from core.exchange import Exchange
+from core.exchange import Exchange, SubAccounts, decimals_from_places, decimal_to_string, to_decimal
 
 
-class Okx(Exchange):
+class Okx(Exchange, SubAccounts):
     uses_funding_wallet = True
     include_fee_in_params = True
+    client_id_param = "clientId"
     
     @property
     def name(self) -> str:
@@ -16,3 +17,45 @@ class Okx(Exchange):
 
     def _get_chain_id(self, key, info):
         return info.get("id")
+
+    def _get_withdraw_precision(self, info):
+        # wdTickSz - количество знаков после запятой для суммы вывода
+        places = decimals_from_places(info.get("info", {}).get("wdTickSz"))
+        return places if places is not None else super()._get_withdraw_precision(info)
+
+    def check_withdraw_permission(self):
+        response = self.exchange.privateGetAccountConfig()
+        perm = response["data"][0].get("perm", "")
+        return "withdraw" in perm.split(",")
+
+    def fetch_sub_accounts(self):
+        # Страницы идут от новых к старым: after - время создания последнего
+        names = []
+        params = {"limit": "100"}
+        while True:
+            accounts = self.exchange.privateGetUsersSubaccountList(params).get("data", [])
+            names.extend(account["subAcct"] for account in accounts)
+            if len(accounts) < 100:
+                return names
+            params["after"] = accounts[-1]["ts"]
+
+    def fetch_sub_account_balance(self, sub_account):
+        # Funding-кошелек субаккаунта
+        response = self.exchange.privateGetAssetSubaccountBalances(
+            {"subAcct": sub_account, "ccy": self.token}
+        )
+        for asset in response.get("data", []):
+            if asset.get("ccy") == self.token:
+                return to_decimal(asset.get("availBal"))
+        return to_decimal(0)
+
+    def transfer_from_sub_account(self, sub_account, amount):
+        # type 2 - с субаккаунта на основной, 6 - funding-кошелек
+        self.exchange.privatePostAssetTransfer({
+            "type": "2",
+            "subAcct": sub_account,
+            "ccy": self.token,
+            "amt": decimal_to_string(amount),
+            "from": "6",
+            "to": "6",
+        })
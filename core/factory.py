@@ -1,39 +1,46 @@
-from typing import Tuple, Dict, Type, Optional
+import importlib
+from decimal import Decimal
+from typing import Tuple, Dict, Type, Optional, Any
 
 from core.exchange import Exchange
-from core.exchanges.binance import Binance
-from core.exchanges.bybit import Bybit
-from core.exchanges.coinex import Coinex
-from core.exchanges.gate import Gate
-from core.exchanges.huobi import Huobi
-from core.exchanges.kucoin import Kucoin
-from core.exchanges.mexc import Mexc
-from core.exchanges.bitget import Bitget
-from core.exchanges.okx import Okx
 from core.configes import Config
 
 
 class ExchangeFactory:
-    EXCHANGES: Dict[str, Type[Exchange]] = {
-        "binance": Binance,
-        "mexc": Mexc,
-        "bitget": Bitget,
-        "okx": Okx,
-        "bybit": Bybit,
-        "gate": Gate,
-        "kucoin": Kucoin,
-        "htx": Huobi,
-        "coinex": Coinex
+    # Адаптеры импортируются по имени при первом обращении,
+    # чтобы запуск не загружал модули всех бирж
+    EXCHANGES: Dict[str, str] = {
+        "binance": "core.exchanges.binance:Binance",
+        "mexc": "core.exchanges.mexc:Mexc",
+        "bitget": "core.exchanges.bitget:Bitget",
+        "okx": "core.exchanges.okx:Okx",
+        "bybit": "core.exchanges.bybit:Bybit",
+        "gate": "core.exchanges.gate:Gate",
+        "kucoin": "core.exchanges.kucoin:Kucoin",
+        "htx": "core.exchanges.huobi:Huobi",
+        "coinex": "core.exchanges.coinex:Coinex"
     }
 
+    @staticmethod
+    def get_class(exchange_name: str) -> Optional[Type[Exchange]]:
+        """
+        Класс адаптера биржи по имени или None для неподдерживаемой биржи
+        """
+        path = ExchangeFactory.EXCHANGES.get(exchange_name.lower())
+        if not path:
+            return None
+        module_name, class_name = path.split(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
     @staticmethod
     def create(
             exchange_name: str,
             config: Config,
             token: str,
-            amount: Tuple[float, float],
+            amount: Tuple[Decimal, Decimal],
             decimal_places: Optional[int] = None,
-            address: str = None
+            address: str = None,
+            client: Optional[Any] = None
     ) -> Exchange:
         """
         Создает экземпляр объекта биржи
@@ -44,6 +51,7 @@ class ExchangeFactory:
             token: Название токена
             amount: Кортеж (мин. сумма, макс. сумма)
             address: Адрес кошелька
+            client: Готовый ccxt-совместимый клиент вместо создаваемого
 
         Returns:
             Объект биржи, реализующий интерфейс Exchange
@@ -51,10 +59,10 @@ class ExchangeFactory:
         Raises:
             ValueError: Если указана неподдерживаемая биржа
         """
-        exchange_class = ExchangeFactory.EXCHANGES.get(exchange_name.lower())
+        exchange_class = ExchangeFactory.get_class(exchange_name)
         if not exchange_class:
             raise ValueError(
                 f"Неподдерживаемая биржа: {exchange_name}"
             )
 
-        return exchange_class(config, token, amount, address, decimal_places)
\ No newline at end of file
+        return exchange_class(config, token, amount, address, decimal_places, client)
\ No newline at end of file
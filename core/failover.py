@@ -0,0 +1,112 @@
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from core.doctor import configured_exchanges
+from core.exchange import Exchange, WithdrawalResult
+from core.factory import ExchangeFactory
+from core.utils import resolve_chain
+
+# Ошибки, после которых биржа не примет и следующие выводы
+FATAL_ERRORS = {
+    "OnMaintenance",
+    "ExchangeNotAvailable",
+    "AccountSuspended",
+    "PermissionDenied",
+    "InsufficientFunds",
+}
+
+
+class HealthTracker:
+    """
+    Состояние биржи по результатам выводов: биржа считается неисправной
+    после ошибки из FATAL_ERRORS или max_failures неудачных выводов подряд
+    (например, дневной лимит или отклонение всех выводов без явной причины)
+    """
+
+    def __init__(self, max_failures: int = 5):
+        self.max_failures = max_failures
+        self.failures = 0
+        self.reason: Optional[str] = None
+
+    def report(self, result: WithdrawalResult) -> None:
+        if result.success:
+            self.failures = 0
+            return
+        self.failures += 1
+        if result.error in FATAL_ERRORS:
+            self.reason = f"ошибка {result.error}"
+        elif self.failures >= self.max_failures:
+            self.reason = f"{self.failures} неудачных выводов подряд"
+
+    @property
+    def healthy(self) -> bool:
+        return self.reason is None
+
+
+def candidates(config, exclude: Iterable[str]) -> List[str]:
+    """
+    Резервные биржи: все биржи с ключами в data/config.toml
+    в порядке файла, кроме уже использованных
+    """
+    exclude = set(exclude)
+    return [name for name in configured_exchanges(config) if name not in exclude]
+
+
+def backup_legs(
+        name: str,
+        selected_chains: List[Tuple[Exchange, Dict]],
+        plan: Callable[[Exchange], Tuple[int, Decimal]]
+) -> Optional[Tuple[List[Exchange], Dict[str, str]]]:
+    """
+    Объекты биржи name для тех же токенов, если на ней включен вывод
+    в тех же сетях и хватает баланса на оставшиеся кошельки
+
+    Args:
+        name: Имя резервной биржи
+        selected_chains: Токены и сети текущей биржи
+        plan: Для объекта биржи - (выводов со случайной суммой, сумма
+            фиксированных выводов) по оставшимся кошелькам
+
+    Returns:
+        (объекты биржи, сети {токен: сеть}) или None, если биржа не подходит
+    """
+    legs: List[Exchange] = []
+    chains: Dict[str, str] = {}
+    client = None
+    try:
+        for leg, chain in selected_chains:
+            backup = ExchangeFactory.create(
+                name,
+                leg.config,
+                leg.token,
+                (leg.min_amount, leg.max_amount),
+                leg.decimal_places,
+                client=client
+            )
+            client = backup.exchange
+            backup_chain = resolve_chain(backup.get_chains_list(), chain["chainKey"])
+            if backup_chain is None:
+                logger.info(
+                    f"{name.upper()}: вывод ${leg.token} в сети "
+                    f"{chain['chainKey']} недоступен"
+                )
+                return None
+            if backup_chain["withdrawMin"] > leg.min_amount:
+                logger.info(
+                    f"{name.upper()}: мин. сумма вывода ${leg.token} "
+                    f"{backup_chain['withdrawMin']} больше {leg.min_amount}"
+                )
+                return None
+            legs.append(backup)
+            chains[leg.token] = backup_chain["chainKey"]
+
+        balances = legs[0]._fetch_balance()
+        for backup in legs:
+            random_count, fixed_total = plan(backup)
+            backup.get_balance(random_count, balances, fixed_total)
+    except Exception as e:
+        logger.info(f"{name.upper()} не подходит для продолжения: {e}")
+        return None
+    return legs, chains
@@ -0,0 +1,353 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from loguru import logger
+
+from core.report import WithdrawalRecord
+from core.utils import format_amount, format_table
+from core.validator import normalize_address
+from core.wallet_file import WalletRow, is_table_file, iter_wallet_rows, row_address
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS withdrawals (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    exchange TEXT NOT NULL,
+    token TEXT NOT NULL,
+    address TEXT NOT NULL,
+    chain TEXT,
+    planned_amount TEXT,
+    sent_amount TEXT,
+    fee TEXT,
+    withdrawal_id TEXT,
+    success INTEGER NOT NULL,
+    error TEXT,
+    submitted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS withdrawals_address ON withdrawals (address, token, submitted_at);
+CREATE INDEX IF NOT EXISTS withdrawals_token ON withdrawals (token, submitted_at);
+CREATE INDEX IF NOT EXISTS withdrawals_exchange ON withdrawals (exchange, submitted_at);
+CREATE INDEX IF NOT EXISTS withdrawals_chain ON withdrawals (chain, submitted_at);
+"""
+
+COLUMNS = (
+    "job_id", "exchange", "token", "address", "chain", "planned_amount",
+    "sent_amount", "fee", "withdrawal_id", "success", "error", "submitted_at"
+)
+INSERT = (
+    f"INSERT INTO withdrawals ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(COLUMNS))})"
+)
+
+ROW_COLUMNS = (
+    ("time", "Время"),
+    ("exchange", "Биржа"),
+    ("token", "Токен"),
+    ("chain", "Сеть"),
+    ("amount", "Сумма"),
+    ("status", "Статус"),
+    ("withdrawal_id", "ID вывода"),
+)
+TOTAL_COLUMNS = (
+    ("address", "Адрес"),
+    ("amount", "Получено"),
+)
+
+# Ограничение SQLite на число параметров запроса - адреса ищутся пачками
+LOOKUP_CHUNK = 500
+
+
+def _text(value: Optional[Decimal]) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def received_amount(row: Dict) -> Decimal:
+    """
+    Сумма успешного вывода: по ответу биржи, иначе запрошенная
+    """
+    return Decimal(row["sent_amount"] or row["planned_amount"] or 0)
+
+
+class History:
+    """
+    История выводов всех запусков в SQLite (data/history.db).
+
+    Строки пишутся фоновым потоком пачками в одной транзакции, поэтому
+    рассылка не ждет диска. Индексы по адресу, токену, бирже и сети
+    со временем вывода: выборка по адресам и периоду не читает всю таблицу.
+    База в режиме WAL - запросы не блокируются записью, а несколько
+    процессов (воркеры, сервис заданий) пишут в один файл.
+    """
+
+    def __init__(self, path: str = "data/history.db", batch_size: int = 500):
+        """
+        Args:
+            path: Файл базы
+            batch_size: Максимум строк в одной транзакции записи
+        """
+        self.path = path
+        self.batch_size = batch_size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def add(self, record: WithdrawalRecord) -> None:
+        """
+        Ставит строку отчета в очередь записи (не блокирует)
+        """
+        self._queue.put((
+            record.job_id,
+            record.exchange,
+            record.token.upper(),
+            normalize_address(record.address),
+            record.chain,
+            _text(record.planned_amount),
+            _text(record.sent_amount),
+            _text(record.fee),
+            record.withdrawal_id,
+            int(record.success),
+            record.error,
+            record.submitted_at,
+        ))
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        connection.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with connection:
+                    connection.executemany(INSERT, rows)
+            except sqlite3.Error as e:
+                logger.warning(f"Не удалось записать {len(rows)} выводов в историю: {e}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """
+        Ждет записи всех строк из очереди
+        """
+        self._queue.join()
+
+    def query(
+            self,
+            address: Optional[str] = None,
+            token: Optional[str] = None,
+            exchange: Optional[str] = None,
+            chain: Optional[str] = None,
+            days: Optional[float] = None,
+            success: Optional[bool] = None,
+            limit: Optional[int] = 100
+    ) -> List[Dict]:
+        """
+        Выводы по фильтрам, новые первыми
+
+        Args:
+            days: Только за последние days дней
+            success: Только успешные (True) или неуспешные (False)
+            limit: Максимум строк (None - без ограничения)
+        """
+        conditions = []
+        params: list = []
+        for column, value in (
+                ("address", address and normalize_address(address)),
+                ("token", token and token.upper()),
+                ("exchange", exchange and exchange.lower()),
+                ("chain", chain),
+        ):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if days is not None:
+            conditions.append("submitted_at >= ?")
+            params.append(time.time() - days * 86400)
+        if success is not None:
+            conditions.append("success = ?")
+            params.append(int(success))
+
+        sql = "SELECT * FROM withdrawals"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY submitted_at DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with closing(self._connect()) as connection:
+            return [dict(row) for row in connection.execute(sql, params)]
+
+    def received(
+            self,
+            addresses: Iterable[str],
+            token: str,
+            days: Optional[float] = None,
+            exchange: Optional[str] = None
+    ) -> Dict[str, Decimal]:
+        """
+        Сколько токена получили адреса успешными выводами с любой биржи
+        (или только с exchange) за последние days дней
+
+        Returns:
+            {нормализованный адрес: сумма} - только адреса с выводами
+        """
+        since = 0.0 if days is None else time.time() - days * 86400
+        addresses = sorted({normalize_address(address) for address in addresses})
+        totals: Dict[str, Decimal] = {}
+        with closing(self._connect()) as connection:
+            for start in range(0, len(addresses), LOOKUP_CHUNK):
+                chunk = addresses[start:start + LOOKUP_CHUNK]
+                sql = (
+                    f"SELECT address, planned_amount, sent_amount FROM withdrawals "
+                    f"WHERE address IN ({', '.join('?' * len(chunk))}) "
+                    f"AND token = ? AND submitted_at >= ? AND success = 1"
+                )
+                params = [*chunk, token.upper(), since]
+                if exchange:
+                    sql += " AND exchange = ?"
+                    params.append(exchange.lower())
+                for row in connection.execute(sql, params):
+                    totals[row["address"]] = totals.get(row["address"], Decimal(0)) + received_amount(row)
+        return totals
+
+    def exclude_received(
+            self,
+            wallets: Sequence[Union[str, WalletRow]],
+            tokens: Sequence[str],
+            days: Optional[float] = None
+    ) -> List[Union[str, WalletRow]]:
+        """
+        Фильтр перед запуском: убирает кошельки, которые уже получили
+        все свои токены за последние days дней
+
+        Строка CSV с токеном проверяется только по нему, остальные
+        кошельки - по всем токенам запуска.
+        """
+        tokens = [token.upper() for token in tokens]
+        addresses = [row_address(wallet) for wallet in wallets]
+        received = {token: self.received(addresses, token, days) for token in tokens}
+
+        kept = []
+        for wallet in wallets:
+            address = normalize_address(row_address(wallet))
+            token = getattr(wallet, "token", None)
+            targets = [token.upper()] if token else tokens
+            if not all(address in received.get(target, {}) for target in targets):
+                kept.append(wallet)
+
+        skipped = len(wallets) - len(kept)
+        if skipped:
+            period = f" за {days:g} дн." if days is not None else ""
+            logger.info(
+                f"Пропущено кошельков, уже получивших "
+                f"{', '.join('$' + token for token in tokens)}{period}: {skipped}"
+            )
+        return kept
+
+
+_histories: Dict[str, History] = {}
+_lock = threading.Lock()
+
+
+def open_history(path: str = "data/history.db") -> History:
+    """
+    Общая история для файла path: один поток записи на процесс
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        history = _histories.get(path)
+        if history is None:
+            history = _histories[path] = History(path)
+        return history
+
+
+def _read_addresses(path: str) -> List[str]:
+    if is_table_file(path):
+        return [row.address for _, row, _ in iter_wallet_rows(path) if row is not None]
+    with open(path, "r") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def run_history(
+        token: Optional[str] = None,
+        days: Optional[float] = None,
+        address: Optional[str] = None,
+        wallets_path: Optional[str] = None,
+        path: str = "data/history.db",
+        limit: int = 20
+) -> None:
+    """
+    Запрос к истории из командной строки: выводы на один адрес или
+    сколько токена уже получили кошельки из файла wallets_path
+    """
+    if not os.path.exists(path):
+        logger.error(f"История выводов {path} пока пуста")
+        return
+    history = open_history(path)
+    period = f" за {days:g} дн." if days is not None else ""
+    started = time.perf_counter()
+
+    if address or not token:
+        rows = history.query(address=address, token=token, days=days, limit=limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        if not rows:
+            logger.info(f"Выводов{period} не найдено ({elapsed:.1f} мс)")
+            return
+        table = [
+            {
+                "time": time.strftime("%Y-%m-%d %H:%M", time.localtime(row["submitted_at"])),
+                "exchange": row["exchange"].upper(),
+                "token": row["token"],
+                "chain": row["chain"] or "—",
+                "amount": format_amount(received_amount(row)),
+                "status": "ok" if row["success"] else row["error"] or "ошибка",
+                "withdrawal_id": row["withdrawal_id"] or "—",
+            }
+            for row in rows
+        ]
+        logger.info(
+            f"Последние выводы{period} ({len(rows)}, {elapsed:.1f} мс):\n"
+            + format_table(ROW_COLUMNS, table)
+        )
+        return
+
+    if not wallets_path or not os.path.exists(wallets_path):
+        logger.error("Не найден файл кошельков для запроса")
+        return
+    addresses = _read_addresses(wallets_path)
+    started = time.perf_counter()
+    received = history.received(addresses, token, days)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    total = sum(received.values(), Decimal(0))
+    logger.info(
+        f"${token.upper()}{period} уже получили {len(received)} из "
+        f"{len(addresses)} кош. {wallets_path}, всего {format_amount(total)} "
+        f"(поиск {elapsed:.1f} мс)"
+    )
+    if received:
+        top = sorted(received.items(), key=lambda item: item[1], reverse=True)[:limit]
+        logger.info("\n" + format_table(
+            TOTAL_COLUMNS,
+            [{"address": item[0], "amount": format_amount(item[1])} for item in top]
+        ))
@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+from core.exchange import Exchange
+from core.utils import format_duration
+
+
+class ChainMonitor:
+    """
+    Фоновый контроль доступности выбранных сетей вывода.
+
+    Раз в ttl секунд обновляет статус сетей с биржи. Пока хотя бы одна
+    из сетей отключена, выводы ждут в wait_available, а после включения
+    сети рассылка продолжается автоматически.
+    """
+
+    def __init__(
+            self,
+            selected_chains: List[Tuple[Exchange, Dict]],
+            ttl: float = 60.0,
+            min_interval: float = 5.0
+    ):
+        """
+        Args:
+            selected_chains: Список пар (объект биржи, выбранная сеть)
+            ttl: Период обновления статуса сетей, сек.
+            min_interval: Минимальный интервал внеплановых проверок
+                при неудачных выводах подряд, сек.
+        """
+        self.selected_chains = selected_chains
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.suspended: List[str] = []
+        self._available = threading.Event()
+        self._available.set()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._failures = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._last_refresh = time.monotonic()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._available.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.ttl):
+            self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Обновляет статус сетей. При ошибке запроса статус не меняется
+        """
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            suspended = []
+            for leg, chain in self.selected_chains:
+                try:
+                    chains_list = leg.refresh_chains_list()
+                except Exception as e:
+                    logger.warning(f"Не удалось обновить статус сетей: {e}")
+                    return
+                if chain["chainKey"] not in chains_list:
+                    suspended.append(f"{chain['chainKey']} (${leg.token})")
+
+            if suspended and not self.suspended:
+                logger.warning(
+                    f"Вывод в сети {', '.join(suspended)} приостановлен "
+                    f"биржей, рассылка на паузе до его включения"
+                )
+                self._available.clear()
+            elif self.suspended and not suspended:
+                logger.success("Вывод в сети снова доступен, продолжаю рассылку")
+                self._available.set()
+            self.suspended = suspended
+
+    def report(self, success: bool) -> None:
+        """
+        Результат вывода: первая неудача после успешного вывода сразу
+        проверяет статус сетей, следующие - не чаще раза в min_interval
+        """
+        if success:
+            self._failures = 0
+            return
+        self._failures += 1
+        if (
+                self._failures == 1
+                or time.monotonic() - self._last_refresh >= self.min_interval
+        ):
+            self.refresh()
+
+    def wait_available(self) -> float:
+        """
+        Блокирует вывод, пока выбранная сеть отключена
+
+        Returns:
+            Время ожидания, сек.
+        """
+        if self._available.is_set():
+            return 0.0
+        started = time.monotonic()
+        self._available.wait()
+        waited = time.monotonic() - started
+        logger.info(f"Пауза из-за отключенной сети: {format_duration(waited)}")
+        return waited
@@ -0,0 +1,189 @@
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профайлер всего запуска.
+
+    Фоновый поток с интервалом interval снимает стеки всех потоков и
+    накапливает их в формате folded stacks (flamegraph.pl, speedscope).
+    Дополнительно считается время этапов работы (phase).
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.phases: Dict[str, float] = {}
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Стек открытых этапов у каждого потока, итоги сводятся под блокировкой
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} "
+                        f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Учитывает время выполнения блока в этапе name.
+
+        Время повторных входов и разных потоков суммируется, вложенный
+        вход в уже открытый в этом потоке этап не считается второй раз.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        if name in stack:
+            yield
+            return
+
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def top_functions(self, limit: int = 15) -> List[Tuple[str, int]]:
+        """
+        Функции с наибольшим собственным временем (верхушка стека)
+        """
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        return own.most_common(limit)
+
+
+def import_times(module: str = "main", limit: int = 15) -> List[Tuple[str, float]]:
+    """
+    Время импорта при холодном старте по пакетам верхнего уровня
+    (собственное время всех модулей пакета).
+
+    Запускает отдельный интерпретатор с -X importtime, чтобы замер
+    не зависел от уже загруженных модулей текущего процесса.
+
+    Returns:
+        Список (пакет, сек.) по убыванию времени
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    times = Counter()
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+\d+ \| \s*(\S+)", line)
+        if match:
+            times[match.group(2).split(".")[0]] += int(match.group(1)) / 1e6
+    return times.most_common(limit)
+
+
+_active: Optional[SamplingProfiler] = None
+
+
+def start() -> SamplingProfiler:
+    """
+    Включает профилирование запуска
+    """
+    global _active
+    _active = SamplingProfiler()
+    _active.start()
+    return _active
+
+
+def phase(name: str):
+    """
+    Этап работы для отчета профайлера (без профилирования ничего не делает)
+    """
+    return _active.phase(name) if _active is not None else nullcontext()
+
+
+def finish(directory: str = "data") -> Optional[str]:
+    """
+    Останавливает профилирование, сохраняет folded stacks и отчет
+
+    Returns:
+        Путь к файлу folded stacks или None, если профилирование не включено
+    """
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+    profiler.stop()
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    folded_path = os.path.join(directory, f"profile-{stamp}.folded")
+    report_path = os.path.join(directory, f"profile-{stamp}.txt")
+    profiler.write_folded(folded_path)
+
+    lines = [f"Общее время: {profiler.elapsed:.3f} с ({profiler.samples} срезов)", ""]
+    lines.append("Этапы:")
+    with profiler._lock:
+        phases = list(profiler.phases.items())
+    for name, seconds in phases:
+        share = seconds / profiler.elapsed * 100 if profiler.elapsed else 0
+        lines.append(f"  {name:<14} {seconds:>9.3f} с  {share:5.1f}%")
+    lines.append("")
+    lines.append("Импорт при запуске:")
+    for module, seconds in import_times():
+        lines.append(f"  {module:<30} {seconds:>7.3f} с")
+    lines.append("")
+    lines.append("Собственное время функций (срезов):")
+    for function, count in profiler.top_functions():
+        lines.append(f"  {count:>7}  {function}")
+
+    with open(report_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+    logger.info("Профиль запуска:\n" + "\n".join(lines))
+    logger.success(f"Folded stacks для флеймграфа: {folded_path}, отчет: {report_path}")
+    return folded_path
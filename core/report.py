@@ -0,0 +1,228 @@
+import csv
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import msgspec
+
+from core.wallet_file import WalletRow, row_address
+
+
+class WithdrawalRecord(msgspec.Struct):
+    """
+    Строка отчета: один токен на один кошелек
+    """
+    job_id: str
+    exchange: str
+    token: str
+    address: str
+    chain: Optional[str]
+    planned_amount: Optional[Decimal]
+    sent_amount: Optional[Decimal]
+    fee: Optional[Decimal]
+    withdrawal_id: Optional[str]
+    success: bool
+    error: Optional[str]
+    # Ожидание с очереди кошелька до отправки запроса (пауза сети,
+    # предыдущие токены кошелька) и время ответа биржи, сек.
+    queue_wait: float
+    latency: float
+    submitted_at: float
+
+
+FIELDS = WithdrawalRecord.__struct_fields__
+AMOUNT_FIELDS = ("planned_amount", "sent_amount", "fee")
+
+
+def _arrow_schema():
+    import pyarrow
+
+    types = {
+        "planned_amount": pyarrow.float64(),
+        "sent_amount": pyarrow.float64(),
+        "fee": pyarrow.float64(),
+        "success": pyarrow.bool_(),
+        "queue_wait": pyarrow.float64(),
+        "latency": pyarrow.float64(),
+        "submitted_at": pyarrow.float64(),
+    }
+    return pyarrow.schema([(field, types.get(field, pyarrow.string())) for field in FIELDS])
+
+
+class RunReport:
+    """
+    Отчет запуска по кошелькам в колоночном формате.
+
+    Parquet (если установлен pyarrow) или CSV. Суммы в Parquet - float64,
+    чтобы схема файлов разных запусков совпадала и их можно было читать
+    одним набором данных (pyarrow.dataset, DuckDB, pandas).
+    Строки копятся пачками по flush_every и дописываются в файл, поэтому
+    память не растет с числом кошельков.
+    """
+
+    def __init__(
+            self,
+            job_id: str,
+            directory: Optional[str] = "data/reports",
+            flush_every: int = 1000
+    ):
+        """
+        Args:
+            job_id: ID задания (в имени файла и в строках отчета)
+            directory: Папка отчетов. None - только счетчики, без файла
+            flush_every: Размер пачки строк для записи в файл
+        """
+        self.job_id = job_id
+        self.directory = directory
+        self.flush_every = flush_every
+        self.path: Optional[str] = None
+        self.total = 0
+        self.succeeded = 0
+        self.errors: Dict[str, int] = {}
+        self._buffer: List[WithdrawalRecord] = []
+        self._writer: Any = None
+        self._lock = threading.Lock()
+
+    def add(self, record: WithdrawalRecord) -> None:
+        with self._lock:
+            self.total += 1
+            self.succeeded += record.success
+            if record.error:
+                self.errors[record.error] = self.errors.get(record.error, 0) + 1
+            if self.directory is None:
+                return
+            self._buffer.append(record)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def _open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Воркеры одного задания пишут отчеты каждый в свой файл
+        name = f"run-{time.strftime('%Y%m%d-%H%M%S')}-{self.job_id}-{uuid.uuid4().hex[:6]}"
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            self.path = os.path.join(self.directory, f"{name}.csv")
+            self._writer = open(self.path, "w", newline="", encoding="utf-8")
+            csv.writer(self._writer).writerow(FIELDS)
+            return
+        self.path = os.path.join(self.directory, f"{name}.parquet")
+        self._writer = pyarrow.parquet.ParquetWriter(self.path, _arrow_schema())
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._open()
+        records, self._buffer = self._buffer, []
+
+        if self.path.endswith(".csv"):
+            writer = csv.writer(self._writer)
+            for record in records:
+                writer.writerow(
+                    "" if value is None else value
+                    for value in (getattr(record, field) for field in FIELDS)
+                )
+            self._writer.flush()
+            return
+
+        import pyarrow
+
+        columns = {field: [getattr(record, field) for record in records] for field in FIELDS}
+        for field in AMOUNT_FIELDS:
+            columns[field] = [None if value is None else float(value) for value in columns[field]]
+        self._writer.write_table(pyarrow.table(columns, schema=self._writer.schema))
+
+    def close(self) -> Optional[str]:
+        """
+        Дописывает оставшиеся строки и закрывает файл
+
+        Returns:
+            Путь к файлу отчета или None, если строк не было
+        """
+        with self._lock:
+            self._flush()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        return self.path
+
+    def summary(self) -> str:
+        text = f"выводов {self.total}, успешно {self.succeeded}"
+        if self.errors:
+            text += ", ошибки: " + ", ".join(f"{name} x{count}" for name, count in self.errors.items())
+        return text
+
+
+class ResultStore(Mapping):
+    """
+    Итоги рассылки {адрес: успешно} с памятью, не зависящей от числа
+    выводов: статус хранится байтом в массиве по позиции кошелька, а адрес
+    берется из исходного списка по той же позиции (строки не копируются).
+    Словарь по адресам собирается только при обращении как к Mapping.
+    """
+    PENDING, SUCCESS, FAILED = 0, 1, 2
+
+    def __init__(self, wallet_list: Sequence[Union[str, WalletRow]]):
+        self._wallets = wallet_list
+        self._codes = array("B", bytes(len(wallet_list)))
+        self._merged: Optional[Dict[str, bool]] = None
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.succeeded = 0
+
+    def set(self, index: int, success: bool) -> None:
+        with self._lock:
+            previous = self._codes[index]
+            self._codes[index] = self.SUCCESS if success else self.FAILED
+            self.processed += previous == self.PENDING
+            self.succeeded += bool(success) - (previous == self.SUCCESS)
+            self._merged = None
+
+    def merge(self, other: "ResultStore", offset: int) -> None:
+        """
+        Переносит обработанные статусы other (итоги части списка,
+        начинающейся с позиции offset)
+        """
+        for index, code in enumerate(other._codes):
+            if code != self.PENDING:
+                self.set(offset + index, code == self.SUCCESS)
+
+    def failures(self) -> List[str]:
+        """
+        Адреса с неудачным выводом (без сборки словаря по всем адресам)
+        """
+        failed: Dict[str, None] = {}
+        for index, code in enumerate(self._codes):
+            if code == self.FAILED:
+                failed[row_address(self._wallets[index])] = None
+        return list(failed)
+
+    def _by_address(self) -> Dict[str, bool]:
+        # Строки CSV с разными токенами на один адрес: успех, только
+        # если успешны все выводы на адрес
+        if self._merged is None:
+            merged: Dict[str, bool] = {}
+            for index, code in enumerate(self._codes):
+                if code != self.PENDING:
+                    address = row_address(self._wallets[index])
+                    merged[address] = merged.get(address, True) and code == self.SUCCESS
+            self._merged = merged
+        return self._merged
+
+    def __getitem__(self, address: str) -> bool:
+        return self._by_address()[address]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_address())
+
+    def __len__(self) -> int:
+        return len(self._by_address())
+
+    def __repr__(self) -> str:
+        return repr(self._by_address())
@@ -0,0 +1,166 @@
+import heapq
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+
+from core.utils import format_duration
+
+
+class WithdrawalScheduler:
+    """
+    Планировщик выводов, укладывающий всю рассылку в заданное окно времени.
+
+    Время отправки каждого вывода рассчитывается заранее с выбранным
+    распределением случайного разброса, выводы берутся из кучи по времени
+    отправки и выполняются несколькими потоками. Если очередь отстает
+    от плана, оставшиеся выводы равномерно перепланируются до дедлайна.
+    """
+
+    JITTERS = {
+        "uniform": "Равномерный",
+        "normal": "Нормальный",
+        "exponential": "Пуассоновский поток",
+    }
+
+    def __init__(
+            self,
+            window: float,
+            jitter: str = "uniform",
+            workers: int = 1,
+            clock=time,
+            replan_threshold: float = 30.0
+    ):
+        """
+        Args:
+            window: Длительность окна рассылки, сек.
+            jitter: Распределение разброса ("uniform", "normal", "exponential")
+            workers: Количество потоков, выполняющих выводы
+            clock: Источник времени с методами time() и sleep()
+            replan_threshold: Отставание от плана (сек.), после которого
+                оставшиеся выводы перепланируются
+        """
+        if jitter not in self.JITTERS:
+            raise ValueError(f"Неизвестное распределение: {jitter}")
+
+        self.window = window
+        self.jitter = jitter
+        self.workers = max(1, workers)
+        self.clock = clock
+        self.replan_threshold = replan_threshold
+        self.deadline = 0.0
+        self._heap: List[Tuple[float, int]] = []
+        self._condition = threading.Condition()
+
+    def plan(self, count: int, start: float, window: float) -> List[float]:
+        """
+        Рассчитывает время отправки для count выводов в окне [start, start + window]
+        """
+        if count <= 0:
+            return []
+
+        if self.jitter == "exponential":
+            # Пуассоновский поток, растянутый на всё окно
+            gaps = [random.expovariate(1.0) for _ in range(count + 1)]
+            scale = window / sum(gaps)
+            times, moment = [], start
+            for gap in gaps[:count]:
+                moment += gap * scale
+                times.append(moment)
+            return times
+
+        slot = window / count
+        times = []
+        for i in range(count):
+            if self.jitter == "normal":
+                offset = min(max(random.gauss(slot / 2, slot / 6), 0.0), slot)
+            else:
+                offset = random.uniform(0, slot)
+            times.append(start + i * slot + offset)
+        return times
+
+    def run(self, count: int, task: Callable[[int], Optional[bool]]) -> None:
+        """
+        Выполняет task(i) для каждого i из range(count) по расписанию
+        """
+        start = self.clock.time()
+        self.deadline = start + self.window
+        self._heap = [
+            (send_time, index)
+            for index, send_time in enumerate(self.plan(count, start, self.window))
+        ]
+        heapq.heapify(self._heap)
+        logger.info(
+            f"Выводы распределены на {format_duration(self.window)}, "
+            f"потоков: {self.workers}"
+        )
+
+        if self.workers == 1:
+            self._dispatch_sequential(task)
+            return
+
+        threads = [
+            threading.Thread(target=self._dispatch_worker, args=(task,), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _dispatch_sequential(self, task: Callable[[int], Optional[bool]]) -> None:
+        while self._heap:
+            send_time, index = self._heap[0]
+            wait = send_time - self.clock.time()
+            if wait > 0:
+                logger.info(
+                    f"Сплю {format_duration(wait)} "
+                    f"перед следующим кошельком..."
+                )
+                self.clock.sleep(wait)
+            heapq.heappop(self._heap)
+            task(index)
+            self._replan_if_behind()
+
+    def _dispatch_worker(self, task: Callable[[int], Optional[bool]]) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if not self._heap:
+                        return
+                    send_time, index = self._heap[0]
+                    wait = send_time - self.clock.time()
+                    if wait <= 0:
+                        heapq.heappop(self._heap)
+                        break
+                    self._condition.wait(wait)
+            try:
+                task(index)
+            finally:
+                with self._condition:
+                    self._replan_if_behind()
+                    self._condition.notify_all()
+
+    def _replan_if_behind(self) -> None:
+        """
+        Перепланирует оставшиеся выводы до дедлайна, если очередь отстает
+        """
+        if not self._heap:
+            return
+
+        now = self.clock.time()
+        lag = now - self._heap[0][0]
+        if lag < self.replan_threshold:
+            return
+
+        remaining = max(self.deadline - now, 0.0)
+        indexes = sorted(index for _, index in self._heap)
+        self._heap = list(zip(self.plan(len(indexes), now, remaining), indexes))
+        heapq.heapify(self._heap)
+        logger.warning(
+            f"Отставание от графика {format_duration(lag)}: "
+            f"{len(indexes)} выводов перепланированы "
+            f"на оставшиеся {format_duration(remaining)}"
+        )
@@ -0,0 +1,128 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+class ServerClock:
+    """
+    Смещение часов биржи относительно локальных.
+
+    Смещение измеряется по нескольким запросам fetch_time: берется
+    замер с наименьшим временем ответа, а серверное время относится к
+    середине запроса. Периодически обновляется в фоновом потоке.
+    Подписанные запросы всех клиентов биржи используют скорректированное
+    время, поэтому расхождение часов не приводит к ошибкам timestamp/recvWindow.
+    """
+
+    def __init__(self, client: Any, samples: int = 5, ttl: float = 600.0):
+        """
+        Args:
+            client: ccxt-клиент биржи для запросов fetch_time
+            samples: Количество замеров при калибровке
+            ttl: Период повторной калибровки, сек.
+        """
+        self.client = client
+        self.samples = samples
+        self.ttl = ttl
+        self.offset = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def calibrate(self) -> None:
+        """
+        Измеряет смещение часов. При ошибке сохраняется прежнее значение
+        """
+        best = None
+        for _ in range(self.samples):
+            try:
+                sent = time.time() * 1000
+                server = self.client.fetch_time()
+                received = time.time() * 1000
+            except Exception as e:
+                logger.warning(f"Не удалось получить время сервера биржи: {e}")
+                return
+            if server is None:
+                return
+            round_trip = received - sent
+            if best is None or round_trip < best[0]:
+                best = (round_trip, server - (sent + received) / 2)
+
+        round_trip, self.offset = best
+        logger.debug(
+            f"Смещение часов {self.client.id}: {self.offset:+.0f} мс "
+            f"(время ответа {round_trip:.0f} мс)"
+        )
+        if abs(self.offset) >= 1000:
+            logger.warning(
+                f"Часы компьютера расходятся с биржей на "
+                f"{self.offset / 1000:+.1f} сек., время запросов скорректировано"
+            )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.ttl):
+            self.calibrate()
+
+    def stop(self) -> None:
+        """
+        Останавливает фоновое обновление смещения
+        """
+        self._stop.set()
+
+    def milliseconds(self) -> int:
+        return int(time.time() * 1000 + self.offset)
+
+    def seconds(self) -> int:
+        return int((time.time() * 1000 + self.offset) / 1000)
+
+    def attach(self, client: Any) -> None:
+        """
+        Подменяет время ccxt-клиента на скорректированное
+        """
+        client.milliseconds = self.milliseconds
+        client.seconds = self.seconds
+        # Троттлинг ccxt сравнивает время с моментом прошлого запроса:
+        # переводим его на те же часы, иначе при отставании биржи
+        # следующий запрос ждал бы все смещение
+        if client.lastRestRequestTimestamp:
+            client.lastRestRequestTimestamp += self.offset
+
+
+_clocks: Dict[str, ServerClock] = {}
+_clock_locks: Dict[str, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def sync_client(client: Any) -> ServerClock:
+    """
+    Подключает клиента к общим часам его биржи.
+
+    Первый клиент биржи калибрует часы и запускает их обновление,
+    следующие используют уже измеренное смещение. Калибровка идет
+    под блокировкой своей биржи и не задерживает клиентов других бирж.
+    """
+    with _lock:
+        exchange_lock = _clock_locks.setdefault(client.id, threading.Lock())
+    with exchange_lock:
+        clock = _clocks.get(client.id)
+        if clock is None:
+            clock = ServerClock(client)
+            clock.calibrate()
+            clock._thread.start()
+            _clocks[client.id] = clock
+    clock.attach(client)
+    return clock
+
+
+def stop_clocks(exchange_id: Optional[str] = None) -> None:
+    """
+    Останавливает обновление часов биржи exchange_id (или всех бирж).
+    Следующий клиент биржи откалибрует часы заново
+    """
+    with _lock:
+        ids = [exchange_id] if exchange_id else list(_clocks)
+        for name in ids:
+            clock = _clocks.pop(name, None)
+            if clock is not None:
+                clock.stop()
@@ -1,9 +1,21 @@
-from typing import List, Tuple, Dict
-from core.exchange import Exchange
-from core.utils import select_chain, get_amount_range
+from decimal import Decimal
+from typing import Any, Callable, List, Tuple, Dict, Optional, Set, Union
+from core import profiler
+from core.exchange import Exchange, WithdrawalResult, idempotency_key
+from core.failover import HealthTracker, backup_legs, candidates
+from core.history import History, open_history
+from core.monitor import ChainMonitor
+from core.report import ResultStore, RunReport, WithdrawalRecord
+from core.scheduler import WithdrawalScheduler
+from core.sweep import SubAccountSweeper
+from core.watcher import DepositWatcher
+from core.utils import select_chain, get_amount_range, resolve_chain, count_decimal_places
+from core.validator import normalize_address
+from core.wallet_file import WalletRow, row_address
 from loguru import logger
 import random
 import time
+import uuid
 
 
 class WithdrawalService:
@@ -11,58 +23,162 @@ class WithdrawalService:
     Сервис для обработки вывода средств с бирж
     """
 
-    def __init__(self, exchange: Exchange):
+    def __init__(
+            self,
+            exchange: Exchange,
+            clock=time,
+            extra_legs: Optional[List[Exchange]] = None,
+            job_id: Optional[str] = None,
+            monitor_ttl: Optional[float] = 60.0,
+            sweep: bool = False,
+            wait_deposit: bool = False,
+            report_dir: Optional[str] = "data/reports",
+            history_path: Optional[str] = "data/history.db",
+            failover: bool = False,
+            enforce_whitelist: bool = False
+    ):
+        """
+        Args:
+            exchange: Объект биржи
+            clock: Источник времени с методами time() и sleep()
+                (модуль time или виртуальные часы симулятора)
+            extra_legs: Объекты биржи для дополнительных токенов, которые
+                отправляются на те же кошельки (с общим ccxt-клиентом)
+            job_id: ID задания для ключей идемпотентности выводов. При
+                повторном запуске с тем же ID биржа не примет вывод дважды
+            monitor_ttl: Период проверки доступности выбранных сетей (сек.),
+                пока сеть отключена, рассылка стоит на паузе. None - без проверки
+            sweep: Перед рассылкой собрать недостающую сумму с субаккаунтов
+            wait_deposit: Если баланса не хватает, ждать депозита вместо ошибки
+            report_dir: Папка для отчета запуска по кошелькам. None - без отчета
+            history_path: База истории выводов всех запусков. None - без истории
+            failover: Если биржа перестала принимать выводы, передать
+                оставшиеся кошельки другой бирже из config.toml с балансом
+                и той же сетью
+            enforce_whitelist: Пропускать кошельки, которых нет в белом
+                списке адресов биржи (по умолчанию они только перечисляются)
+        """
         self.exchange = exchange
+        self.job_id = job_id or uuid.uuid4().hex[:8]
+        self.clock = clock
+        self.legs = [exchange] + list(extra_legs or [])
+        self._chains_lists: Dict[str, Dict] = {}
+        self.monitor_ttl = monitor_ttl
+        self.sweep = sweep
+        self.wait_deposit = wait_deposit
+        self.report_dir = report_dir
+        self.report = RunReport(self.job_id, report_dir)
+        self.history_path = history_path
+        self.history: Optional[History] = open_history(history_path) if history_path else None
+        self.failover = failover
+        # Биржи, которые уже использовались или проверялись для продолжения
+        self.failover_tried: Set[str] = {exchange.name}
+        self._health: Optional[HealthTracker] = HealthTracker() if failover else None
+        self._monitor: Optional[ChainMonitor] = None
+        self.enforce_whitelist = enforce_whitelist
+        self._not_whitelisted: Set[str] = set()
+        self._balances: Dict[str, Decimal] = {}
+        # Причина, по которой последняя рассылка прервалась (None - без ошибок)
+        self.error: Optional[str] = None
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
 
     def process_withdrawal(
             self,
-            wallet_list: List[str],
+            wallet_list: List[Union[str, WalletRow]],
             delay: Tuple[float, float],
-            skip_failed: bool = True
-    ) -> Dict[str, bool]:
+            skip_failed: bool = True,
+            scheduler: Optional[WithdrawalScheduler] = None,
+            chains: Optional[Dict[str, str]] = None
+    ) -> ResultStore:
         """
         Обрабатывает вывод средств на список кошельков
 
         Args:
-            wallet_list: Список адресов кошельков
+            wallet_list: Список адресов кошельков или строк CSV-файла
+                с индивидуальными суммой, токеном, сетью и memo
             delay: Кортеж (мин. задержка, макс. задержка) в секундах
             skip_failed: Пропускать ли кошельки при неудачных выводах
+            scheduler: Планировщик, распределяющий выводы по окну
+                времени (вместо задержки delay между выводами), или любой
+                объект с методом run(count, task)
+            chains: Заранее выбранные сети {токен: сеть} для работы
+                без вопросов пользователю
 
         Returns:
-            Словарь с результатами выводов: {адрес: успешно}
+            Результаты выводов {адрес: успешно} (ResultStore: статусы
+            хранятся по позициям кошельков, строки отчета пишутся на диск)
         """
-        results = {}
+        results = ResultStore(wallet_list)
+        self.report = RunReport(self.job_id, self.report_dir)
+        self.error = None
 
         try:
             # Проверка авторизации и баланса
-            self._prepare_withdrawal(wallet_list)
+            with profiler.phase("auth"):
+                self._prepare_withdrawal(wallet_list)
 
-            # Получаем и выбираем сеть для вывода
-            chains_list = self.exchange.get_chains_list()
-            if not chains_list:
-                logger.error(
-                    f"Для токена {self.exchange.token} не "
-                    f"найдены доступные сети на {self.exchange.name}"
-                )
+            # Получаем и выбираем сеть для вывода каждого токена
+            with profiler.phase("metadata"):
+                selected_chains = self.select_chains(chains)
+            if not selected_chains:
+                return results
+
+            # Все строки файла проверяются до первого вывода
+            errors = self._validate_rows(wallet_list, selected_chains)
+            if errors:
+                logger.error("Ошибки в параметрах кошельков:")
+                for error in errors:
+                    logger.error(f"  {error}")
+                self.error = "Ошибки в параметрах кошельков"
                 return results
 
-            selected_chain = select_chain(chains_list)
+            # Кошельки не из белого списка биржи перечисляются до первого
+            # вывода, а с enforce_whitelist - пропускаются без запросов
+            missing = self._check_whitelist(wallet_list)
+            self._not_whitelisted = missing if self.enforce_whitelist else set()
 
-            # Корректируем минимальную сумму вывода при необходимости
-            self._adjust_amount_if_needed(selected_chain)
+            self._emit(
+                "start",
+                exchange=self.exchange.name,
+                total=len(wallet_list),
+                balances=dict(self._balances)
+            )
+
+            logger.info(
+                f"ID задания: {self.job_id} (для безопасного "
+                f"перезапуска: python main.py --job {self.job_id})"
+            )
+
+            if self.monitor_ttl:
+                self._monitor = ChainMonitor(selected_chains, self.monitor_ttl)
+                self._monitor.start()
+
+            if scheduler is not None:
+                def withdraw_to(index: int) -> bool:
+                    with profiler.phase("withdrawals"):
+                        success = self._withdraw_to_wallet(wallet_list[index], selected_chains)
+                    results.set(index, success)
+                    return success
+
+                scheduler.run(len(wallet_list), withdraw_to)
+                return results
 
             # Выполняем вывод для каждого кошелька
-            for wallet in wallet_list:
-                self.exchange.address = wallet
-                success = self.exchange.withdraw(selected_chain)
-                results[wallet] = success
+            last = len(wallet_list) - 1
+            for index, wallet in enumerate(wallet_list):
+                if self.failover and not self._is_healthy():
+                    if self._fail_over(wallet_list, index, results, selected_chains, delay, skip_failed):
+                        return results
+                with profiler.phase("withdrawals"):
+                    success = self._withdraw_to_wallet(wallet, selected_chains)
+                results.set(index, success)
 
                 # Если вывод не удался и skip_failed=True, пропускаем задержку
                 if not success and skip_failed:
                     continue
 
-                # Задержка между выводами
-                if wallet != wallet_list[-1]:  # Если это не последний кошелек
+                # Задержка между выводами (после последнего кошелька не нужна)
+                if index < last:
                     self._sleep_between_withdrawals(delay)
 
             return results
@@ -72,41 +188,502 @@ class WithdrawalService:
                 f"Ошибка при работе с "
                 f"{self.exchange.name.upper()}: {e}"
             )
+            self.error = str(e) or type(e).__name__
             return results
 
-    def _prepare_withdrawal(self, wallet_list: List[str]) -> None:
+        finally:
+            if self._monitor is not None:
+                self._monitor.stop()
+                self._monitor = None
+            path = self.report.close()
+            if self.history is not None:
+                self.history.flush()
+            if path:
+                logger.info(f"Отчет запуска ({self.report.summary()}): {path}")
+            self._emit("finish", results=results.processed)
+
+    def _is_healthy(self) -> bool:
+        """
+        Принимает ли биржа выводы: нет серии ошибок и выбранные сети включены
+        """
+        if self._monitor is not None and self._monitor.suspended:
+            return False
+        return self._health is None or self._health.healthy
+
+    def _fail_over(
+            self,
+            wallet_list: List[Union[str, WalletRow]],
+            start: int,
+            results: ResultStore,
+            selected_chains: List[Tuple[Exchange, Dict]],
+            delay: Tuple[float, float],
+            skip_failed: bool
+    ) -> bool:
+        """
+        Передает кошельки с позиции start первой подходящей резервной бирже.
+        Результаты резервной биржи записываются в results на те же позиции
+
+        Returns:
+            True, если оставшиеся кошельки обработаны на резервной бирже
+        """
+        if self._health is not None and self._health.reason:
+            reason = self._health.reason
+        else:
+            reason = f"сеть {', '.join(self._monitor.suspended)} отключена"
+        remaining = wallet_list[start:]
+        logger.warning(
+            f"{self.exchange.name.upper()} не принимает выводы ({reason}), "
+            f"ищу биржу для оставшихся {len(remaining)} кош."
+        )
+
+        for name in candidates(self.exchange.config, self.failover_tried):
+            self.failover_tried.add(name)
+            found = backup_legs(name, selected_chains, lambda leg: self._plan(remaining, leg))
+            if found is None:
+                continue
+
+            legs, chains = found
+            logger.warning(f"Продолжаю рассылку на {name.upper()}: {len(remaining)} кош.")
+            if self._monitor is not None:
+                self._monitor.stop()
+            self._emit("failover", exchange=name, remaining=len(remaining))
+            backup = WithdrawalService(
+                legs[0],
+                clock=self.clock,
+                extra_legs=legs[1:],
+                job_id=self.job_id,
+                monitor_ttl=self.monitor_ttl,
+                sweep=self.sweep,
+                wait_deposit=self.wait_deposit,
+                report_dir=self.report_dir,
+                history_path=self.history_path,
+                failover=True,
+                enforce_whitelist=self.enforce_whitelist
+            )
+            backup.failover_tried = self.failover_tried
+            backup.listeners = self.listeners
+            results.merge(
+                backup.process_withdrawal(remaining, delay, skip_failed, chains=chains),
+                start
+            )
+            self.error = backup.error
+            return True
+
+        # Резерва нет - продолжаем на текущей бирже, как без failover
+        logger.error(
+            f"Нет биржи с балансом и включенной сетью для продолжения, "
+            f"рассылка продолжается на {self.exchange.name.upper()}"
+        )
+        self.failover = False
+        return False
+
+    def subscribe(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """
+        Подписка на события рассылки: listener(событие, данные).
+
+        События: start (exchange, total, balances), withdrawal (exchange,
+        token, address, success, latency, spent), wallet (address, success),
+        sleep (seconds), pause (seconds), failover (exchange, remaining),
+        finish (results).
+        Обработчик вызывается в потоке вывода и должен быть быстрым.
+        """
+        self.listeners.append(listener)
+
+    def _emit(self, event: str, **data) -> None:
+        for listener in self.listeners:
+            listener(event, data)
+
+    def _prepare_withdrawal(self, wallet_list: List[Union[str, WalletRow]]) -> None:
         """
         Подготовка к выводу: проверка авторизации и баланса
+
+        Авторизация и запрос баланса выполняются один раз,
+        достаточность баланса проверяется для каждого токена.
         """
         self.exchange.check_auth()
+        planned = {leg.token: self._plan(wallet_list, leg) for leg in self.legs}
+        # Сеть еще не выбрана: к цели сбора и ожидания добавляется
+        # комиссия самой дорогой из доступных сетей
+        fees = (
+            {leg.token: self._fee_reserve(wallet_list, leg) for leg in self.legs}
+            if self.sweep or self.wait_deposit else {}
+        )
+
+        if self.sweep:
+            # Собираем сумму на случай максимальных случайных сумм
+            for leg in self.legs:
+                random_count, fixed_total = planned[leg.token]
+                SubAccountSweeper(leg).sweep(
+                    random_count * leg.max_amount + fixed_total + fees[leg.token]
+                )
+
+        if self.wait_deposit:
+            # Рассылка стартует, когда баланс покрывает план со средними суммами
+            for leg in self.legs:
+                random_count, fixed_total = planned[leg.token]
+                average = (leg.min_amount + leg.max_amount) / 2
+                DepositWatcher(leg, clock=self.clock).wait_for(
+                    random_count * average + fixed_total + fees[leg.token]
+                )
+
         logger.info("Проверяю баланс...")
-        self.exchange.get_balance(len(wallet_list))
+        balances = self.exchange._fetch_balance()
+        for leg in self.legs:
+            random_count, fixed_total = planned[leg.token]
+            self._balances[leg.token] = leg.get_balance(
+                random_count, balances, fixed_total
+            )
+
+    @classmethod
+    def _plan(
+            cls, wallet_list: List[Union[str, WalletRow]], leg: Exchange
+    ) -> Tuple[int, Decimal]:
+        """
+        План выводов токена leg: (выводов со случайной суммой,
+        сумма выводов с заданными в файле суммами)
+        """
+        random_count = 0
+        fixed_total = Decimal(0)
+        for wallet in wallet_list:
+            if not cls._targets_leg(wallet, leg):
+                continue
+            if isinstance(wallet, WalletRow) and wallet.amount is not None:
+                fixed_total += wallet.amount
+            else:
+                random_count += 1
+        return random_count, fixed_total
+
+    def _fee_reserve(self, wallet_list: List[Union[str, WalletRow]], leg: Exchange) -> Decimal:
+        """
+        Комиссии всех выводов токена leg по самой дорогой доступной сети
+        """
+        chains_list = leg.get_chains_list(quiet=True)
+        self._chains_lists[leg.token] = chains_list
+        fee = max(
+            (details["withdrawFee"] for details in chains_list.values() if details["withdrawEnable"]),
+            default=Decimal(0)
+        )
+        return fee * sum(1 for wallet in wallet_list if self._targets_leg(wallet, leg))
+
+    @staticmethod
+    def _targets_leg(wallet: Union[str, WalletRow], leg: Exchange) -> bool:
+        """
+        Отправляется ли токен leg на кошелек (строка CSV с токеном
+        получает только этот токен, остальные - все токены)
+        """
+        return (
+            not isinstance(wallet, WalletRow)
+            or wallet.token is None
+            or wallet.token == leg.token
+        )
+
+    def _check_whitelist(self, wallet_list: List[Union[str, WalletRow]]) -> Set[str]:
+        """
+        Сверка кошельков с белым списком адресов вывода аккаунта.
+
+        Белый список запрашивается один раз для каждого токена (если
+        биржа отдает его через API). Пустой список считается отключенным
+        белым списком.
 
-    def _adjust_amount_if_needed(self, selected_chain: Dict) -> None:
+        Returns:
+            Множество нормализованных адресов, которых нет в белом списке
+        """
+        whitelists = []
+        for leg in self.legs:
+            try:
+                whitelist = leg.fetch_whitelist()
+            except Exception as e:
+                logger.warning(
+                    f"Не удалось получить белый список адресов ${leg.token}: {e}"
+                )
+                continue
+            if whitelist:
+                whitelists.append((leg, whitelist))
+
+        if not whitelists:
+            return set()
+
+        missing = set()
+        for wallet in wallet_list:
+            address = normalize_address(row_address(wallet))
+            for leg, whitelist in whitelists:
+                if self._targets_leg(wallet, leg) and address not in whitelist:
+                    missing.add(address)
+
+        if missing:
+            logger.warning(
+                f"Нет в белом списке адресов биржи: {len(missing)} кош. "
+                + (
+                    "(будут пропущены):" if self.enforce_whitelist
+                    else "(биржа может отклонить вывод на них):"
+                )
+            )
+            for address in sorted(missing)[:10]:
+                logger.warning(f"  {address}")
+            if len(missing) > 10:
+                logger.warning(f"  ... и еще {len(missing) - 10}")
+        else:
+            logger.success("Все кошельки есть в белом списке адресов биржи")
+        return missing
+
+    def _validate_rows(
+            self,
+            wallet_list: List[Union[str, WalletRow]],
+            selected_chains: List[Tuple[Exchange, Dict]]
+    ) -> List[str]:
+        """
+        Проверяет индивидуальные параметры строк CSV: токен, сеть,
+        минимальную сумму и точность суммы
+
+        Returns:
+            Список ошибок (пустой, если все строки корректны)
+        """
+        errors = []
+        tokens = {leg.token for leg, _ in selected_chains}
+        for index, wallet in enumerate(wallet_list):
+            if not isinstance(wallet, WalletRow):
+                continue
+
+            prefix = f"Кошелек {index + 1} ({wallet.address})"
+            if wallet.token is not None and wallet.token not in tokens:
+                errors.append(f"{prefix}: токен {wallet.token} не выбран для вывода")
+                continue
+
+            for leg, selected_chain in selected_chains:
+                if not self._targets_leg(wallet, leg):
+                    continue
+
+                chain = selected_chain
+                if wallet.chain:
+                    chain = self._resolve_row_chain(leg, wallet.chain)
+                    if chain is None:
+                        errors.append(
+                            f"{prefix}: сеть {wallet.chain} недоступна "
+                            f"для вывода ${leg.token}"
+                        )
+                        continue
+
+                if wallet.amount is None:
+                    continue
+                if wallet.amount < chain["withdrawMin"]:
+                    errors.append(
+                        f"{prefix}: сумма {wallet.amount} меньше минимальной "
+                        f"{chain['withdrawMin']} ${leg.token}"
+                    )
+                max_decimals = leg.get_max_decimals(chain)
+                if count_decimal_places(wallet.amount) > max_decimals:
+                    errors.append(
+                        f"{prefix}: в сумме {wallet.amount} больше "
+                        f"{max_decimals} знаков после запятой"
+                    )
+        return errors
+
+    def _resolve_row_chain(self, leg: Exchange, name: str) -> Optional[Dict]:
+        return resolve_chain(self._chains_lists[leg.token], name)
+
+    def select_chains(
+            self, chains: Optional[Dict[str, str]] = None
+    ) -> List[Tuple[Exchange, Dict]]:
+        """
+        Выбор сети и корректировка сумм для каждого токена
+
+        Args:
+            chains: Заранее выбранные сети {токен: сеть}. Если не указаны,
+                сеть и новый диапазон сумм запрашиваются у пользователя
+        """
+        selected_chains = []
+        for leg in self.legs:
+            chains_list = leg.get_chains_list()
+            self._chains_lists[leg.token] = chains_list
+            if not chains_list:
+                logger.error(
+                    f"Для токена {leg.token} не "
+                    f"найдены доступные сети на {leg.name}"
+                )
+                return []
+
+            if chains is not None:
+                selected_chain = resolve_chain(chains_list, chains.get(leg.token, ""))
+                if selected_chain is None:
+                    raise ValueError(
+                        f"Сеть {chains.get(leg.token)} недоступна "
+                        f"для вывода ${leg.token}"
+                    )
+            else:
+                selected_chain = select_chain(
+                    chains_list, leg.token if len(self.legs) > 1 else None
+                )
+
+            # Корректируем минимальную сумму вывода при необходимости
+            self._adjust_amount_if_needed(leg, selected_chain, chains is None)
+            leg.apply_chain_precision(selected_chain)
+            selected_chains.append((leg, selected_chain))
+
+        return selected_chains
+
+    def _withdraw_to_wallet(
+            self,
+            wallet: Union[str, WalletRow],
+            selected_chains: List[Tuple[Exchange, Dict]]
+    ) -> bool:
+        """
+        Отправляет на кошелек все токены подряд в одном слоте задержки
+
+        Returns:
+            True, если все выводы на кошелек успешны
+        """
+        queued = time.monotonic()
+        if normalize_address(row_address(wallet)) in self._not_whitelisted:
+            logger.error(f"{row_address(wallet)} | Нет в белом списке адресов биржи, вывод пропущен")
+            skipped = WithdrawalResult(
+                amount=getattr(wallet, "amount", None), fee=None, error="NotWhitelisted"
+            )
+            for leg, chain in selected_chains:
+                if self._targets_leg(wallet, leg):
+                    self._record(leg, chain, row_address(wallet), queued, queued, 0.0, skipped)
+            return False
+
+        # Пока выбранная сеть отключена биржей, вывод ждет
+        if self._monitor is not None:
+            waited = self._monitor.wait_available()
+            if waited:
+                self._emit("pause", seconds=waited)
+
+        success = self._send_to_wallet(wallet, selected_chains, queued)
+        if self._monitor is not None:
+            self._monitor.report(success)
+        self._emit("wallet", address=row_address(wallet), success=success)
+        return success
+
+    def _send_to_wallet(
+            self,
+            wallet: Union[str, WalletRow],
+            selected_chains: List[Tuple[Exchange, Dict]],
+            queued: Optional[float] = None
+    ) -> bool:
+        """
+        Выводы всех токенов на кошелек без проверки доступности сети
+
+        queued - момент очереди кошелька (time.monotonic) для отчета
+        """
+        if queued is None:
+            queued = time.monotonic()
+        if not isinstance(wallet, WalletRow):
+            success = True
+            for leg, selected_chain in selected_chains:
+                success = self._withdraw_leg(leg, selected_chain, wallet, queued) and success
+            return success
+
+        success = True
+        for leg, selected_chain in selected_chains:
+            if not self._targets_leg(wallet, leg):
+                continue
+            chain = (
+                self._resolve_row_chain(leg, wallet.chain)
+                if wallet.chain else selected_chain
+            )
+            success = self._withdraw_leg(
+                leg, chain, wallet.address, queued, amount=wallet.amount, tag=wallet.memo
+            ) and success
+        return success
+
+    def _withdraw_leg(
+            self,
+            leg: Exchange,
+            chain: Dict,
+            address: str,
+            queued: float,
+            amount: Optional[Decimal] = None,
+            tag: Optional[str] = None
+    ) -> bool:
+        """
+        Вывод одного токена с ключом идемпотентности, событием withdrawal
+        и строкой отчета
+        """
+        started = time.monotonic()
+        result = leg.submit_withdrawal(
+            chain,
+            address,
+            amount=amount,
+            tag=tag,
+            client_id=idempotency_key(self.job_id, address, leg.token)
+        )
+        latency = time.monotonic() - started
+        self._record(leg, chain, address, queued, started, latency, result)
+        if self._health is not None:
+            self._health.report(result)
+        self._emit(
+            "withdrawal",
+            exchange=leg.name,
+            token=leg.token,
+            address=address,
+            success=result.success,
+            latency=latency,
+            spent=leg.spent_total
+        )
+        return result.success
+
+    def _record(
+            self,
+            leg: Exchange,
+            chain: Dict,
+            address: str,
+            queued: float,
+            started: float,
+            latency: float,
+            result: WithdrawalResult
+    ) -> None:
+        record = WithdrawalRecord(
+            job_id=self.job_id,
+            exchange=leg.name,
+            token=leg.token,
+            address=address,
+            chain=chain.get("chainKey") or chain.get("chainId"),
+            planned_amount=result.amount,
+            sent_amount=result.sent,
+            fee=result.fee,
+            withdrawal_id=result.withdrawal_id,
+            success=result.success,
+            error=result.error,
+            queue_wait=started - queued,
+            latency=latency,
+            submitted_at=time.time() - (time.monotonic() - started)
+        )
+        self.report.add(record)
+        if self.history is not None:
+            self.history.add(record)
+
+    @staticmethod
+    def _adjust_amount_if_needed(
+            leg: Exchange, selected_chain: Dict, interactive: bool = True
+    ) -> None:
         """
         Корректировка минимальной суммы вывода, если требуется
         """
-        min_withdraw = float(selected_chain["withdrawMin"])
-        if min_withdraw > self.exchange.min_amount:
+        min_withdraw = selected_chain["withdrawMin"]
+        if min_withdraw > leg.min_amount:
             logger.warning(
                 f"Указанная мин. сумма "
-                f"{self.exchange.min_amount} меньше, "
-                f"чем на {self.exchange.name.upper()}: "
+                f"{leg.min_amount} меньше, "
+                f"чем на {leg.name.upper()}: "
                 f"{min_withdraw}"
             )
+            if not interactive:
+                raise ValueError(
+                    f"Мин. сумма ${leg.token} меньше допустимой: {min_withdraw}"
+                )
 
             # Запрашиваем новый диапазон сумм
             new_min, new_max = get_amount_range(min_withdraw)
-            self.exchange.min_amount = new_min
-            self.exchange.max_amount = new_max
+            leg.min_amount = new_min
+            leg.max_amount = new_max
             logger.info(
                 f"Установлены новые значения: "
                 f"мин. {new_min}, макс. {new_max} "
-                f"${self.exchange.token}"
+                f"${leg.token}"
             )
 
-    @staticmethod
-    def _sleep_between_withdrawals(delay: Tuple[float, float]) -> None:
+    def _sleep_between_withdrawals(self, delay: Tuple[float, float]) -> None:
         """
         Задержка между выводами средств
         """
@@ -115,4 +692,6 @@ class WithdrawalService:
             f"Сплю {sleep_time} сек. "
             f"перед следующим кошельком..."
         )
-        time.sleep(sleep_time)
\ No newline at end of file
+        self._emit("sleep", seconds=sleep_time)
+        with profiler.phase("delays"):
+            self.clock.sleep(sleep_time)
\ No newline at end of file
@@ -0,0 +1,344 @@
+import statistics
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from core.configes import Config
+from core.exchange import to_decimal
+from core.factory import ExchangeFactory
+from core.scheduler import WithdrawalScheduler
+from core.service import WithdrawalService
+from core.utils import format_amount, format_duration, setup_logger
+
+# Значение ccxt.TICK_SIZE: ccxt загружается только при создании клиента биржи
+TICK_SIZE = 4
+
+
+class VirtualClock:
+    """
+    Виртуальные часы: sleep() только сдвигает время, не останавливая поток
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+
+
+class SimulatedClient:
+    """
+    Имитация ccxt-клиента биржи для симуляции.
+
+    Отвечает из памяти, а время запросов (rateLimit ccxt и сетевая
+    задержка) учитывает на виртуальных часах.
+    """
+
+    def __init__(
+            self,
+            clock: VirtualClock,
+            token: str,
+            currencies: Dict,
+            balance: Decimal,
+            rate_limit: float,
+            latency: float
+    ):
+        self.clock = clock
+        self.token = token
+        self.currencies = currencies
+        self.balance = balance
+        self.rateLimit = rate_limit
+        self.precisionMode = TICK_SIZE
+        self.latency = latency
+        self.requests = 0
+        self.withdrawals: List[Dict[str, Any]] = []
+        # Комиссии сетей {chainId: комиссия} и параметр сети в withdraw
+        self.fees: Dict[str, Decimal] = {}
+        self.network_param = "network"
+        self._markets_loaded = False
+        self._last_request: Optional[float] = None
+
+    def _request(self) -> None:
+        # Троттлинг ccxt (enableRateLimit): не чаще одного запроса в rateLimit мс
+        if self._last_request is not None:
+            wait = self._last_request + self.rateLimit / 1000 - self.clock.time()
+            if wait > 0:
+                self.clock.sleep(wait)
+        self._last_request = self.clock.time()
+        self.requests += 1
+        self.clock.sleep(self.latency)
+
+    def load_markets(self, reload: bool = False, params: Optional[Dict] = None) -> Dict:
+        if reload or not self._markets_loaded:
+            self._request()
+            self._markets_loaded = True
+        return {}
+
+    def fetch_currencies(self, params: Optional[Dict] = None) -> Dict:
+        self._request()
+        return self.currencies
+
+    def fetch_balance(self, params: Optional[Dict] = None) -> Dict:
+        self._request()
+        return {
+            "free": {self.token: self.balance},
+            "total": {self.token: self.balance},
+        }
+
+    def withdraw(
+            self,
+            code: str,
+            amount: str,
+            address: str,
+            tag: Optional[str] = None,
+            params: Optional[Dict] = None
+    ) -> Dict:
+        self._request()
+        amount = to_decimal(amount)
+        # Биржа списывает с баланса сумму вывода вместе с комиссией сети
+        fee = self.fees.get((params or {}).get(self.network_param), Decimal(0))
+        if amount + fee > self.balance:
+            import ccxt
+            raise ccxt.InsufficientFunds(
+                f"Недостаточно средств: {format_amount(self.balance)} ${code}"
+            )
+        self.balance -= amount + fee
+        self.withdrawals.append({
+            "time": self.clock.time(),
+            "amount": amount,
+            "address": address,
+            "params": params or {},
+        })
+        return {"id": f"sim-{len(self.withdrawals)}", "info": {}}
+
+    # Белый список адресов вывода: пустая адресная книга (Binance, Gate)
+    # означает отключенный белый список, проверка перед запуском не мешает
+
+    def sapiGetCapitalWithdrawAddressList(self, params: Optional[Dict] = None) -> List:
+        self._request()
+        return []
+
+    def privateWalletGetSavedAddress(self, params: Optional[Dict] = None) -> List:
+        self._request()
+        return []
+
+
+def synthetic_currencies(
+        token: str,
+        fee: Decimal = Decimal(0),
+        withdraw_min: Decimal = Decimal(0)
+) -> Dict:
+    """
+    Метаданные токена с одной сетью SIM. Заполнены поля всех адаптеров,
+    чтобы каждый из них распознал сеть как доступную для вывода.
+    """
+    network_info = {
+        "withdrawEnable": True,
+        "withdrawFee": fee,
+        "withdrawable": "true",
+        "canWd": True,
+        "isWithdrawEnabled": True,
+    }
+    return {
+        token: {
+            "id": token,
+            "code": token,
+            "info": {
+                "networkList": [{
+                    "network": "SIM",
+                    "netWork": "SIM",
+                    "withdrawEnable": True,
+                    "withdrawFee": fee,
+                    "withdrawMin": withdraw_min,
+                }],
+                "chains": [{
+                    "chain": "SIM",
+                    "withdraw_enabled": True,
+                    "withdrawal_fee": fee,
+                    "min_withdraw_amount": withdraw_min,
+                }],
+            },
+            "networks": {
+                "SIM": {
+                    "id": "SIM",
+                    "network": "SIM",
+                    "withdraw": True,
+                    "fee": fee,
+                    "limits": {"withdraw": {"min": withdraw_min}},
+                    "info": network_info,
+                },
+            },
+        },
+    }
+
+
+def load_currencies(
+        exchange_name: str,
+        config: Config,
+        token: str
+) -> Optional[Dict]:
+    """
+    Загружает реальные метаданные токена с биржи (если настроены ключи),
+    чтобы симуляция использовала настоящие сети, комиссии и минимумы
+    """
+    try:
+        exchange = ExchangeFactory.create(exchange_name, config, token, (0, 0))
+        exchange.exchange.load_markets()
+        currencies = exchange.exchange.currencies
+        if token.upper() in currencies:
+            return {token.upper(): currencies[token.upper()]}
+        logger.warning(f"Токен {token.upper()} не найден на {exchange_name.upper()}")
+    except Exception as e:
+        logger.warning(f"Не удалось загрузить данные биржи для симуляции: {e}")
+    return None
+
+
+def run_simulation(
+        exchange_name: str,
+        config: Config,
+        token: str,
+        amount: Tuple[Decimal, Decimal],
+        decimal_places: Optional[int],
+        wallets: List[str],
+        delay: Tuple[float, float],
+        balance: Decimal,
+        fee: Decimal = Decimal(0),
+        latency: float = 0.3,
+        window: Optional[float] = None,
+        jitter: str = "uniform"
+) -> Dict[str, Any]:
+    """
+    Прогоняет весь процесс вывода (баланс, выбор сети, суммы, задержки)
+    на виртуальных часах и поддельной бирже, не отправляя запросов
+
+    Args:
+        exchange_name: Имя биржи
+        config: Объект конфигурации
+        token: Название токена
+        amount: Кортеж (мин. сумма, макс. сумма)
+        decimal_places: Максимальное количество знаков после запятой
+        wallets: Список адресов кошельков
+        delay: Кортеж (мин. задержка, макс. задержка) в секундах
+        balance: Баланс токена для симуляции
+        fee: Комиссия сети, если реальные данные биржи недоступны
+        latency: Время ответа биржи на один запрос, сек.
+        window: Окно рассылки (сек.) для режима планировщика
+        jitter: Распределение разброса для режима планировщика
+
+    Returns:
+        Словарь с показателями симуляции
+    """
+    import ccxt
+
+    currencies = load_currencies(exchange_name, config, token)
+    if currencies is None:
+        logger.info(f"Использую тестовую сеть SIM с комиссией {format_amount(fee)}")
+        currencies = synthetic_currencies(token.upper(), fee)
+
+    clock = VirtualClock()
+    client = SimulatedClient(
+        clock,
+        token.upper(),
+        currencies,
+        balance,
+        getattr(ccxt, exchange_name.lower())().rateLimit,
+        latency,
+    )
+    exchange = ExchangeFactory.create(
+        exchange_name, config, token, amount, decimal_places, client=client
+    )
+    chains = exchange.get_chains_list()
+    fees_by_chain = {
+        details["chainId"]: details["withdrawFee"]
+        for details in chains.values()
+    }
+    client.fees = fees_by_chain
+    client.network_param = exchange.network_param_name
+
+    # На виртуальных часах планировщик работает в одном потоке
+    scheduler = (
+        WithdrawalScheduler(window, jitter, workers=1, clock=clock)
+        if window else None
+    )
+
+    # Сообщения по каждому кошельку в симуляции не нужны
+    setup_logger("WARNING", logfile=False)
+    try:
+        results = WithdrawalService(
+            exchange, clock=clock, monitor_ttl=None, report_dir=None,
+            history_path=None
+        ).process_withdrawal(
+            wallets, delay, scheduler=scheduler
+        )
+    finally:
+        setup_logger()
+
+    amounts = [withdrawal["amount"] for withdrawal in client.withdrawals]
+    fee_total = sum(
+        (
+            fees_by_chain.get(withdrawal["params"].get(exchange.network_param_name), 0)
+            for withdrawal in client.withdrawals
+        ),
+        Decimal(0)
+    )
+    report = {
+        "wallets": len(wallets),
+        "successful": sum(1 for success in results.values() if success),
+        "duration": clock.time(),
+        "expected_duration": window or (
+            max(len(wallets) - 1, 0) * (delay[0] + delay[1]) / 2
+            + len(wallets) * max(latency, client.rateLimit / 1000)
+        ),
+        "requests": client.requests,
+        "amount_total": sum(amounts, Decimal(0)),
+        "fee_total": fee_total,
+        "balance_margin": balance - sum(amounts, Decimal(0)) - fee_total,
+        "amounts": amounts,
+    }
+    _log_report(report, exchange.token)
+    return report
+
+
+def _log_report(report: Dict[str, Any], token: str) -> None:
+    amounts = [float(amount) for amount in report["amounts"]]
+    logger.info("Результаты симуляции:")
+    logger.info(
+        f"  Кошельков: {report['wallets']}, "
+        f"успешных выводов: {report['successful']}"
+    )
+    logger.info(
+        f"  Время выполнения: {format_duration(report['duration'])} "
+        f"(в среднем: {format_duration(report['expected_duration'])})"
+    )
+    logger.info(f"  Запросов к API: {report['requests']}")
+    if amounts:
+        deciles = statistics.quantiles(amounts, n=10) if len(amounts) > 1 else amounts * 9
+        logger.info(
+            f"  Суммы: мин. {format_amount(min(amounts))}, "
+            f"медиана {format_amount(statistics.median(amounts))}, "
+            f"средняя {format_amount(statistics.fmean(amounts))}, "
+            f"макс. {format_amount(max(amounts))} ${token}"
+        )
+        logger.info(
+            f"  10% выводов меньше {format_amount(deciles[0])}, "
+            f"10% больше {format_amount(deciles[-1])} ${token}"
+        )
+    logger.info(f"  Всего к выводу: {format_amount(report['amount_total'])} ${token}")
+    logger.info(f"  Комиссии: {format_amount(report['fee_total'])} ${token}")
+    if report["balance_margin"] < 0:
+        logger.warning(
+            f"  Баланса не хватит: нехватка "
+            f"{format_amount(-report['balance_margin'])} ${token}"
+        )
+    else:
+        logger.success(
+            f"  Остаток баланса после выводов: "
+            f"{format_amount(report['balance_margin'])} ${token}"
+        )
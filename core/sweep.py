@@ -0,0 +1,160 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+from core.exchange import Exchange, SubAccounts, to_decimal
+from core.utils import format_amount
+
+
+class SubAccountSweeper:
+    """
+    Сбор токена с субаккаунтов на основной аккаунт перед рассылкой.
+
+    Балансы субаккаунтов запрашиваются параллельно, затем переводится
+    только недостающая сумма - сначала с самых крупных балансов, чтобы
+    переводов было меньше. Переводы тоже идут параллельно, но не больше
+    workers одновременно, чтобы не упираться в лимиты запросов биржи.
+    В конце баланс основного аккаунта проверяется повторно.
+    """
+
+    def __init__(
+            self,
+            exchange: Exchange,
+            workers: int = 4,
+            verify_attempts: int = 5,
+            verify_delay: float = 2.0
+    ):
+        """
+        Args:
+            exchange: Объект биржи (основной аккаунт) с токеном для сбора
+            workers: Максимум одновременных запросов к бирже
+            verify_attempts: Сколько раз проверять зачисление переводов
+            verify_delay: Пауза между проверками зачисления, сек.
+        """
+        self.exchange = exchange
+        self.workers = workers
+        self.verify_attempts = verify_attempts
+        self.verify_delay = verify_delay
+
+    def _master_balance(self) -> Decimal:
+        balances = self.exchange._fetch_balance()
+        return to_decimal(balances.get("total", {}).get(self.exchange.token))
+
+    def _fetch_balances(self, sub_accounts: List[str]) -> Dict[str, Decimal]:
+        def fetch(sub_account: str) -> Tuple[str, Decimal]:
+            try:
+                return sub_account, self.exchange.fetch_sub_account_balance(sub_account)
+            except Exception as e:
+                logger.warning(f"Не удалось получить баланс субаккаунта {sub_account}: {e}")
+                return sub_account, Decimal(0)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(pool.map(fetch, sub_accounts))
+
+    @staticmethod
+    def plan(balances: Dict[str, Decimal], shortfall: Decimal) -> List[Tuple[str, Decimal]]:
+        """
+        Переводы для покрытия недостающей суммы: с крупных балансов,
+        последний перевод - только остаток
+        """
+        transfers = []
+        for sub_account, balance in sorted(balances.items(), key=lambda item: -item[1]):
+            if shortfall <= 0 or balance <= 0:
+                break
+            amount = min(balance, shortfall)
+            transfers.append((sub_account, amount))
+            shortfall -= amount
+        return transfers
+
+    def _transfer(self, transfer: Tuple[str, Decimal]) -> Decimal:
+        sub_account, amount = transfer
+        try:
+            self.exchange.transfer_from_sub_account(sub_account, amount)
+        except Exception as e:
+            logger.error(f"Перевод с субаккаунта {sub_account} не выполнен: {e}")
+            return Decimal(0)
+        logger.info(
+            f"Переведено {format_amount(amount)} ${self.exchange.token} "
+            f"с субаккаунта {sub_account}"
+        )
+        return amount
+
+    def sweep(self, target: Decimal) -> Decimal:
+        """
+        Пополняет основной аккаунт с субаккаунтов до суммы target
+
+        Returns:
+            Проверенный баланс основного аккаунта после переводов
+        """
+        token = self.exchange.token
+        master = self._master_balance()
+        shortfall = target - master
+        if shortfall <= 0:
+            logger.info(
+                f"На основном аккаунте достаточно ${token} "
+                f"({format_amount(master)}), сбор с субаккаунтов не нужен"
+            )
+            return master
+
+        if not isinstance(self.exchange, SubAccounts):
+            logger.warning(
+                f"{self.exchange.name.upper()} не поддерживает сбор с субаккаунтов"
+            )
+            return master
+        sub_accounts = self.exchange.fetch_sub_accounts()
+        logger.info(
+            f"Не хватает {format_amount(shortfall)} ${token}, "
+            f"проверяю субаккаунты: {len(sub_accounts)}"
+        )
+
+        balances = self._fetch_balances(sub_accounts)
+        available = sum(balances.values(), Decimal(0))
+        if available < shortfall:
+            logger.warning(
+                f"На субаккаунтах всего {format_amount(available)} ${token}, "
+                f"недостающая сумма будет покрыта не полностью"
+            )
+
+        # Недоперевод из-за ошибки добирается с других субаккаунтов
+        moved = Decimal(0)
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                transfers = self.plan(
+                    {key: value for key, value in balances.items() if key not in failed},
+                    shortfall - moved
+                )
+                if not transfers:
+                    break
+                for (sub_account, _), amount in zip(transfers, pool.map(self._transfer, transfers)):
+                    if amount:
+                        balances[sub_account] -= amount
+                        moved += amount
+                    else:
+                        failed.add(sub_account)
+        if not moved:
+            return master
+
+        # Внутренние переводы зачисляются не всегда мгновенно
+        expected = master + moved
+        for attempt in range(self.verify_attempts):
+            balance = self._master_balance()
+            if balance >= expected:
+                break
+            if attempt < self.verify_attempts - 1:
+                time.sleep(self.verify_delay)
+
+        if balance >= expected:
+            logger.success(
+                f"С субаккаунтов собрано {format_amount(moved)} ${token}, "
+                f"баланс основного аккаунта: {format_amount(balance)}"
+            )
+        else:
+            logger.warning(
+                f"Зачислено не все: баланс основного аккаунта "
+                f"{format_amount(balance)} ${token}, ожидалось {format_amount(expected)}"
+            )
+        return balance
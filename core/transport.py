@@ -0,0 +1,115 @@
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+from msgspec import Struct
+
+
+class TransportConfig(Struct, frozen=True):
+    """
+    Секция [transport] в config.toml (необязательная)
+    """
+    # Соединений на хост в общем пуле
+    pool_size: int = 20
+    # Время кэширования DNS, сек. (0 - без кэша)
+    dns_ttl: float = 300.0
+
+
+_sessions: Dict[TransportConfig, Any] = {}
+_lock = threading.Lock()
+_dns_cache: Dict[Tuple, Tuple[float, Any]] = {}
+_dns_ttl = 0.0
+_resolve = socket.getaddrinfo
+
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    key = (host, port, args, tuple(sorted(kwargs.items())))
+    cached = _dns_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < _dns_ttl:
+        return cached[1]
+    result = _resolve(host, port, *args, **kwargs)
+    _dns_cache[key] = (time.monotonic(), result)
+    return result
+
+
+def _install_dns_cache(ttl: float) -> None:
+    global _dns_ttl
+    _dns_ttl = ttl
+    if ttl > 0 and socket.getaddrinfo is not _cached_getaddrinfo:
+        socket.getaddrinfo = _cached_getaddrinfo
+
+
+def shared_session(config: TransportConfig):
+    """
+    Общая HTTP-сессия для ccxt-клиентов: пул keep-alive соединений,
+    которые переиспользуются всеми клиентами и аккаунтами одной биржи
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class SharedSession(requests.Session):
+        # ccxt закрывает сессию при удалении клиента,
+        # а общая сессия должна пережить любой из них
+        def close(self):
+            pass
+
+    with _lock:
+        session = _sessions.get(config)
+        if session is None:
+            session = SharedSession()
+            # Как у ccxt по умолчанию: прокси и сертификаты из окружения не берутся
+            session.trust_env = False
+            adapter = HTTPAdapter(pool_connections=config.pool_size, pool_maxsize=config.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[config] = session
+            _install_dns_cache(config.dns_ttl)
+        return session
+
+
+def attach(client: Any, config: TransportConfig) -> None:
+    """
+    Переводит ccxt-клиента на общую сессию
+    """
+    client.session = shared_session(config)
+
+
+def stats() -> Tuple[int, int]:
+    """
+    Запросы и новые соединения по всем общим сессиям
+
+    Returns:
+        (запросов, открыто соединений)
+    """
+    requests_count = connections = 0
+    for session in list(_sessions.values()):
+        for adapter in set(session.adapters.values()):
+            manager = getattr(adapter, "poolmanager", None)
+            if manager is None:
+                continue
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    requests_count += pool.num_requests
+                    connections += pool.num_connections
+    return requests_count, connections
+
+
+def log_stats() -> Optional[float]:
+    """
+    Пишет в лог долю запросов, выполненных без нового соединения
+
+    Returns:
+        Доля переиспользования или None, если запросов не было
+    """
+    requests_count, connections = stats()
+    if not requests_count:
+        return None
+    reuse = 1 - connections / requests_count
+    logger.info(
+        f"HTTP: запросов {requests_count}, новых соединений {connections} "
+        f"(переиспользование {reuse:.0%})"
+    )
+    return reuse
@@ -1,7 +1,9 @@
+import ipaddress
 import re
 import sys
+from decimal import Decimal
 from enum import Enum
-from typing import Tuple
+from typing import Dict, List, Sequence, Tuple, Optional
 
 from loguru import logger
 import questionary
@@ -21,23 +23,27 @@ class WalletType(Enum):
     CARDANO = "Cardano"
 
 
-def setup_logger():
+def setup_logger(level: str = "INFO", logfile: bool = True, sink=None):
     """
     Настройки логгера и запись в лог
+
+    sink - куда выводить сообщения вместо sys.stdout (например, через
+    живую панель, которая перерисовывается после каждого сообщения)
     """
     logger.remove()
     logger.add(
-        sys.stdout,
+        sink or sys.stdout,
         colorize=True,
         format="<green>{time:DD.MM HH:mm:ss}</green> - <level>{message}</level>",
-        level="INFO"
-    )
-    logger.add(
-        "logfile.log",
-        format="{time:DD.MM HH:mm:ss} | {name} - {message}",
-        level="INFO",
-        encoding="utf-8"
+        level=level
     )
+    if logfile:
+        logger.add(
+            "logfile.log",
+            format="{time:DD.MM HH:mm:ss} | {name} - {message}",
+            level=level,
+            encoding="utf-8"
+        )
 
 
 def is_valid_token_name(
@@ -57,14 +63,14 @@ def is_valid_token_name(
 
 def is_valid_number(
         input_str: str,
-        min_value: float | None = None
+        min_value: Decimal | float | None = None
 ) -> bool | str:
     """
     Проверка соответствию ввода нужного числа
     """
     if not re.match(r'^\d+(\.\d+)?$', input_str):
         return "Введите корректное число (разделитель — точка)."
-    value = float(input_str)
+    value = Decimal(input_str)
     if min_value is not None and value < min_value:
         return f"Значение не может быть меньше {min_value}."
 
@@ -72,7 +78,7 @@ def is_valid_number(
 
 
 def count_decimal_places(
-        number: float
+        number: Decimal | float
 ) -> int:
     """
     Определяет количество знаков после запятой в числе.
@@ -81,17 +87,15 @@ def count_decimal_places(
         number: Число для проверки
 
     Returns:
-        Количество знаков после запятой
+        Количество знаков после запятой (без незначащих нулей)
     """
-    str_num = str(number)
-    if '.' not in str_num:
-        return 0
-    return len(str_num.split('.')[1])
+    exponent = Decimal(str(number)).normalize().as_tuple().exponent
+    return max(0, -exponent)
 
 
 def determine_min_decimals(
-        min_amount: float,
-        max_amount: float
+        min_amount: Decimal | float,
+        max_amount: Decimal | float
 ) -> int:
     """
     Определяет минимальное необходимое количество знаков после запятой
@@ -111,18 +115,23 @@ def determine_min_decimals(
 
 
 def get_max_decimals_for_exchange(
-        exchange_name: str
+        exchange_name: str,
+        precision: Optional[int] = None
 ) -> int:
     """
     Возвращает максимальное количество знаков после запятой для биржи.
 
     Args:
         exchange_name: Название биржи
+        precision: Точность из метаданных биржи (Exchange.get_max_decimals)
 
     Returns:
         Максимальное количество знаков
     """
-    # Для Bybit максимум 4 знака, для всех остальных - 6
+    if precision is not None:
+        return precision
+
+    # Если метаданные недоступны: для Bybit максимум 4 знака, для остальных - 6
     if exchange_name.lower() == "bybit":
         return 4
     return 6
@@ -131,8 +140,9 @@ def get_max_decimals_for_exchange(
 def is_valid_decimal_places(
         input_str: str,
         exchange_name: str,
-        min_amount: float,
-        max_amount: float
+        min_amount: Decimal | float,
+        max_amount: Decimal | float,
+        precision: Optional[int] = None
 ) -> bool | str:
     """
     Проверяет, что введенное количество знаков не превышает
@@ -141,6 +151,7 @@ def is_valid_decimal_places(
     Args:
         input_str: Введенное значение
         exchange_name: Название биржи
+        precision: Точность токена из метаданных биржи
 
     Returns:
         True если значение корректно, иначе строка с ошибкой
@@ -155,7 +166,7 @@ def is_valid_decimal_places(
             "не может быть отрицательным."
         )
 
-    max_decimals = get_max_decimals_for_exchange(exchange_name)
+    max_decimals = get_max_decimals_for_exchange(exchange_name, precision)
     if value > max_decimals:
         return (
             f"Для {exchange_name.upper()} максимальное "
@@ -174,7 +185,8 @@ def is_valid_decimal_places(
 
 def is_valid_amount_for_decimals(
         input_str: str,
-        exchange_name: str
+        exchange_name: str,
+        precision: Optional[int] = None
 ) -> bool | str:
     """
     Проверяет, что количество знаков после запятой в числе
@@ -183,6 +195,7 @@ def is_valid_amount_for_decimals(
     Args:
         input_str: Введенное значение
         exchange_name: Название биржи
+        precision: Точность токена из метаданных биржи
 
     Returns:
         True если значение корректно, иначе строка с ошибкой
@@ -190,11 +203,11 @@ def is_valid_amount_for_decimals(
     if not re.match(r'^\d+(\.\d+)?$', input_str):
         return "Введите корректное число (разделитель — точка)."
 
-    value = float(input_str)
+    value = Decimal(input_str)
     if value < 0:
         return "Значение должно быть положительным."
 
-    max_decimals = get_max_decimals_for_exchange(exchange_name)
+    max_decimals = get_max_decimals_for_exchange(exchange_name, precision)
     actual_decimals = count_decimal_places(value)
 
     if actual_decimals > max_decimals:
@@ -206,8 +219,8 @@ def is_valid_amount_for_decimals(
     return True
 
 def get_amount_range(
-        min_value: float
-) -> Tuple[float, float]:
+        min_value: Decimal
+) -> Tuple[Decimal, Decimal]:
     """
     Запрашивает у пользователя новый диапазон сумм для вывода.
 
@@ -215,7 +228,7 @@ def get_amount_range(
         min_value: Минимально допустимое значение
 
     Returns:
-        Tuple[float, float]: Новый диапазон (мин, макс)
+        Tuple[Decimal, Decimal]: Новый диапазон (мин, макс)
     """
     logger.info(
         f"Необходимо задать новый "
@@ -227,20 +240,21 @@ def get_amount_range(
         "Введите новую минимальную сумму:",
         validate=lambda x: is_valid_number(x, min_value)
     ).ask()
-    min_amount = float(min_amount)
+    min_amount = Decimal(min_amount)
 
     # Запрашиваем максимальную сумму
     max_amount = questionary.text(
         "Введите новую максимальную сумму:",
         validate=lambda x: is_valid_number(x, min_amount)
     ).ask()
-    max_amount = float(max_amount)
+    max_amount = Decimal(max_amount)
 
     return min_amount, max_amount
 
 
 def select_chain(
-        chains_list: dict
+        chains_list: dict,
+        token: Optional[str] = None
 ) -> dict:
     """
     Генерация и вывод списка сетей для выбора пользователем
@@ -255,6 +269,7 @@ def select_chain(
             "chainId": details["chainId"],
             "withdrawFee": details["withdrawFee"],
             "withdrawMin": details["withdrawMin"],
+            "precision": details.get("precision"),
         }
         for chain, details in chains_list.items()
         if details["withdrawEnable"]
@@ -263,7 +278,7 @@ def select_chain(
         logger.error("Нет доступных сетей для вывода!")
         raise ValueError("No available chains")
     choice = questionary.select(
-        "Выберите сеть для вывода:",
+        f"Выберите сеть для вывода ${token}:" if token else "Выберите сеть для вывода:",
         choices=[
             {"name": chain["name"],
              "value": chain
@@ -271,6 +286,56 @@ def select_chain(
     ).ask()
     return choice
 
+def resolve_chain(
+        chains_list: dict,
+        name: str
+) -> Optional[dict]:
+    """
+    Поиск доступной сети по ключу или ID (без учета регистра)
+
+    Returns:
+        Сеть в том же виде, что возвращает select_chain, или None
+    """
+    name = name.strip().upper()
+    for chain, details in chains_list.items():
+        if not details["withdrawEnable"]:
+            continue
+        if name in (str(chain).upper(), str(details["chainId"]).upper()):
+            return {
+                "name": chain,
+                "chainKey": chain,
+                "chainId": details["chainId"],
+                "withdrawFee": details["withdrawFee"],
+                "withdrawMin": details["withdrawMin"],
+                "precision": details.get("precision"),
+            }
+    return None
+
+
+def is_loopback(host: str) -> bool:
+    """
+    Локальный ли адрес (localhost, 127.0.0.0/8, ::1)
+    """
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def format_duration(seconds: float) -> str:
+    """Возвращает длительность в виде 'N ч. NN мин. NN сек.'"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours} ч. {minutes:02d} мин. {seconds:02d} сек."
+    if minutes:
+        return f"{minutes} мин. {seconds:02d} сек."
+    return f"{seconds} сек."
+
+
 def format_amount(n):
     """Возвращает число без экспоненты, до 10 знаков после запятой."""
     try:
@@ -304,3 +369,20 @@ def format_amount(n):
             return ("%.10f" % x).rstrip('0').rstrip('.')
         except Exception:
             return str(n)
+
+
+def format_table(columns: Sequence[Tuple[str, str]], rows: List[Dict[str, str]]) -> str:
+    """
+    Таблица для лога: columns - пары (ключ, заголовок), пустые ячейки - "—"
+    """
+    widths = {
+        key: max(len(title), *(len(row.get(key, "—")) for row in rows))
+        for key, title in columns
+    }
+    lines = [
+        "  ".join(title.ljust(widths[key]) for key, title in columns),
+        "  ".join("-" * widths[key] for key, _ in columns),
+    ]
+    for row in rows:
+        lines.append("  ".join(row.get(key, "—").ljust(widths[key]) for key, _ in columns))
+    return "\n".join(lines)
@@ -1,8 +1,14 @@
+import heapq
+import mmap
+import os
 import re
-from typing import List, Tuple, Optional
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional, Iterable, Iterator, Dict, Union
 from loguru import logger
 
 from core.utils import WalletType
+from core.wallet_file import WalletRow, iter_wallet_rows, row_address
 
 
 class WalletValidator:
@@ -82,48 +88,53 @@ class WalletValidator:
 
         # Если есть кошельки с нестандартной длиной, выводим предупреждение
         if non_standard_wallets:
-            logger.warning(
-                f"Обнаружены кошельки с нестандартной "
-                f"длиной (стандарт: {common_length} символов):"
-            )
-            for line, wallet, length in non_standard_wallets:
-                logger.warning(
-                    f"  Строка {line}: {wallet} - {length} символов"
-                )
+            self._report_non_standard_wallets(non_standard_wallets)
             return False
 
         # Определяем тип кошельков на основе регулярных выражений
-        determined_types = set()
+        type_counts = {}
         for wallet in self.wallets:
             wallet_type = self._determine_wallet_type(wallet)
-            determined_types.add(wallet_type)
-
-        # Если есть только один тип (кроме UNKNOWN), устанавливаем его
-        if len(determined_types) == 1:
-            self.wallet_type = next(iter(determined_types))
-        # Если несколько типов, выбираем наиболее вероятный
-        elif len(determined_types) > 1:
-            # Если среди типов есть UNKNOWN, игнорируем его
-            if WalletType.UNKNOWN in determined_types and len(determined_types) > 1:
-                determined_types.discard(WalletType.UNKNOWN)
-
-            # Если после удаления UNKNOWN остался один тип, используем его
-            if len(determined_types) == 1:
-                self.wallet_type = next(iter(determined_types))
-            else:
-                # Иначе подсчитываем, какой тип встречается чаще всего
-                type_counts = {}
-                for wallet in self.wallets:
-                    wallet_type = self._determine_wallet_type(wallet)
-                    if wallet_type != WalletType.UNKNOWN:
-                        type_counts[wallet_type] = type_counts.get(wallet_type, 0) + 1
-
-                if type_counts:
-                    self.wallet_type = max(type_counts.items(), key=lambda x: x[1])[0]
+            type_counts[wallet_type] = type_counts.get(wallet_type, 0) + 1
 
+        self.wallet_type = self._resolve_wallet_type(type_counts)
         logger.info(f"Тип кошельков: {self.wallet_type.value}")
         return True
 
+    def _report_non_standard_wallets(
+            self, non_standard_wallets: List[Tuple[int, str, int]]
+    ) -> None:
+        logger.warning(
+            f"Обнаружены кошельки с нестандартной "
+            f"длиной (стандарт: {self.standard_length} символов):"
+        )
+        for line, wallet, length in non_standard_wallets:
+            logger.warning(
+                f"  Строка {line}: {wallet} - {length} символов"
+            )
+
+    @staticmethod
+    def _resolve_wallet_type(type_counts: Dict[WalletType, int]) -> WalletType:
+        """
+        Выбирает тип кошельков по количеству совпадений
+
+        Args:
+            type_counts: Количество кошельков каждого типа
+                в порядке первого появления типа в списке
+
+        Returns:
+            Единственный распознанный тип, а если их несколько - самый
+            частый (UNKNOWN учитывается, только если других типов нет)
+        """
+        known_counts = {
+            wallet_type: count
+            for wallet_type, count in type_counts.items()
+            if wallet_type != WalletType.UNKNOWN
+        }
+        if not known_counts:
+            return WalletType.UNKNOWN
+        return max(known_counts.items(), key=lambda x: x[1])[0]
+
     def _determine_wallet_type(self, wallet: str) -> WalletType:
         """
         Определяет тип кошелька на основе его формата
@@ -140,6 +151,15 @@ class WalletValidator:
                 return wallet_type
         return WalletType.UNKNOWN
 
+    @classmethod
+    def _is_private_key_like(cls, wallet: str) -> bool:
+        wallet_no_prefix = wallet.strip()
+        if wallet_no_prefix.startswith('0x'):
+            wallet_no_prefix = wallet_no_prefix[2:]
+
+        return len(wallet_no_prefix) == cls.PRIVATE_KEY_LENGTHS[WalletType.EVM] and all(
+            c in '0123456789abcdefABCDEF' for c in wallet_no_prefix)
+
     def _check_for_private_keys(self) -> None:
         """
         Проверяет, не загрузил ли пользователь приватные ключи вместо адресов
@@ -149,48 +169,439 @@ class WalletValidator:
             expected_pk_length = self.PRIVATE_KEY_LENGTHS[WalletType.EVM]
 
             if self.standard_length >= expected_pk_length:
-                pk_like_wallets = []
-                for i, wallet in enumerate(self.wallets):
-                    wallet_no_prefix = wallet.strip()
-                    if wallet_no_prefix.startswith('0x'):
-                        wallet_no_prefix = wallet_no_prefix[2:]
-
-                    if len(wallet_no_prefix) == expected_pk_length and all(
-                            c in '0123456789abcdefABCDEF' for c in wallet_no_prefix):
-                        pk_like_wallets.append((i + 1, wallet))
-
-                if pk_like_wallets:
-                    logger.warning("⚠️ ПРЕДУПРЕЖДЕНИЕ! ⚠️")
-                    logger.warning(
-                        "Следующие записи похожи на "
-                        "приватные ключи EVM, а не на адреса кошельков:"
-                    )
-                    for line, wallet in pk_like_wallets:
-                        logger.warning(
-                            f"  Строка {line}: {wallet}"
-                        )
-                    logger.warning(
-                        "Публичные адреса EVM кошельков "
-                        "должны начинаться с '0x' и иметь "
-                        "длину 42 символа."
-                    )
-                    logger.warning(
-                        "Проверьте, не "
-                        "загрузили ли вы случайно приватные ключи!"
+                pk_like_wallets = [
+                    (i + 1, wallet)
+                    for i, wallet in enumerate(self.wallets)
+                    if self._is_private_key_like(wallet)
+                ]
+                self._report_private_keys(pk_like_wallets)
+
+    @staticmethod
+    def _report_private_keys(pk_like_wallets: List[Tuple[int, str]]) -> None:
+        if pk_like_wallets:
+            logger.warning("⚠️ ПРЕДУПРЕЖДЕНИЕ! ⚠️")
+            logger.warning(
+                "Следующие записи похожи на "
+                "приватные ключи EVM, а не на адреса кошельков:"
+            )
+            for line, wallet in pk_like_wallets:
+                logger.warning(
+                    f"  Строка {line}: {wallet}"
+                )
+            logger.warning(
+                "Публичные адреса EVM кошельков "
+                "должны начинаться с '0x' и иметь "
+                "длину 42 символа."
+            )
+            logger.warning(
+                "Проверьте, не "
+                "загрузили ли вы случайно приватные ключи!"
+            )
+
+
+def _iter_chunk_wallets(
+        file_path: str, start: int, end: int
+) -> Iterator[str]:
+    """
+    Читает непустые строки, начинающиеся в диапазоне байт [start, end)
+    """
+    with open(file_path, "rb") as file:
+        if start:
+            # Дочитываем строку, начавшуюся в предыдущем диапазоне
+            file.seek(start - 1)
+            file.readline()
+        while file.tell() < end:
+            line = file.readline()
+            if not line:
+                break
+            wallet = line.decode("utf-8").strip()
+            if wallet:
+                yield wallet
+
+
+def _scan_chunk(file_path: str, start: int, end: int) -> Dict:
+    """
+    Первый проход по диапазону файла: длины, типы и похожие на ключи строки.
+    Для длин и типов запоминается индекс первого появления, чтобы при
+    слиянии сохранить порядок однопроцессной проверки.
+    """
+    validator = WalletValidator([])
+    lengths: Dict[int, List[int]] = {}
+    types: Dict[WalletType, List[int]] = {}
+    pk_like = []
+    count = 0
+    for count, wallet in enumerate(_iter_chunk_wallets(file_path, start, end), 1):
+        lengths.setdefault(len(wallet), [count - 1, 0])[1] += 1
+        wallet_type = validator._determine_wallet_type(wallet)
+        types.setdefault(wallet_type, [count - 1, 0])[1] += 1
+        if validator._is_private_key_like(wallet):
+            pk_like.append((count - 1, wallet))
+    return {"count": count, "lengths": lengths, "types": types, "pk_like": pk_like}
+
+
+def _find_non_standard(
+        file_path: str, start: int, end: int, standard_length: int
+) -> List[Tuple[int, str, int]]:
+    """
+    Второй проход по диапазону файла: строки нестандартной длины
+    """
+    return [
+        (i, wallet, len(wallet))
+        for i, wallet in enumerate(_iter_chunk_wallets(file_path, start, end))
+        if len(wallet) != standard_length
+    ]
+
+
+class ParallelWalletValidator(WalletValidator):
+    """
+    Проверка очень больших файлов кошельков в пуле процессов.
+
+    Файл делится на диапазоны байт по границам строк, каждый диапазон
+    проверяется отдельным процессом, результаты сливаются с сохранением
+    нумерации строк, поэтому вывод совпадает с WalletValidator.
+    """
+
+    CHUNKS_PER_WORKER = 4
+
+    def __init__(self, file_path: str, workers: Optional[int] = None):
+        super().__init__([])
+        self.file_path = file_path
+        self.workers = workers or os.cpu_count() or 1
+        self._ranges = self._split_ranges()
+        self._offsets: List[int] = []
+
+    def _split_ranges(self) -> List[Tuple[int, int]]:
+        size = os.path.getsize(self.file_path)
+        chunks = max(1, self.workers * self.CHUNKS_PER_WORKER)
+        step = max(1, -(-size // chunks))
+        return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+    def validate(self) -> bool:
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            scans = list(pool.map(
+                _scan_chunk,
+                *zip(*((self.file_path, start, end) for start, end in self._ranges))
+            )) if self._ranges else []
+
+            # Смещение номеров строк для каждого диапазона
+            self._offsets = []
+            total = 0
+            for scan in scans:
+                self._offsets.append(total)
+                total += scan["count"]
+
+            if not total:
+                logger.error("Список кошельков пуст!")
+                return False
+
+            length_counts = self._merge_counts(scans, "lengths")
+            self.standard_length = max(length_counts.items(), key=lambda x: x[1])[0]
+
+            if len(length_counts) > 1:
+                non_standard_chunks = pool.map(
+                    _find_non_standard,
+                    *zip(*(
+                        (self.file_path, start, end, self.standard_length)
+                        for start, end in self._ranges
+                    ))
+                )
+                self._report_non_standard_wallets([
+                    (offset + i + 1, wallet, length)
+                    for offset, chunk in zip(self._offsets, non_standard_chunks)
+                    for i, wallet, length in chunk
+                ])
+                return False
+
+        self.wallet_type = self._resolve_wallet_type(self._merge_counts(scans, "types"))
+        logger.info(f"Тип кошельков: {self.wallet_type.value}")
+
+        if (
+            self.wallet_type == WalletType.EVM
+            and self.standard_length >= self.PRIVATE_KEY_LENGTHS[WalletType.EVM]
+        ):
+            self._report_private_keys([
+                (offset + i + 1, wallet)
+                for offset, scan in zip(self._offsets, scans)
+                for i, wallet in scan["pk_like"]
+            ])
+
+        return True
+
+    def _merge_counts(self, scans: List[Dict], key: str) -> Dict:
+        """
+        Сливает счетчики диапазонов в порядке первого появления значения
+        """
+        merged: Dict = {}
+        for offset, scan in zip(self._offsets, scans):
+            for value, (first_index, count) in scan[key].items():
+                if value in merged:
+                    merged[value][1] += count
+                else:
+                    merged[value] = [offset + first_index, count]
+        ordered = sorted(merged.items(), key=lambda x: x[1][0])
+        return {value: count for value, (_, count) in ordered}
+
+
+EVM_ADDRESS_PATTERN = re.compile(WalletValidator.WALLET_PATTERNS[WalletType.EVM])
+
+
+def normalize_address(wallet: str) -> str:
+    """
+    Приводит адрес к каноничному виду для сравнения.
+    EVM адреса нечувствительны к регистру, остальные сравниваются как есть.
+    """
+    wallet = wallet.strip()
+    if EVM_ADDRESS_PATTERN.match(wallet):
+        return wallet.lower()
+    return wallet
+
+
+class AddressIndex:
+    """
+    Отсортированный индекс адресов на диске с доступом через mmap.
+
+    Записи фиксированной ширины, поэтому поиск - бинарный, а память
+    не зависит от размера индекса.
+    """
+
+    MAGIC = b"MWIDX1"
+    HEADER_SIZE = 16
+    SORT_CHUNK_SIZE = 1_000_000
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._file = open(index_path, "rb")
+        header = self._file.read(self.HEADER_SIZE)
+        if not header.startswith(self.MAGIC):
+            self._file.close()
+            raise ValueError(f"Некорректный файл индекса: {index_path}")
+
+        self.width = int(header[len(self.MAGIC):].strip() or 0)
+        size = os.path.getsize(index_path)
+        self.count = (size - self.HEADER_SIZE) // self.width if self.width else 0
+        self._mmap = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.count else None
+        )
+
+    @classmethod
+    def open(cls, source_path: str, index_path: Optional[str] = None) -> "AddressIndex":
+        """
+        Открывает индекс для текстового списка адресов,
+        перестраивая его, если исходный файл изменился
+        """
+        index_path = index_path or os.path.splitext(source_path)[0] + ".idx"
+        if (
+            not os.path.exists(index_path)
+            or os.path.getmtime(index_path) < os.path.getmtime(source_path)
+        ):
+            cls.build(source_path, index_path)
+        return cls(index_path)
+
+    @classmethod
+    def build(cls, source_path: str, index_path: str) -> None:
+        """
+        Строит индекс внешней сортировкой: адреса сортируются
+        порциями во временные файлы, затем порции сливаются
+        """
+        logger.info(f"Строю индекс адресов для {source_path}...")
+        runs = []
+        width = 0
+        try:
+            chunk = []
+            with open(source_path, "r", encoding="utf-8") as source:
+                for line in source:
+                    address = normalize_address(line)
+                    if not address:
+                        continue
+                    width = max(width, len(address.encode()))
+                    chunk.append(address)
+                    if len(chunk) >= cls.SORT_CHUNK_SIZE:
+                        runs.append(cls._write_run(chunk))
+                        chunk = []
+            if chunk:
+                runs.append(cls._write_run(chunk))
+
+            run_files = [open(run, "r", encoding="utf-8") for run in runs]
+            try:
+                merged = heapq.merge(*(
+                    (line.rstrip("\n") for line in run_file)
+                    for run_file in run_files
+                ))
+                with open(index_path, "wb") as index:
+                    index.write(
+                        cls.MAGIC + str(width).encode().ljust(cls.HEADER_SIZE - len(cls.MAGIC))
                     )
+                    previous = None
+                    for address in merged:
+                        if address == previous:
+                            continue
+                        index.write(address.encode().ljust(width))
+                        previous = address
+            finally:
+                for run_file in run_files:
+                    run_file.close()
+        finally:
+            for run in runs:
+                os.remove(run)
+
+    @staticmethod
+    def _write_run(chunk: List[str]) -> str:
+        chunk.sort()
+        fd, run_path = tempfile.mkstemp(suffix=".run")
+        with os.fdopen(fd, "w", encoding="utf-8") as run:
+            run.writelines(f"{address}\n" for address in chunk)
+        return run_path
+
+    def _record(self, position: int) -> bytes:
+        offset = self.HEADER_SIZE + position * self.width
+        return self._mmap[offset:offset + self.width].rstrip(b" ")
+
+    def __contains__(self, address: str) -> bool:
+        if not self.count:
+            return False
+        key = normalize_address(address).encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low < self.count and self._record(low) == key
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "AddressIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def iter_unique_wallets(
+        wallets: Iterable[Union[str, WalletRow]]
+) -> Iterator[Tuple[int, Union[str, WalletRow], bool]]:
+    """
+    Проходит по кошелькам, отмечая повторы уже встреченных адресов.
+    Строка без токена (обычный адрес или строка CSV без колонки token)
+    получает все токены запуска, поэтому пересекается с любой строкой
+    того же адреса. Строка с токеном - повтор, если адрес уже встречался
+    без токена или с тем же токеном.
+
+    Yields:
+        Кортеж (номер строки, кошелек, является ли дубликатом)
+    """
+    # Адрес -> токены его строк (None - все токены)
+    seen: Dict[str, set] = {}
+    for i, wallet in enumerate(wallets):
+        address = normalize_address(row_address(wallet))
+        token = wallet.token if isinstance(wallet, WalletRow) else None
+        tokens = seen.get(address)
+        if tokens is not None and (None in tokens or token is None or token in tokens):
+            yield i + 1, wallet, True
+            continue
+        seen.setdefault(address, set()).add(token)
+        yield i + 1, wallet, False
+
+
+def filter_wallets(
+        wallets: List[Union[str, WalletRow]],
+        blocklist_path: Optional[str] = None
+) -> List[Union[str, WalletRow]]:
+    """
+    Удаляет дубликаты и адреса из блоклиста (уже получавшие средства)
+
+    Args:
+        wallets: Список адресов кошельков или строк CSV
+        blocklist_path: Путь к файлу с исключенными адресами
+
+    Returns:
+        Отфильтрованный список кошельков в исходном порядке
+    """
+    blocklist = None
+    if blocklist_path and os.path.exists(blocklist_path):
+        blocklist = AddressIndex.open(blocklist_path)
+
+    filtered = []
+    duplicates = []
+    blocked = []
+    try:
+        for line, wallet, is_duplicate in iter_unique_wallets(wallets):
+            if is_duplicate:
+                duplicates.append((line, wallet))
+            elif blocklist is not None and row_address(wallet) in blocklist:
+                blocked.append((line, wallet))
+            else:
+                filtered.append(wallet)
+    finally:
+        if blocklist is not None:
+            blocklist.close()
+
+    if duplicates:
+        logger.warning(
+            f"Удалены повторяющиеся кошельки: {len(duplicates)}"
+        )
+        for line, wallet in duplicates[:20]:
+            logger.warning(f"  Строка {line}: {row_address(wallet)}")
+    if blocked:
+        logger.warning(
+            f"Исключены кошельки из блоклиста {blocklist_path}: {len(blocked)}"
+        )
+        for line, wallet in blocked[:20]:
+            logger.warning(f"  Строка {line}: {row_address(wallet)}")
+
+    return filtered
+
+
+def check_wallet_list(
+        wallets: List[str],
+        blocklist_path: Optional[str] = None
+) -> Tuple[List[str], Optional[WalletType]]:
+    """
+    Проверяет переданный списком набор кошельков так же, как файл
+    в check_wallets: формат адресов, дубликаты и блоклист
+
+    Returns:
+        Кортеж (список кошельков без дубликатов и исключенных, тип кошельков
+        или None, если проверка не пройдена)
+    """
+    wallets = [wallet.strip() for wallet in wallets if wallet.strip()]
+    validator = WalletValidator(wallets)
+    is_valid = validator.validate()
+    wallets = filter_wallets(wallets, blocklist_path)
+    if not is_valid:
+        logger.error("Проверка кошельков не пройдена.")
+        return wallets, None
+    return wallets, validator.wallet_type
+
+
+# Размер файла, начиная с которого проверка идет в нескольких процессах
+PARALLEL_VALIDATION_THRESHOLD = 32 * 1024 * 1024
 
 
 def check_wallets(
-        file_path: str
+        file_path: str,
+        blocklist_path: Optional[str] = None,
+        workers: Optional[int] = None
 ) -> Tuple[List[str], Optional[WalletType]]:
     """
     Проверяет кошельки из файла и определяет их тип
 
     Args:
         file_path: Путь к файлу с кошельками
+        blocklist_path: Путь к файлу с адресами, которые нужно исключить
+        workers: Количество процессов для проверки (по умолчанию
+            несколько процессов используются только для больших файлов)
 
     Returns:
-        Кортеж (список кошельков, тип кошельков)
+        Кортеж (список кошельков без дубликатов и исключенных, тип кошельков)
     """
     try:
         with open(file_path, "r") as file:
@@ -203,8 +614,16 @@ def check_wallets(
             )
             return [], None
 
-        validator = WalletValidator(wallets)
-        if validator.validate():
+        if workers is None and os.path.getsize(file_path) >= PARALLEL_VALIDATION_THRESHOLD:
+            workers = os.cpu_count()
+
+        if workers and workers > 1:
+            validator = ParallelWalletValidator(file_path, workers)
+        else:
+            validator = WalletValidator(wallets)
+        is_valid = validator.validate()
+        wallets = filter_wallets(wallets, blocklist_path)
+        if is_valid:
             # Возвращаем кошельки и тип, даже если тип UNKNOWN
             return wallets, validator.wallet_type
         else:
@@ -224,3 +643,79 @@ def check_wallets(
             f"Ошибка при чтении файла {file_path}: {e}"
         )
         return [], None
+
+
+# Типы кошельков, для которых биржи часто требуют memo/tag
+MEMO_WALLET_TYPES = {WalletType.RIPPLE, WalletType.STELLAR, WalletType.TON}
+
+
+def check_wallet_rows(
+        file_path: str,
+        blocklist_path: Optional[str] = None
+) -> Tuple[List[WalletRow], Optional[WalletType]]:
+    """
+    Проверяет CSV/TSV файл кошельков с индивидуальными параметрами
+    (amount, token, chain, memo) и определяет тип кошельков
+
+    Args:
+        file_path: Путь к CSV/TSV файлу
+        blocklist_path: Путь к файлу с адресами, которые нужно исключить
+
+    Returns:
+        Кортеж (строки файла без дубликатов и исключенных, тип кошельков).
+        При ошибках в строках файла список пуст.
+    """
+    try:
+        rows = []
+        errors = []
+        for line, row, error in iter_wallet_rows(file_path):
+            if error:
+                errors.append((line, error))
+            else:
+                rows.append(row)
+
+        if errors:
+            logger.error(f"Ошибки в файле {file_path}:")
+            for line, error in errors:
+                logger.error(f"  Строка {line}: {error}")
+            return [], None
+
+        if not rows:
+            logger.error(
+                f"Файл {file_path} пуст или "
+                f"содержит только пустые строки"
+            )
+            return [], None
+
+        validator = WalletValidator([row.address for row in rows])
+        is_valid = validator.validate()
+        rows = filter_wallets(rows, blocklist_path)
+
+        if validator.wallet_type in MEMO_WALLET_TYPES:
+            missing_memo = sum(1 for row in rows if not row.memo)
+            if missing_memo:
+                logger.warning(
+                    f"Для {missing_memo} кошельков типа "
+                    f"{validator.wallet_type.value} не указан memo/tag. "
+                    f"Проверьте, не требуется ли он получателю!"
+                )
+
+        if is_valid:
+            return rows, validator.wallet_type
+
+        logger.error(
+            "Проверка кошельков не пройдена. "
+            "Пожалуйста, исправьте указанные ошибки."
+        )
+        return rows, None
+
+    except FileNotFoundError:
+        logger.error(
+            f"Файл {file_path} не найден"
+        )
+        return [], None
+    except Exception as e:
+        logger.error(
+            f"Ошибка при чтении файла {file_path}: {e}"
+        )
+        return [], None
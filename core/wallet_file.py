@@ -0,0 +1,119 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from msgspec import Struct
+
+
+class WalletRow(Struct):
+    """Строка табличного файла кошельков с индивидуальными параметрами"""
+    address: str
+    amount: Optional[Decimal] = None
+    token: Optional[str] = None
+    chain: Optional[str] = None
+    memo: Optional[str] = None
+
+
+# Допустимые названия колонок -> поле WalletRow
+COLUMN_ALIASES = {
+    "address": "address",
+    "wallet": "address",
+    "amount": "amount",
+    "token": "token",
+    "coin": "token",
+    "chain": "chain",
+    "network": "chain",
+    "memo": "memo",
+    "tag": "memo",
+}
+
+
+def is_table_file(file_path: str) -> bool:
+    """
+    Файл кошельков в формате CSV/TSV (с колонками), а не список адресов
+    """
+    return file_path.lower().endswith((".csv", ".tsv"))
+
+
+def _decode_amount(value: str) -> Decimal:
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"некорректная сумма '{value}'")
+    if not amount.is_finite() or amount <= 0:
+        raise ValueError(f"сумма должна быть положительной: '{value}'")
+    return amount
+
+
+def _decode_columns(header: List[str]) -> List[Optional[str]]:
+    fields = [COLUMN_ALIASES.get(column.strip().lower()) for column in header]
+    if "address" not in fields:
+        raise ValueError("в заголовке нет колонки address")
+    unknown = [
+        column for column, field in zip(header, fields)
+        if field is None and column.strip()
+    ]
+    if unknown:
+        raise ValueError(f"неизвестные колонки: {', '.join(unknown)}")
+    return fields
+
+
+def iter_wallet_rows(
+        file_path: str
+) -> Iterator[Tuple[int, Optional[WalletRow], Optional[str]]]:
+    """
+    Потоково читает CSV/TSV файл кошельков, разбирая и типизируя
+    колонки за один проход
+
+    Yields:
+        Кортеж (номер строки, строка или None, текст ошибки или None)
+    """
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
+        if file_path.lower().endswith(".tsv"):
+            delimiter = "\t"
+        else:
+            first_line = file.readline()
+            file.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(first_line, delimiters=",;\t").delimiter
+            except csv.Error:
+                # Одна колонка (например, только address) - разделителя нет
+                delimiter = ","
+
+        reader = csv.reader(file, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = _decode_columns(header)
+
+        for row in reader:
+            line = reader.line_num
+            if not any(value.strip() for value in row):
+                continue
+
+            values: Dict[str, str] = {
+                field: value.strip()
+                for field, value in zip(fields, row)
+                if field and value.strip()
+            }
+            if "address" not in values:
+                yield line, None, "не указан адрес"
+                continue
+
+            try:
+                yield line, WalletRow(
+                    address=values["address"],
+                    amount=_decode_amount(values["amount"]) if "amount" in values else None,
+                    token=values["token"].upper() if "token" in values else None,
+                    chain=values.get("chain"),
+                    memo=values.get("memo"),
+                ), None
+            except ValueError as e:
+                yield line, None, str(e)
+
+
+def row_address(wallet) -> str:
+    """
+    Адрес кошелька из строки файла или обычного списка адресов
+    """
+    return wallet.address if isinstance(wallet, WalletRow) else wallet
@@ -0,0 +1,149 @@
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+
+from core.exchange import Exchange, to_decimal
+from core.utils import format_amount, format_duration
+
+
+class DepositWatcher:
+    """
+    Ожидание пополнения баланса перед рассылкой.
+
+    Опрашивает fetch_deposits с курсором since и небольшим limit - каждый
+    запрос возвращает только новые депозиты. Баланс запрашивается при
+    зачислении депозита и раз в balance_every опросов (для внутренних
+    переводов, которых нет в истории депозитов). Пока ничего не происходит,
+    интервал опроса растет до max_interval, при депозите в пути
+    сбрасывается до min_interval.
+    """
+
+    def __init__(
+            self,
+            exchange: Exchange,
+            min_interval: float = 5.0,
+            max_interval: float = 60.0,
+            balance_every: int = 5,
+            lookback: float = 3600.0,
+            clock=time
+    ):
+        """
+        Args:
+            exchange: Объект биржи с токеном для ожидания
+            min_interval: Начальный интервал опроса, сек.
+            max_interval: Максимальный интервал опроса, сек.
+            balance_every: Запрос баланса каждые N опросов без депозитов
+            lookback: Глубина первого запроса депозитов (депозиты в пути), сек.
+            clock: Источник времени с методами time() и sleep()
+        """
+        self.exchange = exchange
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.balance_every = balance_every
+        self.lookback = lookback
+        self.clock = clock
+        self.since: Optional[int] = None
+        self._seen: Set[str] = set()
+        # Депозиты в пути: ID -> время депозита
+        self._pending: Dict[str, int] = {}
+
+    def _balance(self) -> Decimal:
+        balances = self.exchange._fetch_balance()
+        return to_decimal(balances.get("total", {}).get(self.exchange.token))
+
+    def _supports_deposits(self) -> bool:
+        return bool(getattr(self.exchange.exchange, "has", {}).get("fetchDeposits"))
+
+    def poll_deposits(self) -> List[Dict]:
+        """
+        Новые и изменившие статус депозиты токена с прошлого опроса
+        """
+        client = self.exchange.exchange
+        if self.since is None:
+            self.since = int((self.clock.time() - self.lookback) * 1000)
+        deposits = client.fetch_deposits(self.exchange.token, self.since, 20)
+
+        changed = []
+        for deposit in deposits:
+            deposit_id = str(deposit.get("id") or deposit.get("txid"))
+            status = deposit.get("status")
+            key = f"{deposit_id}:{status}"
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            changed.append(deposit)
+            if status == "pending":
+                self._pending[deposit_id] = deposit.get("timestamp") or self.since
+            else:
+                self._pending.pop(deposit_id, None)
+
+        # Курсор не сдвигается дальше депозитов в пути, чтобы увидеть их зачисление
+        if self._pending:
+            self.since = min(self._pending.values())
+        elif deposits:
+            self.since = max(self.since, *(deposit.get("timestamp") or 0 for deposit in deposits))
+        return changed
+
+    def wait_for(self, target: Decimal, timeout: Optional[float] = None) -> Decimal:
+        """
+        Ждет, пока баланс основного кошелька достигнет target
+
+        Returns:
+            Баланс токена на момент готовности
+
+        Raises:
+            TimeoutError: Если баланс не пополнен за timeout секунд
+        """
+        token = self.exchange.token
+        balance = self._balance()
+        if balance >= target:
+            return balance
+
+        logger.info(
+            f"Жду пополнения: баланс {format_amount(balance)} ${token}, "
+            f"нужно {format_amount(target)}"
+        )
+        started = self.clock.time()
+        deposits = self._supports_deposits()
+        interval = self.min_interval
+        polls = 0
+
+        while True:
+            if timeout is not None and self.clock.time() - started >= timeout:
+                raise TimeoutError(
+                    f"Баланс ${token} не пополнен за {format_duration(timeout)}"
+                )
+            self.clock.sleep(interval)
+            polls += 1
+
+            credited = False
+            try:
+                if deposits:
+                    for deposit in self.poll_deposits():
+                        amount = format_amount(to_decimal(deposit.get("amount")))
+                        if deposit.get("status") == "ok":
+                            credited = True
+                            logger.success(f"Депозит {amount} ${token} зачислен")
+                        else:
+                            logger.info(f"Депозит {amount} ${token}: {deposit.get('status')}")
+                if credited or not deposits or polls % self.balance_every == 0:
+                    balance = self._balance()
+            except Exception as e:
+                logger.warning(f"Ошибка при проверке депозитов: {e}")
+                interval = min(interval * 2, self.max_interval)
+                continue
+
+            if balance >= target:
+                logger.success(
+                    f"Баланс пополнен: {format_amount(balance)} ${token} "
+                    f"(ожидание {format_duration(self.clock.time() - started)})"
+                )
+                return balance
+
+            # Депозит в пути - проверяем чаще, иначе реже
+            if self._pending or credited:
+                interval = self.min_interval
+            else:
+                interval = min(interval * 2, self.max_interval)
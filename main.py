@@ -1,11 +1,26 @@
+import argparse
+import os
 import signal
 import sys
+from decimal import Decimal
+from typing import Optional, Tuple
 import questionary
 from loguru import logger
 
+from core import cassette, profiler, transport
+from core.bench import run_bench
 from core.configes import Config
+from core.daemon import Daemon
+from core.dashboard import Dashboard
+from core.doctor import run_doctor
+from core.history import open_history, run_history
+from core.distributed import describe_account, run_coordinator, run_worker
+from core.exchange import Exchange
 from core.factory import ExchangeFactory
+from core.scheduler import WithdrawalScheduler
+from core.server_time import stop_clocks
 from core.service import WithdrawalService
+from core.simulator import run_simulation
 from core.utils import (
     setup_logger,
     is_valid_token_name,
@@ -13,7 +28,20 @@ from core.utils import (
     determine_min_decimals,
     is_valid_decimal_places, WalletType
 )
-from core.validator import check_wallets
+from core.validator import check_wallets, check_wallet_rows
+from core.wallet_file import is_table_file
+
+WALLET_FILES = ("data/wallets.csv", "data/wallets.tsv", "data/wallets.txt")
+
+
+def find_wallets_path() -> str:
+    """
+    Файл кошельков: табличный файл с индивидуальными параметрами имеет приоритет
+    """
+    return next(
+        (path for path in WALLET_FILES if os.path.exists(path)),
+        WALLET_FILES[-1]
+    )
 
 
 def signal_handler(sig, frame):
@@ -35,20 +63,279 @@ def ask_with_catch(question_func, *args, **kwargs):
         sys.exit(0)
 
 
+def ask_withdrawal_leg(
+        cex_name: str,
+        config: Config,
+        simulate: bool,
+        client=None
+) -> Tuple[Optional[Exchange], str, Tuple[Decimal, Decimal], int]:
+    """
+    Запрашивает токен, диапазон сумм и количество знаков после запятой
+
+    Args:
+        cex_name: Название биржи
+        config: Объект конфигурации
+        simulate: Режим симуляции (биржа не создается, точность по умолчанию)
+        client: ccxt-клиент уже созданной биржи для дополнительного токена
+
+    Returns:
+        Кортеж (объект биржи или None, токен, (мин., макс. сумма), знаков)
+    """
+    token_name = ask_with_catch(
+        questionary.text,
+        "Название токена:",
+        validate=is_valid_token_name
+    )
+    min_amount = Decimal(ask_with_catch(
+        questionary.text,
+        "Минимальная сумма:",
+        validate=lambda x: is_valid_number(x)
+    ))
+    max_amount = Decimal(ask_with_catch(
+        questionary.text,
+        "Максимальная сумма:",
+        validate=lambda x: is_valid_number(x, min_amount)
+    ))
+
+    # Точность сумм берем из метаданных биржи (в симуляции - по умолчанию)
+    exchange = None
+    precision = None
+    if not simulate:
+        with profiler.phase("metadata"):
+            exchange = ExchangeFactory.create(
+                cex_name.lower(),
+                config,
+                token_name,
+                (min_amount, max_amount),
+                client=client
+            )
+            precision = exchange.get_max_decimals()
+
+    # Определяем минимально необходимое количество знаков после запятой
+    min_decimals = determine_min_decimals(min_amount, max_amount)
+
+    # Запрашиваем максимальное количество знаков после запятой
+    max_user_decimals = int(ask_with_catch(
+        questionary.text,
+        "Максимальное количество знаков после запятой:",
+        validate=lambda x: is_valid_decimal_places(
+            x, cex_name, min_amount, max_amount, precision
+        )
+    ))
+
+    # Проверяем соответствие указанного количества знаков минимально необходимому
+    if max_user_decimals < min_decimals:
+        logger.warning(
+            f"Указанное количество знаков ({max_user_decimals}) меньше "
+            f"минимально необходимого ({min_decimals}) для указанных сумм. "
+            f"Будет использовано минимально необходимое количество знаков."
+        )
+
+    if exchange is not None:
+        exchange.decimal_places = max_user_decimals
+
+    return exchange, token_name, (min_amount, max_amount), max_user_decimals
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Разбор аргументов командной строки
+    """
+    parser = argparse.ArgumentParser(description="Multi Withdrawal")
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="Симуляция: оценка времени и комиссий без реальных выводов"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Профилирование запуска: folded stacks для флеймграфа, "
+             "время импорта и этапов в data/profile-*"
+    )
+    parser.add_argument(
+        "--dashboard",
+        action="store_true",
+        help="Панель прогресса: скорость, ETA, задержки ответа и остаток баланса"
+    )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Перед рассылкой собрать недостающую сумму с субаккаунтов "
+             "(Binance, OKX, Bybit, KuCoin, Bitget)"
+    )
+    parser.add_argument(
+        "--wait-deposit",
+        action="store_true",
+        help="Если баланса не хватает - ждать депозита и начать рассылку "
+             "автоматически после зачисления"
+    )
+    parser.add_argument(
+        "--whitelist-only",
+        action="store_true",
+        help="Пропускать кошельки, которых нет в белом списке адресов вывода биржи"
+    )
+    parser.add_argument(
+        "--failover",
+        action="store_true",
+        help="Если биржа перестала принимать выводы - продолжить рассылку "
+             "на другой бирже из config.toml с балансом и той же сетью"
+    )
+    parser.add_argument(
+        "--skip-received",
+        type=float,
+        metavar="DAYS",
+        help="Пропустить кошельки, которые уже получили эти токены "
+             "с любой биржи за DAYS дней (по истории выводов)"
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const="",
+        metavar="TOKEN",
+        help="Запрос к истории выводов: сколько TOKEN уже получили кошельки "
+             "из data/wallets.*, или последние выводы (с --address)"
+    )
+    parser.add_argument(
+        "--address",
+        help="Адрес для --history"
+    )
+    parser.add_argument(
+        "--days",
+        type=float,
+        help="Период для --history в днях (по умолчанию - вся история)"
+    )
+    parser.add_argument(
+        "--job",
+        metavar="ID",
+        help="ID задания: при перезапуске с тем же ID биржа не примет вывод дважды"
+    )
+    parser.add_argument(
+        "--coordinator",
+        action="store_true",
+        help="Распределенная рассылка: координатор делит кошельки между воркерами"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Количество локальных воркеров координатора"
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Адрес, на котором координатор или сервис заданий принимает запросы"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Порт координатора или сервиса заданий"
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Постоянный сервис: прием заданий по HTTP (POST /jobs) на --host:--port"
+    )
+    parser.add_argument(
+        "--record",
+        nargs="?",
+        const="data/cassettes",
+        metavar="DIR",
+        help="Записать ответы бирж (без подписей и ключей) в кассеты для --bench"
+    )
+    parser.add_argument(
+        "--bench",
+        nargs="?",
+        const="data/cassettes",
+        metavar="DIR",
+        help="Проверка и замер адаптеров бирж на записанных кассетах без сети"
+    )
+    parser.add_argument(
+        "--doctor",
+        action="store_true",
+        help="Проверка всех бирж из config.toml: ключи, право вывода, балансы, часы"
+    )
+    parser.add_argument(
+        "--worker",
+        metavar="URL",
+        help="Запуск воркера, подключенного к координатору по адресу URL"
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    if args.profile:
+        profiler.start()
+    if args.record:
+        cassette.start(args.record, record=True)
+    try:
+        run(args)
+    finally:
+        stop_clocks()
+        transport.log_stats()
+        cassette.finish()
+        profiler.finish()
+
+
+def run(args: argparse.Namespace):
     signal.signal(signal.SIGINT, signal_handler)
 
     setup_logger()
+    if args.worker:
+        run_worker(args.worker)
+        return
+    if args.daemon:
+        Daemon().serve(args.host, args.port)
+        return
+    if args.doctor:
+        run_doctor(Config.load())
+        return
+    if args.bench:
+        run_bench(args.bench)
+        return
+    if args.history is not None:
+        run_history(args.history or None, args.days, args.address, find_wallets_path())
+        return
+    # Воркеры координатора выполняют только выводы: эти режимы
+    # были бы молча пропущены
+    if args.coordinator:
+        unsupported = [
+            flag for flag, enabled in (
+                ("--failover", args.failover),
+                ("--sweep", args.sweep),
+                ("--wait-deposit", args.wait_deposit),
+                ("--whitelist-only", args.whitelist_only),
+                ("--dashboard", args.dashboard),
+            ) if enabled
+        ]
+        if unsupported:
+            logger.error(f"С --coordinator не поддерживается: {', '.join(unsupported)}")
+            return
+
     try:
-        config = Config.load()
+        with profiler.phase("config"):
+            config = Config.load()
 
         # Загрузка и проверка кошельков
-        wallets, wallet_type = check_wallets("data/wallets.txt")
+        wallets_path = find_wallets_path()
+        with profiler.phase("validation"):
+            if is_table_file(wallets_path):
+                wallets, wallet_type = check_wallet_rows(
+                    wallets_path,
+                    blocklist_path="data/blocklist.txt"
+                )
+            else:
+                wallets, wallet_type = check_wallets(
+                    wallets_path,
+                    blocklist_path="data/blocklist.txt"
+                )
         if not wallets:
             logger.error(
-                "Кошельки не указаны в data/wallets.txt "
-                "или файл недоступен"
-                "")
+                f"Кошельки не указаны в {wallets_path} "
+                f"или файл содержит ошибки"
+            )
             return
 
         if not wallet_type or wallet_type == WalletType.UNKNOWN:
@@ -80,59 +367,160 @@ def main():
                 "Kucoin", "Htx", "Coinex"
             ]
         ).ask()
-        token_name = questionary.text(
-            "Название токена:",
-            validate=is_valid_token_name
-        ).ask()
-        min_amount = float(questionary.text(
-            "Минимальная сумма:",
-            validate=lambda x: is_valid_number(x)
-        ).ask())
-        max_amount = float(questionary.text(
-            "Максимальная сумма:",
-            validate=lambda x: is_valid_number(x, min_amount)
-        ).ask())
-
-        # Определяем минимально необходимое количество знаков после запятой
-        min_decimals = determine_min_decimals(min_amount, max_amount)
-
-        # Запрашиваем максимальное количество знаков после запятой
-        max_user_decimals = int(ask_with_catch(
-            questionary.text,
-            "Максимальное количество знаков после запятой:",
-            validate=lambda x: is_valid_decimal_places(x, cex_name, min_amount, max_amount)
-        ))
-
-        # Проверяем соответствие указанного количества знаков минимально необходимому
-        if max_user_decimals < min_decimals:
-            logger.warning(
-                f"Указанное количество знаков ({max_user_decimals}) меньше "
-                f"минимально необходимого ({min_decimals}) для указанных сумм. "
-                f"Будет использовано минимально необходимое количество знаков."
+        try:
+            exchange, token_name, (min_amount, max_amount), max_user_decimals = (
+                ask_withdrawal_leg(cex_name, config, args.simulate)
             )
 
-        min_delay = int(questionary.text(
-            "Минимальная задержка (сек.):",
-            validate=lambda x: is_valid_number(x)
-        ).ask())
-        max_delay = int(questionary.text(
-            "Максимальная задержка (сек.):",
-            validate=lambda x: is_valid_number(x, min_delay)
-        ).ask())
+            # Дополнительные токены на те же кошельки через тот же клиент
+            extra_legs = []
+            while not args.simulate and ask_with_catch(
+                    questionary.confirm,
+                    "Добавить еще токен для этих же кошельков?",
+                    default=False
+            ):
+                leg = ask_withdrawal_leg(
+                    cex_name, config, args.simulate, client=exchange.exchange
+                )[0]
+                if leg.token in {item.token for item in [exchange] + extra_legs}:
+                    logger.warning(f"Токен {leg.token} уже добавлен")
+                    continue
+                extra_legs.append(leg)
+        except ValueError as e:
+            logger.error(f"Ошибка при работе с биржей: {e}")
+            return
+
+        # Воркеры координатора выдерживают задержку по каждому аккаунту
+        pacing = "delay" if args.coordinator else ask_with_catch(
+            questionary.select,
+            "Режим задержек:",
+            choices=[
+                {"name": "Случайная задержка между выводами", "value": "delay"},
+                {"name": "Уложить все выводы в заданное время", "value": "window"},
+            ]
+        )
 
-        try:
-            exchange = ExchangeFactory.create(
+        window = None
+        jitter = "uniform"
+        workers = 1
+        min_delay = max_delay = 0
+        if pacing == "window":
+            window = float(ask_with_catch(
+                questionary.text,
+                "За сколько часов выполнить все выводы:",
+                validate=lambda x: is_valid_number(x)
+            )) * 3600
+            jitter = ask_with_catch(
+                questionary.select,
+                "Распределение разброса времени:",
+                choices=[
+                    {"name": name, "value": key}
+                    for key, name in WithdrawalScheduler.JITTERS.items()
+                ]
+            )
+            workers = int(ask_with_catch(
+                questionary.text,
+                "Количество параллельных потоков:",
+                default="1",
+                validate=lambda x: is_valid_number(x, 1)
+            ))
+        else:
+            min_delay = int(questionary.text(
+                "Минимальная задержка (сек.):",
+                validate=lambda x: is_valid_number(x)
+            ).ask())
+            max_delay = int(questionary.text(
+                "Максимальная задержка (сек.):",
+                validate=lambda x: is_valid_number(x, min_delay)
+            ).ask())
+
+        # Переход на резервную биржу есть только в последовательной рассылке
+        if args.failover and window:
+            logger.warning(
+                "--failover не работает в режиме окна рассылки: "
+                "при отказе биржи выводы продолжатся на ней же"
+            )
+
+        if args.simulate:
+            balance = Decimal(ask_with_catch(
+                questionary.text,
+                "Баланс токена для симуляции:",
+                default=str(max_amount * len(wallets)),
+                validate=lambda x: is_valid_number(x)
+            ))
+            fee = Decimal(ask_with_catch(
+                questionary.text,
+                "Комиссия сети (если данные биржи недоступны):",
+                default="0",
+                validate=lambda x: is_valid_number(x)
+            ))
+            run_simulation(
                 cex_name.lower(),
                 config,
                 token_name,
                 (min_amount, max_amount),
-                max_user_decimals
+                max_user_decimals,
+                wallets,
+                (min_delay, max_delay),
+                balance,
+                fee,
+                window=window,
+                jitter=jitter
             )
-            service = WithdrawalService(exchange)
-            service.process_withdrawal(
+            return
+
+        if args.skip_received is not None:
+            wallets = open_history().exclude_received(
                 wallets,
-                (min_delay, max_delay)
+                [exchange.token] + [leg.token for leg in extra_legs],
+                args.skip_received
             )
+            if not wallets:
+                logger.info("Все кошельки уже получили токены, выводить нечего")
+                return
+
+        if args.coordinator:
+            try:
+                service = WithdrawalService(exchange, extra_legs=extra_legs)
+                selected_chains = service.select_chains()
+                if not selected_chains:
+                    return
+                run_coordinator(
+                    wallets,
+                    [describe_account(service, selected_chains)],
+                    (min_delay, max_delay),
+                    local_workers=args.workers,
+                    host=args.host,
+                    port=args.port,
+                    job_id=args.job,
+                    token=config.coordinator.token
+                )
+            except ValueError as e:
+                logger.error(f"Ошибка при работе с биржей: {e}")
+            return
+
+        try:
+            service = WithdrawalService(
+                exchange, extra_legs=extra_legs, job_id=args.job,
+                sweep=args.sweep, wait_deposit=args.wait_deposit,
+                failover=args.failover, enforce_whitelist=args.whitelist_only
+            )
+            dashboard = Dashboard() if args.dashboard else None
+            if dashboard is not None:
+                service.subscribe(dashboard)
+                dashboard.start()
+            try:
+                service.process_withdrawal(
+                    wallets,
+                    (min_delay, max_delay),
+                    scheduler=(
+                        WithdrawalScheduler(window, jitter, workers)
+                        if window else None
+                    )
+                )
+            finally:
+                if dashboard is not None:
+                    dashboard.stop()
 
         except ValueError as e:
             logger.error(f"Ошибка при работе с биржей: {e}")